@@ -0,0 +1,143 @@
+"""Client and load generator for analysis_server.py
+
+With save files, sends each as a query and prints the ranked moves.
+Without, runs a closed-loop load test: each simulated client keeps one
+request in flight on its own connection, asking for the best plays on
+the position in --position with a random rack, and the run reports
+throughput, latency percentiles and how the server batched the load.
+
+    python analysis_client.py scrabby_save.txt
+    python analysis_client.py --clients 16 --requests 50
+    python analysis_client.py --unix /tmp/scrabby.sock --racks 20   # repeated racks
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from analysis_server import DEFAULT_PORT, DEFAULT_TOP, MAX_LINE
+from game_state import GameState, draw_letters
+from instrumentation import percentile
+
+
+async def connect(host='127.0.0.1', port=DEFAULT_PORT, unix_path=None):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path, limit=MAX_LINE)
+    return await asyncio.open_connection(host, port, limit=MAX_LINE)
+
+
+async def request(reader, writer, message):
+    """Send one request object and return the decoded response"""
+    writer.write(json.dumps(message).encode('ascii') + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("server closed the connection")
+    return json.loads(line)
+
+
+async def query_saves(paths, top, host, port, unix_path):
+    """Send each save file as a query and print its moves"""
+    reader, writer = await connect(host, port, unix_path)
+    try:
+        for path in paths:
+            state = GameState.load(path)
+            response = await request(reader, writer, dict(state.to_dict(), top=top, id=path))
+            if 'error' in response:
+                print(f"{path}: {response['error']}")
+                continue
+            print(f"{path}: rack {''.join(response['rack'])}, {response['ms']:.1f} ms")
+            for move in response['moves']:
+                print(f"  {move['score']:>4}  {move['word']:<15} {move['direction']} "
+                      f"at {move['row']},{move['col']}")
+    finally:
+        writer.close()
+
+
+async def _client(host, port, unix_path, messages, latencies, errors):
+    reader, writer = await connect(host, port, unix_path)
+    try:
+        for message in messages:
+            start = time.perf_counter()
+            response = await request(reader, writer, message)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if 'error' in response:
+                errors.append(response['error'])
+    finally:
+        writer.close()
+
+
+async def load_test(position, clients=8, requests=50, top=DEFAULT_TOP, racks=None, seed=0,
+                    host='127.0.0.1', port=DEFAULT_PORT, unix_path=None):
+    """Run clients x requests closed-loop queries; returns the measurements.
+
+    Racks are drawn from a pool of racks (default: one per request), so a
+    small pool makes clients repeat each other's queries.
+    """
+    rng = random.Random(seed)
+    base = position.to_dict()
+    pool = [draw_letters(rng) for _ in range(racks or clients * requests)]
+    plans = [[dict(base, rack_letters=rng.choice(pool), top=top, id=f"{c}.{i}")
+              for i in range(requests)] for c in range(clients)]
+
+    reader, writer = await connect(host, port, unix_path)
+    before = await request(reader, writer, {'stats': True})
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, unix_path, messages, latencies, errors)
+                           for messages in plans))
+    elapsed = time.perf_counter() - start
+    after = await request(reader, writer, {'stats': True})
+    writer.close()
+
+    batches = after['batches'] - before['batches']
+    positions = after['positions'] - before['positions']
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'batches': batches,
+        'mean_batch': len(latencies) / batches if batches else 0.0,
+        'positions': positions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('saves', nargs='*', help="save files to query (omit for a load test)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="connect to a Unix socket instead")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP)
+    parser.add_argument('--clients', type=int, default=8, help="concurrent connections")
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument('--racks', type=int, help="distinct racks to draw from")
+    parser.add_argument('--position', default='scrabby_save.txt', help="board for the load test")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.saves:
+            asyncio.run(query_saves(args.saves, args.top, args.host, args.port, args.unix))
+            return
+        result = asyncio.run(load_test(GameState.load(args.position), args.clients,
+                                       args.requests, args.top, args.racks, args.seed,
+                                       args.host, args.port, args.unix))
+    except OSError as e:
+        raise SystemExit(f"cannot reach the analysis server: {e}")
+    print(f"{result['requests']} requests from {args.clients} clients in "
+          f"{result['seconds']:.2f}s: {result['throughput']:.0f} req/s, {result['errors']} errors")
+    print(f"latency ms  p50 {result['p50']:.1f}  p95 {result['p95']:.1f}  p99 {result['p99']:.1f}")
+    print(f"{result['batches']} batches (mean {result['mean_batch']:.1f} requests), "
+          f"{result['positions']} positions analyzed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Local asyncio server answering "best plays for this board and rack"
+
+Tools send one JSON object per line in the scrabby_save.txt shape (plus
+optional "top" and "id") and get one JSON line back with the ranked
+moves, in the format of analyze_saves.py. A "lexicon" field picks a word
+list from lexicons/. The dictionaries and move generators stay loaded in
+a pool of worker processes. Requests that
+arrive together are coalesced into batches, one pool task per batch,
+and identical positions within a batch are analyzed once.
+
+    python analysis_server.py --port 8765 --workers 4
+    python analysis_server.py --unix /tmp/scrabby.sock --cache scrabby_cache.sqlite
+    python analysis_client.py --clients 16 --requests 50     # load test
+
+A line {"stats": true} returns the server's counters instead.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from analyze_saves import analyze_state
+from dictionary_cache import load_dictionary
+from game_state import BLANK, GameState
+from lexicons import LexiconRegistry
+from query_cache import QueryCache
+
+DEFAULT_PORT = 8765
+DEFAULT_TOP = 10
+# A batch closes when it holds BATCH_SIZE requests or BATCH_MS after its
+# first request arrived, whichever comes first
+BATCH_SIZE = 32
+BATCH_MS = 2.0
+# Longest request line accepted
+MAX_LINE = 1 << 16
+
+
+# Per-process state, set up once by _init_worker
+_lexicons = None
+_cache = None
+
+
+def _init_worker(wordlist, cache_path=None):
+    global _lexicons, _cache
+    _lexicons = LexiconRegistry(wordlist)
+    _cache = QueryCache(path=cache_path, namespace=_lexicons.dictionary().source_crc)
+
+
+def parse_request(request, lexicons):
+    """Return the (lexicon, board bytes, rack, score, top) job for a request object"""
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    state = GameState.from_dict(request)
+    if not isinstance(state.lexicon, (str, type(None))) or state.lexicon not in lexicons:
+        raise ValueError(f"unknown lexicon {state.lexicon!r}; have {', '.join(lexicons.names())}")
+    rack = [letter.upper() for letter in state.rack if letter]
+    if any(not (letter == BLANK or 'A' <= letter <= 'Z') for letter in rack):
+        raise ValueError(f"rack must be letters A-Z or '{BLANK}'")
+    if any(code and not 65 <= code <= 90 for code in state.board):
+        raise ValueError("board squares must hold letters A-Z")
+    top = int(request.get('top', DEFAULT_TOP))
+    if top < 1:
+        raise ValueError("top must be at least 1")
+    return lexicons.get(state.lexicon).name, bytes(state.board), rack, state.score, top
+
+
+def _analyze_batch(jobs):
+    """Analyze (lexicon, board bytes, rack, score, top) jobs in one worker call"""
+    results = []
+    for name, board, rack, score, top in jobs:
+        lexicon = _lexicons.get(name)
+        result = analyze_state(lexicon.generator, GameState(board, rack, score), top, _cache,
+                               lexicon.dictionary.source_crc)
+        result['lexicon'] = name
+        results.append(result)
+    return results
+
+
+class AnalysisServer:
+    """Accepts JSONL requests and feeds them to the worker pool in batches"""
+
+    def __init__(self, wordlist='wordlist.txt', workers=None, batch_size=BATCH_SIZE,
+                 batch_ms=BATCH_MS, cache_path=None):
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+        self.batch_ms = batch_ms
+        self.lexicons = LexiconRegistry(wordlist)
+        load_dictionary(wordlist)  # Build the cache once before workers map it
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(wordlist, cache_path))
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+        self.running = set()
+        self.stats = {'requests': 0, 'errors': 0, 'batches': 0, 'positions': 0,
+                      'connections': 0, 'started': time.time()}
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT, unix_path=None):
+        """Start listening and batching; returns the asyncio server"""
+        self.queue = asyncio.Queue()
+        # At most one batch per worker in flight; the rest keep accumulating
+        self.slots = asyncio.Semaphore(self.workers)
+        # Start every worker now so the first requests don't pay for it
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _analyze_batch, [])
+                               for _ in range(self.workers)))
+        self.batcher = asyncio.create_task(self._batcher())
+        if unix_path:
+            return await asyncio.start_unix_server(self._serve, unix_path, limit=MAX_LINE)
+        return await asyncio.start_server(self._serve, host, port, limit=MAX_LINE)
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve(self, reader, writer):
+        """Answer each request line on a connection; responses carry the request id"""
+        self.stats['connections'] += 1
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # Requests on one connection may be pipelined; answer each as it finishes
+                task = asyncio.create_task(self._answer(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        start = time.perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                request_id = request.get('id')
+            if isinstance(request, dict) and request.get('stats'):
+                response = dict(self.stats, uptime=round(time.time() - self.stats['started'], 1))
+            else:
+                job = parse_request(request, self.lexicons)
+                future = asyncio.get_running_loop().create_future()
+                self.queue.put_nowait((job, future))
+                response = dict(await future)
+                self.stats['requests'] += 1
+        except (ValueError, KeyError, TypeError, AttributeError, IndexError) as e:
+            self.stats['errors'] += 1
+            response = {'error': f"{type(e).__name__}: {e}"}
+        response['id'] = request_id
+        response['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        if writer.is_closing():
+            return
+        writer.write(json.dumps(response).encode('ascii') + b'\n')
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _batcher(self):
+        """Group queued requests into batches and hand each to the pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_ms / 1000
+            # While every worker is busy, requests keep queueing into this batch
+            await self.slots.acquire()
+            while len(batch) < self.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._run_batch(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run_batch(self, batch):
+        """Analyze a batch, each distinct position once, and resolve its futures"""
+        try:
+            waiting = {}
+            for job, future in batch:
+                lexicon, board, rack, score, top = job
+                key = (lexicon, board, ''.join(sorted(rack)), score, top)
+                waiting.setdefault(key, (job, []))[1].append(future)
+            jobs = [job for job, _ in waiting.values()]
+            self.stats['batches'] += 1
+            self.stats['positions'] += len(jobs)
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, _analyze_batch, jobs)
+            except Exception as e:
+                results = [{'error': f"{type(e).__name__}: {e}"}] * len(jobs)
+            for (_, futures), result in zip(waiting.values(), results):
+                for future in futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self.slots.release()
+
+
+async def serve(args):
+    server = AnalysisServer(args.wordlist, args.workers, args.batch_size, args.batch_ms,
+                            args.cache)
+    listener = await server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Analysis server on {where} with {server.workers} worker(s), "
+          f"batches of up to {args.batch_size} / {args.batch_ms} ms", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--batch-ms', type=float, default=BATCH_MS,
+                        help="how long a batch waits for more requests")
+    parser.add_argument('--cache', metavar='PATH', help="sqlite query cache shared across runs")
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
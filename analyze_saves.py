@@ -0,0 +1,217 @@
+"""Batch analysis of saved positions across a process pool
+
+Finds the best moves for every scrabby_save.txt-format file in the given
+directories or globs and streams one JSON line per file, in completion
+order. Finished files are recorded in a checkpoint so an interrupted run
+picks up where it stopped. With --cache, positions already analyzed by
+any run or worker are answered from a shared sqlite file. A save with a
+"lexicon" field is analyzed with that word list from lexicons/.
+
+    python analyze_saves.py saves/ --top 5 --workers 4 --output analysis.jsonl
+    python analyze_saves.py 'saves/**/*.txt' --output analysis.jsonl   # resumes
+    python analyze_saves.py saves/ --cache scrabby_cache.sqlite
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dictionary_cache import load_dictionary
+from game_state import GameState
+from lexicons import LexiconRegistry
+from query_cache import QueryCache, cached_moves
+
+# Extensions picked up when a directory is given
+SAVE_EXTENSIONS = ('.txt', '.json')
+# Tasks kept in flight per worker; bounds memory for very large batches
+PENDING_PER_WORKER = 4
+
+
+def find_saves(sources):
+    """Expand directories and glob patterns into a sorted list of save files"""
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for folder, _, files in os.walk(source):
+                paths.update(os.path.join(folder, name) for name in files
+                             if name.endswith(SAVE_EXTENSIONS))
+        else:
+            paths.update(path for path in glob.glob(source, recursive=True)
+                         if os.path.isfile(path))
+    return sorted(paths)
+
+
+def read_checkpoint(path):
+    """Return the set of files a previous run already finished"""
+    try:
+        with open(path) as f:
+            return set(line.rstrip('\n') for line in f if line.strip())
+    except FileNotFoundError:
+        return set()
+
+
+def read_output(path):
+    """Return the files with a complete line in a previous run's output.
+
+    A line is written before its checkpoint entry, so a run that died
+    between the two still counts the file as done. A line cut short by
+    the crash is dropped from the file so the next run appends cleanly.
+    """
+    done = set()
+    try:
+        with open(path, 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete < len(data):
+                f.truncate(complete)
+    except FileNotFoundError:
+        return done
+    for line in data[:complete].splitlines():
+        try:
+            done.add(json.loads(line)['file'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return done
+
+
+def analyze_state(generator, state, top, cache=None, namespace=None):
+    """Return the JSON-ready best moves of one position, through cache if given"""
+    rack = [letter for letter in state.rack if letter]
+    stats = {}
+    if cache is None:
+        moves = generator.generate(state.grid(), rack, stats, top)
+    else:
+        moves = cached_moves(cache, generator, state.board, rack, top, stats, namespace)
+    return {
+        'score': state.score,
+        'rack': ''.join(rack),
+        'tiles_on_board': len(state.letters()),
+        'legal_moves': stats.get('matched', 0),
+        'moves': [{'word': move.word, 'row': move.row, 'col': move.col,
+                   'direction': move.direction, 'score': move.score,
+                   'tiles': [list(tile) for tile in move.tiles]} for move in moves],
+        'cached': stats.get('cached', False),
+    }
+
+
+# Per-process state, set up once by _init_worker
+_lexicons = None
+_cache = None
+
+
+def _init_worker(wordlist, cache_path=None):
+    global _lexicons, _cache
+    _lexicons = LexiconRegistry(wordlist)
+    if cache_path:
+        _cache = QueryCache(path=cache_path, namespace=_lexicons.dictionary().source_crc)
+
+
+def _analyze_file(path, top):
+    start = time.perf_counter()
+    try:
+        state = GameState.load(path)
+        lexicon = _lexicons.get(state.lexicon)
+        result = analyze_state(lexicon.generator, state, top, _cache,
+                               lexicon.dictionary.source_crc)
+        result['lexicon'] = lexicon.name
+    except Exception as e:
+        # A malformed save is reported, not fatal to the batch
+        result = {'error': f"{type(e).__name__}: {e}"}
+    result['file'] = path
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def analyze_saves(paths, top=10, workers=None, wordlist='wordlist.txt', out=None,
+                  checkpoint=None, cache_path=None, skip=()):
+    """Analyze save files on a process pool, streaming JSONL as each finishes.
+
+    Files listed in the checkpoint file are skipped, and each file is
+    appended to it once its line has been written, so rerunning the same
+    command resumes an interrupted batch; files in skip are left out
+    too. cache_path names a sqlite
+    query cache shared by the workers. Returns (files done, errors, cache
+    hits, elapsed seconds).
+    """
+    workers = workers or os.cpu_count()
+    done = read_checkpoint(checkpoint) if checkpoint else set()
+    done.update(skip)
+    todo = iter([path for path in paths if path not in done])
+    load_dictionary(wordlist)  # Build the cache once before workers map it
+
+    finished = errors = hits = 0
+    start = time.perf_counter()
+    marks = open(checkpoint, 'a') if checkpoint else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(wordlist, cache_path)) as executor:
+            pending = set()
+            while True:
+                for path in todo:
+                    pending.add(executor.submit(_analyze_file, path, top))
+                    if len(pending) >= workers * PENDING_PER_WORKER:
+                        break
+                if not pending:
+                    break
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    result = future.result()
+                    finished += 1
+                    errors += 'error' in result
+                    hits += result.get('cached', False)
+                    if out is not None:
+                        out.write(json.dumps(result) + '\n')
+                        out.flush()
+                    if marks is not None:
+                        marks.write(result['file'] + '\n')
+                        marks.flush()
+    finally:
+        if marks is not None:
+            marks.close()
+    return finished, errors, hits, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sources', nargs='+', help="save files, directories or glob patterns")
+    parser.add_argument('--top', type=int, default=10, help="best moves to report per file")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--wordlist', default='wordlist.txt', help="the default lexicon")
+    parser.add_argument('--output', help="JSONL file to append to (default: stdout)")
+    parser.add_argument('--checkpoint',
+                        help="file of finished saves (default: OUTPUT.done with --output)")
+    parser.add_argument('--restart', action='store_true', help="ignore an existing checkpoint")
+    parser.add_argument('--cache', metavar='PATH', help="sqlite query cache shared across runs")
+    args = parser.parse_args(argv)
+
+    paths = find_saves(args.sources)
+    checkpoint = args.checkpoint or (args.output + '.done' if args.output else None)
+    if args.restart and checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    done = read_checkpoint(checkpoint) if checkpoint else set()
+    if args.output and not args.restart:
+        done |= read_output(args.output)
+    skipped = len(done & set(paths))
+
+    out = open(args.output, 'w' if args.restart else 'a') if args.output else sys.stdout
+    try:
+        finished, errors, hits, elapsed = analyze_saves(paths, args.top, args.workers,
+                                                        args.wordlist, out, checkpoint, args.cache,
+                                                        done)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    rate = finished / elapsed if elapsed else 0.0
+    print(f"{finished} of {len(paths)} saves analyzed ({skipped} already done, {errors} errors) "
+          f"on {args.workers} worker(s) in {elapsed:.1f}s ({rate:.1f} files/s)", file=sys.stderr)
+    if args.cache:
+        ratio = hits / finished if finished else 0.0
+        print(f"query cache: {hits} hits ({ratio:.0%})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""Benchmark suite with JSON results and a baseline regression check
+
+Times the dictionary load, the rack searches behind update_best_word,
+word scoring on the bundled save and, when a display (or xvfbwrapper) is
+available, board construction, Treeview refresh and update_best_word end
+to end.
+
+    python bench.py --output bench.json
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+    python bench.py --no-ui --save-baseline bench_baseline.json  # headless cases only
+    xvfb-run python bench.py --save-baseline bench_baseline.json  # with the UI cases
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from dictionary_cache import load_dictionary
+from game_state import LETTER_SCORES, SPECIAL_SQUARES, GameState
+from movegen import MoveGenerator
+from word_index import find_rack_words
+
+# Representative racks: an ordinary draw, heavy duplicates, all vowels,
+# all high-value consonants, and the ordinary draw with one and two blanks
+RACKS = {
+    'typical': 'AEINRST',
+    'repeated': 'EEESSTT',
+    'vowels': 'AEIOUAE',
+    'consonants': 'QXZJKVW',
+    'one_blank': 'AEINRS?',
+    'two_blanks': 'AEINR??',
+}
+DEFAULT_THRESHOLD = 0.25
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_DELTA_MS = 0.05
+# ... and so are slowdowns within this many median absolute deviations
+# of the samples (the baseline's and the current run's together)
+NOISE_MADS = 3
+# Each case's samples are spread over this many passes through the suite,
+# so a few slow seconds on a shared machine can't move a whole case
+DEFAULT_ROUNDS = 3
+DEFAULT_REPEATS = 10
+
+
+def measure(fn, repeats, warmup=1, setup=None):
+    """Run fn repeatedly; return its wall times in ms.
+
+    setup, if given, runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    """Return the median, min and median absolute deviation of samples in ms"""
+    median = statistics.median(samples)
+    return {'median_ms': round(median, 4), 'min_ms': round(min(samples), 4),
+            'mad_ms': round(statistics.median(abs(sample - median) for sample in samples), 4),
+            'repeats': len(samples)}
+
+
+def headless_cases(wordlist, save_path, repeats):
+    """Yield (name, samples) for the cases that need no Tk"""
+    # What ScrabbyGame.__init__ does: map the cache after checking it is fresh
+    yield 'dictionary_load', measure(lambda: load_dictionary(wordlist), repeats)
+
+    dictionary = load_dictionary(wordlist)
+    generator = MoveGenerator(dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    state = GameState.load(save_path)
+    board = state.grid()
+    for name, rack in RACKS.items():
+        # The two searches update_best_word runs on its worker thread
+        yield f'rack_words_{name}', measure(
+            lambda: find_rack_words(dictionary.dawg, rack, LETTER_SCORES), repeats)
+        yield f'board_moves_{name}', measure(lambda: generator.generate(board, rack), repeats)
+    yield 'calculate_word_score', measure(lambda: state.word_score(), repeats * 10)
+
+
+def _start_display():
+    """Return a started Xvfb wrapper when there is no display, else None"""
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        return None
+    try:
+        from xvfbwrapper import Xvfb
+    except ImportError:
+        return None
+    display = Xvfb()
+    display.start()
+    return display
+
+
+def ui_cases(save_path, repeats):
+    """Yield (name, samples) for cases that drive a real ScrabbyGame window"""
+    import tkinter as tk
+    from board_view import BoardCanvas, WidgetGridBoard, square_colors
+    from main import ScrabbyGame
+
+    root = tk.Tk()
+    try:
+        app = ScrabbyGame(root)
+        state = GameState.load(save_path)
+
+        def rebuild_board():
+            app.main_frame.destroy()
+            app.setup_ui()
+            root.update_idletasks()
+
+        yield 'setup_ui', measure(rebuild_board, max(1, repeats // 4))
+
+        # The Canvas board against the original per-square widget grid
+        colors = square_colors(app.letter_mult, app.word_mult)
+        full = bytearray(b'E' * len(app.state.board))
+        empty = bytearray(len(app.state.board))
+        for name, cls in (('widgets', WidgetGridBoard), ('canvas', BoardCanvas)):
+            views = []
+
+            def discard():
+                while views:
+                    views.pop().destroy()
+
+            def create(cls=cls):
+                view = cls(root, colors, app.letter_scores, lambda row, col, letter: None)
+                view.grid(row=0, column=2)
+                root.update()
+                views.append(view)
+
+            def fill():
+                discard()
+                create()
+                views[0].render(full)
+                root.update()
+
+            def clear():
+                views[0].render(empty)
+                root.update()
+
+            yield f'board_create_{name}', measure(create, max(1, repeats // 4), setup=discard)
+            yield f'board_clear_{name}', measure(clear, max(1, repeats // 4), setup=fill)
+            discard()
+
+        app.state = state.copy()
+        app.render_board()
+        rows = app.analyze_rack(state.grid(), list(RACKS['typical']))[0]
+
+        def refresh_tree():
+            app.word_tree.delete(*app.word_tree.get_children())
+            for word, score, position in rows:
+                app.word_tree.insert('', 'end', values=(word, score, position))
+            root.update_idletasks()
+
+        yield 'treeview_refresh', measure(refresh_tree, repeats)
+
+        for name, rack in RACKS.items():
+            def query(rack=rack):
+                app.state.rack = list(rack)
+                app.last_analysis_stats = {}
+                app.update_best_word()
+                while 'total_ms' not in app.last_analysis_stats:
+                    root.update()
+            yield f'update_best_word_{name}', measure(query, repeats)
+    finally:
+        root.destroy()
+
+
+def run_suite(wordlist='wordlist.txt', save_path='scrabby_save.txt', repeats=DEFAULT_REPEATS,
+              ui=True, rounds=DEFAULT_ROUNDS):
+    """Run every case repeats times in each of rounds passes; return the JSON-ready report"""
+    samples = {}
+    skipped = {}
+    display = _start_display() if ui else None
+    try:
+        for _ in range(rounds):
+            for name, times in headless_cases(wordlist, save_path, repeats):
+                samples.setdefault(name, []).extend(times)
+            if ui and not skipped:
+                try:
+                    for name, times in ui_cases(save_path, repeats):
+                        samples.setdefault(name, []).extend(times)
+                except Exception as e:  # No display, or Tk missing
+                    skipped['ui'] = f"{type(e).__name__}: {e}"
+    finally:
+        if display is not None:
+            display.stop()
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'rounds': rounds,
+        'results': {name: summarize(times) for name, times in samples.items()},
+        'skipped': skipped,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (case, baseline ms, current ms) for cases slower than the threshold allows.
+
+    Cases are compared on their median. A case only counts as slower when
+    its median moved by more than the threshold, by more than NOISE_MADS
+    times the two runs' spread, and by more than MIN_DELTA_MS.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        allowed = max(base['median_ms'] * threshold, MIN_DELTA_MS,
+                      NOISE_MADS * (base.get('mad_ms', 0) + result['mad_ms']))
+        if result['median_ms'] - base['median_ms'] > allowed:
+            regressions.append((name, base['median_ms'], result['median_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--save', default='scrabby_save.txt', help="position to benchmark on")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="runs per round")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help="passes through the suite, pooled per case")
+    parser.add_argument('--no-ui', action='store_true', help="skip the Tk cases")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', help="also write the report as the new baseline; "
+                        "refused if the UI cases were skipped, unless --no-ui is given")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.wordlist, args.save, args.repeats, not args.no_ui, args.rounds)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    for reason in report['skipped'].values():
+        print(f"skipped UI cases: {reason}", file=sys.stderr)
+    if args.save_baseline:
+        if report['skipped']:
+            # A baseline without the UI cases would silently stop checking them
+            print(f"not saving {args.save_baseline} without the UI cases; run under "
+                  f"xvfb-run, or pass --no-ui for a headless baseline", file=sys.stderr)
+            return 2
+        with open(args.save_baseline, 'w') as f:
+            f.write(text + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        missing = sorted(set(report['results']) - set(baseline.get('results', {})))
+        if missing:
+            print(f"not in the baseline, not compared: {', '.join(missing)}", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms "
+                  f"(+{after / before - 1:.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
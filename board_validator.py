@@ -0,0 +1,232 @@
+"""Incremental validation of the words on the board
+
+BoardValidator keeps the maximal letter runs (two or more tiles in a
+row) of every row and column, and which of them aren't words. An edit
+changes only the runs through the edited square and its neighbours in
+its row and column, so set() rescans just those and costs the same on
+an empty board as on a full one. The cells covered by invalid runs are
+in .bad, ready to be highlighted.
+
+    python board_validator.py --benchmark
+"""
+
+import argparse
+import random
+import time
+
+from game_state import BOARD_SIZE
+
+
+class BoardValidator:
+    """Runs and invalid words of a board, updated one square at a time.
+
+    words is anything supporting `word in words` on upper-case strings,
+    such as a Dawg, a CompiledDictionary or a set. A Dawg rejects most
+    non-words after a letter or two, so it is the cheapest here. The
+    validator keeps its own copy of the board; give it every change
+    through set(), or reset() after replacing the whole board.
+    """
+
+    def __init__(self, words, board=None, board_size=BOARD_SIZE):
+        self.words = words
+        self.size = board_size
+        # Lines 0..size-1 are the rows, size..2*size-1 the columns, each as flat cell indices
+        self.lines = ([tuple(range(row * board_size, (row + 1) * board_size))
+                       for row in range(board_size)]
+                      + [tuple(range(col, board_size * board_size, board_size))
+                         for col in range(board_size)])
+        self.reset(board)
+
+    def reset(self, board=None):
+        """Rebuild every run from board (None: empty) and return the cells whose .bad changed"""
+        old_bad = getattr(self, 'bad', None)
+        self.board = bytearray(board) if board is not None else bytearray(self.size * self.size)
+        # (line, start) -> (end, word, valid) for every run, and the invalid ones
+        self.runs = {}
+        self.invalid = set()
+        # Per cell, how many invalid runs cover it (0, 1 or 2)
+        self.bad = bytearray(len(self.board))
+        for line in range(len(self.lines)):
+            start = 0
+            while start < self.size:
+                run = self._run_at(line, start)
+                if run is None:
+                    start += 1
+                    continue
+                self._add(line, *run)
+                start = run[1]
+        if old_bad is None:
+            return [i for i, count in enumerate(self.bad) if count]
+        return [i for i, (before, after) in enumerate(zip(old_bad, self.bad))
+                if bool(before) != bool(after)]
+
+    def set(self, row, col, code):
+        """Put the letter with ASCII code (0 for empty) on a square.
+
+        Returns the cells whose .bad changed. Only the runs in the row and
+        column through the square are touched.
+        """
+        i = row * self.size + col
+        if self.board[i] == code:
+            return []
+        # Every cell whose runs can change is in an old neighbouring run or is i
+        before = {i: bool(self.bad[i])}
+        affected = ((row, col), (self.size + col, row))
+        for line, pos in affected:
+            self._remove_around(line, pos, before)
+        self.board[i] = code
+        for line, pos in affected:
+            self._add_around(line, pos)
+        return [cell for cell, was_bad in before.items() if was_bad != bool(self.bad[cell])]
+
+    def words_on_board(self):
+        """Return (word, valid, cells) for every run, rows first"""
+        return [(word, valid, self.lines[line][start:end])
+                for (line, start), (end, word, valid) in sorted(self.runs.items())]
+
+    def invalid_words(self):
+        return [self.runs[key][1] for key in sorted(self.invalid)]
+
+    def _run_at(self, line, pos):
+        """Return (start, end) of the letters through pos in a line, or None if pos is empty"""
+        cells = self.lines[line]
+        board = self.board
+        if not board[cells[pos]]:
+            return None
+        start = pos
+        while start > 0 and board[cells[start - 1]]:
+            start -= 1
+        end = pos + 1
+        while end < self.size and board[cells[end]]:
+            end += 1
+        return start, end
+
+    def _neighbourhood(self, line, pos):
+        """The runs touching pos or either side of it, each scanned once"""
+        cells = self.lines[line]
+        board = self.board
+        if board[cells[pos]]:
+            return [self._run_at(line, pos)]
+        runs = []
+        if pos > 0 and board[cells[pos - 1]]:
+            runs.append((self._run_at(line, pos - 1)[0], pos))
+        if pos + 1 < self.size and board[cells[pos + 1]]:
+            runs.append((pos + 1, self._run_at(line, pos + 1)[1]))
+        return runs
+
+    def _remove_around(self, line, pos, before):
+        cells = self.lines[line]
+        for start, end in self._neighbourhood(line, pos):
+            for cell in cells[start:end]:
+                before.setdefault(cell, bool(self.bad[cell]))
+            if end - start < 2:
+                continue
+            _, _, valid = self.runs.pop((line, start))
+            if not valid:
+                self.invalid.discard((line, start))
+                for cell in cells[start:end]:
+                    self.bad[cell] -= 1
+
+    def _add_around(self, line, pos):
+        for start, end in self._neighbourhood(line, pos):
+            self._add(line, start, end)
+
+    def _add(self, line, start, end):
+        if end - start < 2:
+            return  # A single tile is no word in this direction
+        cells = self.lines[line][start:end]
+        word = bytes(self.board[cell] for cell in cells).decode('ascii').upper()
+        valid = word in self.words
+        self.runs[(line, start)] = (end, word, valid)
+        if not valid:
+            self.invalid.add((line, start))
+            for cell in cells:
+                self.bad[cell] += 1
+
+
+def edit_sample(board, size, rng, count):
+    """Return count random squares that hold a tile or touch one"""
+    def touches(i):
+        row, col = divmod(i, size)
+        return any(0 <= r < size and 0 <= c < size and board[r * size + c]
+                   for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)))
+
+    near = [i for i in range(size * size) if board[i] or touches(i)]
+    return [rng.choice(near) for _ in range(count)] if near else []
+
+
+def benchmark(path='wordlist.txt', edits=2000, seed=0):
+    """Per-edit cost of incremental and whole-board validation as a self-play game fills the board"""
+    from dictionary_cache import load_dictionary
+    from game_state import LETTER_SCORES, RACK_SIZE, SPECIAL_SQUARES, GameState, TileBag
+    from movegen import MoveGenerator
+    from scrabby_sim import remove_tiles
+
+    dawg = load_dictionary(path).dawg
+    generator = MoveGenerator(dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    rng = random.Random(seed)
+    state = GameState()
+    bag = TileBag(rng)
+    racks = [bag.draw(RACK_SIZE), bag.draw(RACK_SIZE)]
+    validator = BoardValidator(dawg)
+    size = validator.size
+    print(f"{'tiles':>6}{'runs':>6}{'edit us':>9}{'full us':>9}")
+    player = 0
+    checkpoint = 0
+    while racks[player]:
+        moves = generator.generate(state.grid(), racks[player])
+        if not moves:
+            break
+        for row, col, letter in moves[0].tiles:
+            validator.set(row, col, ord(letter.upper()))
+        state.place(moves[0].tiles)
+        remove_tiles(racks[player], moves[0].tiles)
+        racks[player].extend(bag.draw(RACK_SIZE - len(racks[player])))
+        player = 1 - player
+        tiles = size * size - validator.board.count(0)
+        if tiles < checkpoint:
+            continue
+        checkpoint = tiles + 10
+
+        # Type a letter on squares in and around the words, then put back what was there
+        sample = edit_sample(validator.board, size, rng, edits)
+        start = time.perf_counter()
+        for i in sample:
+            code = validator.board[i]
+            validator.set(i // size, i % size, 0 if code else ord(rng.choice('AEIRST')))
+            validator.set(i // size, i % size, code)
+        incremental = (time.perf_counter() - start) / (2 * len(sample)) * 1e6
+        # Versus revalidating every row and column on each edit
+        repeats = max(1, edits // 50)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            BoardValidator(dawg, validator.board, size)
+        full = (time.perf_counter() - start) / repeats * 1e6
+        print(f"{tiles:>6}{len(validator.runs):>6}{incremental:>9.1f}{full:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('save', nargs='?', default='scrabby_save.txt',
+                        help="position in scrabby_save.txt format")
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--benchmark', action='store_true',
+                        help="time edits on a randomly filling board instead")
+    parser.add_argument('--edits', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.wordlist, args.edits)
+        return
+    from dictionary_cache import load_dictionary
+    from game_state import GameState
+
+    validator = BoardValidator(load_dictionary(args.wordlist).dawg, GameState.load(args.save).board)
+    for word, valid, cells in validator.words_on_board():
+        row, col = divmod(cells[0], validator.size)
+        direction = '→' if len(cells) < 2 or cells[1] == cells[0] + 1 else '↓'
+        print(f"  {word:<15} {row},{col} {direction} {'ok' if valid else 'INVALID'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""Board views for the Tk UI: a single-Canvas renderer and the old widget grid
+
+BoardCanvas draws all squares on one tk.Canvas and takes keyboard input
+through a single cursor, redrawing only the cells whose letter changed.
+WidgetGridBoard is the original Frame/Entry/Label/StringVar per square
+grid, kept as the reference for benchmark().
+"""
+
+import time
+import tkinter as tk
+
+SQUARE_SIZE = 45
+GAP = 2
+CURSOR_COLOR = '#1a73e8'
+DEFAULT_COLOR = "#f8f9fa"
+LETTER_COLOR = 'black'
+INVALID_COLOR = '#d93025'
+
+
+def square_colors(letter_mult, word_mult):
+    """Return the background colour of every square from the multiplier tables"""
+    colors = []
+    for letter, word in zip(letter_mult, word_mult):
+        if word == 3:
+            colors.append("#ff9999")  # Red for Triple Word
+        elif word == 2:
+            colors.append("#ffb366")  # Pink for Double Word
+        elif letter == 3:
+            colors.append("#99ff99")  # Green for Triple Letter
+        elif letter == 2:
+            colors.append("#99ccff")  # Blue for Double Letter
+        else:
+            colors.append(DEFAULT_COLOR)
+    return colors
+
+
+class BoardCanvas:
+    """The whole board on one Canvas: three items per square and one cursor.
+
+    Typing a letter calls on_edit(row, col, letter) for the cursor square
+    and advances the cursor; BackSpace and Delete call it with ''. The
+    caller owns the board state and passes it back through render(),
+    which only touches the cells whose letter differs from what is drawn.
+    Letters in invalid words are drawn in INVALID_COLOR via mark_invalid().
+    """
+
+    def __init__(self, master, colors, letter_scores, on_edit, board_size=15,
+                 square_size=SQUARE_SIZE):
+        self.size = board_size
+        self.square = square_size
+        self.colors = colors
+        self.letter_scores = letter_scores
+        self.on_edit = on_edit
+        pitch = square_size + GAP
+        self.canvas = tk.Canvas(master, width=board_size * pitch, height=board_size * pitch,
+                                highlightthickness=0, takefocus=1)
+
+        # Item ids per cell, and the letter code each cell currently shows
+        self.letter_items = []
+        self.score_items = []
+        self.drawn = bytearray(board_size * board_size)
+        self.flagged = bytearray(board_size * board_size)
+        for i in range(board_size * board_size):
+            x, y = self._origin(i)
+            self.canvas.create_rectangle(x, y, x + square_size, y + square_size,
+                                         fill=colors[i], outline='#999999')
+            self.letter_items.append(self.canvas.create_text(
+                x + square_size / 2, y + square_size * 0.4, text='',
+                font=('Helvetica', 16, 'bold')))
+            self.score_items.append(self.canvas.create_text(
+                x + square_size / 2, y + square_size * 0.8, text='',
+                font=('Helvetica', 9), fill='#444444'))
+
+        self.cursor = None
+        self.across = True
+        self.cursor_item = self.canvas.create_rectangle(0, 0, 0, 0, outline=CURSOR_COLOR,
+                                                        width=3, state='hidden')
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Key>', self._on_key)
+
+    def grid(self, **kwargs):
+        self.canvas.grid(**kwargs)
+
+    def destroy(self):
+        self.canvas.destroy()
+
+    def _origin(self, i):
+        row, col = divmod(i, self.size)
+        pitch = self.square + GAP
+        return col * pitch + GAP // 2, row * pitch + GAP // 2
+
+    def render(self, board):
+        """Redraw the cells whose letter differs from board (a flat bytearray)"""
+        drawn = self.drawn
+        if drawn == board:
+            return 0
+        changed = 0
+        for i, code in enumerate(board):
+            if drawn[i] != code:
+                self.draw_cell(i, code)
+                changed += 1
+        return changed
+
+    def draw_cell(self, i, code):
+        """Show the letter with ASCII code (0 for empty) on cell i"""
+        letter = chr(code) if code else ''
+        self.canvas.itemconfigure(self.letter_items[i], text=letter)
+        score = self.letter_scores.get(letter, '') if letter else ''
+        self.canvas.itemconfigure(self.score_items[i], text=str(score))
+        self.drawn[i] = code
+
+    def mark_invalid(self, i, invalid):
+        """Colour cell i's letter as part of an invalid word, or not"""
+        invalid = 1 if invalid else 0
+        if self.flagged[i] != invalid:
+            self.canvas.itemconfigure(self.letter_items[i],
+                                      fill=INVALID_COLOR if invalid else LETTER_COLOR)
+            self.flagged[i] = invalid
+
+    def set_cursor(self, row, col):
+        """Move the input cursor to a square, or hide it with row=None"""
+        if row is None:
+            self.cursor = None
+            self.canvas.itemconfigure(self.cursor_item, state='hidden')
+            return
+        self.cursor = (row, col)
+        x, y = self._origin(row * self.size + col)
+        self.canvas.coords(self.cursor_item, x, y, x + self.square, y + self.square)
+        self.canvas.itemconfigure(self.cursor_item, state='normal')
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        pitch = self.square + GAP
+        row, col = event.y // pitch, event.x // pitch
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            return
+        if self.cursor == (row, col):
+            # Clicking the cursor square again flips the typing direction
+            self.across = not self.across
+        self.set_cursor(row, col)
+
+    def _step(self, delta):
+        """Move the cursor delta squares along the typing direction, stopping at the edge"""
+        row, col = self.cursor
+        if self.across:
+            col = min(self.size - 1, max(0, col + delta))
+        else:
+            row = min(self.size - 1, max(0, row + delta))
+        self.set_cursor(row, col)
+
+    def _on_key(self, event):
+        if self.cursor is None:
+            return
+        row, col = self.cursor
+        moves = {'Left': (0, -1), 'Right': (0, 1), 'Up': (-1, 0), 'Down': (1, 0)}
+        if event.keysym in moves:
+            dr, dc = moves[event.keysym]
+            self.set_cursor(min(self.size - 1, max(0, row + dr)),
+                            min(self.size - 1, max(0, col + dc)))
+        elif event.keysym == 'BackSpace':
+            if not self.drawn[row * self.size + col]:
+                self._step(-1)
+                row, col = self.cursor
+            self.on_edit(row, col, '')
+        elif event.keysym == 'Delete':
+            self.on_edit(row, col, '')
+        elif len(event.char) == 1 and event.char.isalpha() and event.char.isascii():
+            self.on_edit(row, col, event.char.upper())
+            self._step(1)
+
+
+class WidgetGridBoard:
+    """The original board: a Frame, Entry, Label and traced StringVar per square"""
+
+    def __init__(self, master, colors, letter_scores, on_edit, board_size=15,
+                 square_size=SQUARE_SIZE):
+        self.size = board_size
+        self.letter_scores = letter_scores
+        self.on_edit = on_edit
+        self.frame = tk.Frame(master)
+        self.squares = []
+        for i in range(board_size):
+            for j in range(board_size):
+                bg_color = colors[i * board_size + j]
+                square_frame = tk.Frame(self.frame, width=square_size, height=square_size,
+                                        relief="raised", borderwidth=1, bg=bg_color)
+                square_frame.grid(row=i, column=j, padx=1, pady=1)
+                square_frame.grid_propagate(False)
+                var = tk.StringVar()
+                var.trace('w', lambda *args, v=var, r=i, c=j: self._on_var(v, r, c))
+                entry = tk.Entry(square_frame, width=2, font=('Helvetica', 16, 'bold'),
+                                 justify='center', bg=bg_color, textvariable=var,
+                                 relief='flat', highlightthickness=0)
+                entry.place(relx=0.5, rely=0.35, anchor="center")
+                score_label = tk.Label(square_frame, text="", font=('Helvetica', 9),
+                                       bg=bg_color, fg='#444444')
+                score_label.place(relx=0.5, rely=0.75, anchor="center")
+                self.squares.append({'var': var, 'score_label': score_label})
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def destroy(self):
+        self.frame.destroy()
+
+    def _on_var(self, var, row, col):
+        value = var.get().upper()[:1]
+        square = self.squares[row * self.size + col]
+        square['score_label'].config(text=str(self.letter_scores.get(value, '')) if value else '')
+        self.on_edit(row, col, value)
+
+    def render(self, board):
+        """Set every square's StringVar that differs from board; each fires its trace"""
+        changed = 0
+        for i, code in enumerate(board):
+            letter = chr(code) if code else ''
+            var = self.squares[i]['var']
+            if var.get() != letter:
+                var.set(letter)
+                changed += 1
+        return changed
+
+
+def benchmark(repeats=5):
+    """Time window creation and a full-board clear for both views (needs a display)"""
+    from game_state import BOARD_SIZE, LETTER_MULT, LETTER_SCORES, WORD_MULT
+
+    colors = square_colors(LETTER_MULT, WORD_MULT)
+    full = bytearray(b'E' * (BOARD_SIZE * BOARD_SIZE))
+    empty = bytearray(BOARD_SIZE * BOARD_SIZE)
+    root = tk.Tk()
+    try:
+        print(f"{'view':<18}{'create ms':>12}{'clear ms':>12}")
+        for cls in (WidgetGridBoard, BoardCanvas):
+            create = clear = 0.0
+            for _ in range(repeats):
+                board = bytearray(empty)
+
+                def on_edit(row, col, letter):
+                    board[row * BOARD_SIZE + col] = ord(letter) if letter else 0
+
+                start = time.perf_counter()
+                view = cls(root, colors, LETTER_SCORES, on_edit, BOARD_SIZE)
+                view.grid(row=0, column=0)
+                root.update()
+                create += time.perf_counter() - start
+                view.render(full)
+                root.update()
+                start = time.perf_counter()
+                view.render(empty)
+                root.update()
+                clear += time.perf_counter() - start
+                view.destroy()
+            print(f"{cls.__name__:<18}{create / repeats * 1000:>12.1f}{clear / repeats * 1000:>12.1f}")
+    finally:
+        root.destroy()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,290 @@
+"""Minimized DAWG (directed acyclic word graph) dictionary engine"""
+
+import string
+from array import array
+
+from game_state import BLANK
+
+ALPHABET = string.ascii_uppercase
+# Slot for blanks in the 27-entry rack count lists used by the searches
+BLANK_INDEX = 26
+
+# Each edge is one uint32: bits 0-4 letter, bit 5 set when the path ending
+# in this edge spells a word, bit 6 set on the last edge of a node, and
+# bits 7-31 the index of the child's first edge (0 when it has none).
+# A node is the run of edges from its first edge up to the one marked last;
+# the root's edges start at index 0.
+LETTER_MASK = 0x1F
+TERMINAL = 1 << 5
+LAST = 1 << 6
+CHILD_SHIFT = 7
+
+
+class _BuildNode:
+    """Mutable trie node used only while building"""
+
+    __slots__ = ('final', 'edges')
+
+    def __init__(self):
+        self.final = False
+        self.edges = {}
+
+
+def build_dawg(words):
+    """Return the packed edge array of a minimized DAWG for the given words.
+
+    Uses the incremental construction for sorted input: each time a word
+    diverges from the previous one, the finished suffix of the previous
+    word is merged with an equivalent already-registered node if one exists.
+    """
+    root = _BuildNode()
+    register = {}
+    unchecked = []  # (parent, letter, child) along the last inserted word
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = (child.final, tuple((l, id(n)) for l, n in child.edges.items()))
+            existing = register.get(key)
+            if existing is not None:
+                parent.edges[letter] = existing
+            else:
+                register[key] = child
+
+    previous = ''
+    for word in sorted(words):
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = _BuildNode()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+
+    # Lay the nodes out breadth-first, one contiguous block of edges each
+    offsets = {id(root): 0}
+    order = [root]
+    size = len(root.edges)
+    for node in order:
+        for child in node.edges.values():
+            if child.edges and id(child) not in offsets:
+                offsets[id(child)] = size
+                size += len(child.edges)
+                order.append(child)
+
+    edges = array('I')
+    for node in order:
+        items = list(node.edges.items())
+        for i, (letter, child) in enumerate(items):
+            edge = ord(letter) - 65
+            if child.final:
+                edge |= TERMINAL
+            if i == len(items) - 1:
+                edge |= LAST
+            if child.edges:
+                edge |= offsets[id(child)] << CHILD_SHIFT
+            edges.append(edge)
+    return edges
+
+
+class Dawg:
+    """Read-only word graph over a packed uint32 edge array.
+
+    The edge array may be an array('I') or a memoryview cast to 'I', so a
+    DAWG stored in the compiled dictionary cache is used without copying.
+    """
+
+    __slots__ = ('edges',)
+
+    def __init__(self, edges):
+        self.edges = edges
+
+    @classmethod
+    def from_words(cls, words):
+        return cls(build_dawg(words))
+
+    def __len__(self):
+        return sum(1 for _ in self.iter_words())
+
+    def __contains__(self, word):
+        return self.contains(word)
+
+    def _find_edge(self, node, letter_index):
+        """Return the edge out of node for a letter, or None"""
+        edges = self.edges
+        i = node
+        while True:
+            edge = edges[i]
+            if edge & LETTER_MASK == letter_index:
+                return edge
+            if edge & LAST:
+                return None
+            i += 1
+
+    def _walk(self, prefix):
+        """Return the edge reached by spelling prefix, or None"""
+        edge = None
+        for letter in prefix:
+            letter_index = ord(letter) - 65
+            if not 0 <= letter_index < 26:
+                return None
+            if edge is None:
+                node = 0
+            else:
+                node = edge >> CHILD_SHIFT
+                if not node:
+                    return None
+            edge = self._find_edge(node, letter_index)
+            if edge is None:
+                return None
+        return edge
+
+    def contains(self, word):
+        """Return True if word is in the dictionary"""
+        if not word:
+            return False
+        edge = self._walk(word.upper())
+        return edge is not None and bool(edge & TERMINAL)
+
+    def has_prefix(self, prefix):
+        """Return True if some word starts with prefix"""
+        return not prefix or self._walk(prefix.upper()) is not None
+
+    def children(self, prefix=''):
+        """Return {letter: is_word} for each letter that can extend prefix"""
+        if prefix:
+            edge = self._walk(prefix.upper())
+            if edge is None or edge >> CHILD_SHIFT == 0:
+                return {}
+            node = edge >> CHILD_SHIFT
+        else:
+            node = 0
+        result = {}
+        edges = self.edges
+        i = node
+        while True:
+            edge = edges[i]
+            result[ALPHABET[edge & LETTER_MASK]] = bool(edge & TERMINAL)
+            if edge & LAST:
+                return result
+            i += 1
+
+    def iter_words(self, node=0, prefix=''):
+        """Yield every word below node in alphabetical order"""
+        edges = self.edges
+        i = node
+        while True:
+            edge = edges[i]
+            word = prefix + ALPHABET[edge & LETTER_MASK]
+            if edge & TERMINAL:
+                yield word
+            child = edge >> CHILD_SHIFT
+            if child:
+                yield from self.iter_words(child, word)
+            if edge & LAST:
+                return
+            i += 1
+
+    def rack_words(self, rack_letters, min_length=2, stats=None):
+        """Return every word that can be made from the rack letters.
+
+        Walks the graph depth-first, only following edges for letters still
+        left on the rack, so whole subtrees are pruned as soon as the rack
+        cannot continue them. Blanks ('?') widen the walk to any letter the
+        rack has run out of, so each word is found once, spelled with its
+        real tiles used first and blanks in lowercase. If stats is a dict,
+        'examined' (prefixes tried) and 'matched' (words found) are added
+        to it.
+        """
+        counts = [0] * 27
+        for letter in rack_letters:
+            counts[BLANK_INDEX if letter == BLANK else ord(letter.upper()) - 65] += 1
+        edges = self.edges
+        found = []
+        examined = [0]
+
+        def walk(node, prefix):
+            i = node
+            while True:
+                edge = edges[i]
+                letter_index = edge & LETTER_MASK
+                if counts[letter_index]:
+                    tile, letter = letter_index, ALPHABET[letter_index]
+                elif counts[BLANK_INDEX]:
+                    tile, letter = BLANK_INDEX, ALPHABET[letter_index].lower()
+                else:
+                    tile = None
+                if tile is not None:
+                    examined[0] += 1
+                    word = prefix + letter
+                    if edge & TERMINAL and len(word) >= min_length:
+                        found.append(word)
+                    child = edge >> CHILD_SHIFT
+                    if child:
+                        counts[tile] -= 1
+                        walk(child, word)
+                        counts[tile] += 1
+                if edge & LAST:
+                    return
+                i += 1
+
+        walk(0, '')
+        if stats is not None:
+            stats['examined'] = stats.get('examined', 0) + examined[0]
+            stats['matched'] = stats.get('matched', 0) + len(found)
+        return found
+
+
+def benchmark(path='wordlist.txt', queries=2000, seed=0):
+    """Report memory use and query latency of the DAWG against a plain set"""
+    import random
+    import sys
+    import time
+    from dictionary_cache import read_word_list
+    from game_state import LETTER_SCORES
+    from word_index import AnagramIndex, find_rack_words
+
+    words = read_word_list(path)
+    start = time.perf_counter()
+    dawg = Dawg.from_words(words)
+    build = time.perf_counter() - start
+
+    set_bytes = sys.getsizeof(words) + sum(sys.getsizeof(w) for w in words)
+    dawg_bytes = dawg.edges.buffer_info()[1] * dawg.edges.itemsize
+    print(f"words: {len(words)}  build: {build:.1f}s")
+    print(f"{'structure':<12}{'MB':>8}")
+    print(f"{'set':<12}{set_bytes / 2**20:>8.2f}")
+    print(f"{'dawg':<12}{dawg_bytes / 2**20:>8.2f}  ({len(dawg.edges)} edges)")
+
+    rng = random.Random(seed)
+    word_list = sorted(words)
+    probes = [rng.choice(word_list) for _ in range(queries // 2)]
+    probes += [''.join(rng.choices(ALPHABET, k=rng.randint(2, 8))) for _ in range(queries // 2)]
+    racks = [rng.choices(ALPHABET, k=7) for _ in range(queries // 20)]
+    index = AnagramIndex(words)
+
+    def per_query(func, sample):
+        start = time.perf_counter()
+        for item in sample:
+            func(item)
+        return (time.perf_counter() - start) / len(sample) * 1e6
+
+    print(f"{'query':<28}{'us/query':>10}")
+    print(f"{'set membership':<28}{per_query(words.__contains__, probes):>10.2f}")
+    print(f"{'dawg contains':<28}{per_query(dawg.contains, probes):>10.2f}")
+    print(f"{'anagram index rack search':<28}"
+          f"{per_query(lambda r: find_rack_words(index, r, LETTER_SCORES), racks):>10.2f}")
+    print(f"{'dawg rack search':<28}"
+          f"{per_query(lambda r: find_rack_words(dawg, r, LETTER_SCORES), racks):>10.2f}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,244 @@
+"""Precompiled, memory-mapped dictionary cache for fast startup"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from dawg import Dawg, build_dawg
+from word_index import rack_signatures, word_signature
+
+MAGIC = b'SCRBDIC2'
+# magic, byte order, source size, source mtime_ns, source crc32,
+# word count, signature count, DAWG edge count
+HEADER = struct.Struct('<8s1sQQIIII')
+
+
+def cache_path_for(path):
+    """Return the compiled cache file that belongs to a word list"""
+    return os.path.splitext(path)[0] + '.bin'
+
+
+def source_checksum(path):
+    """Return the CRC32 of a word list file"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def read_word_list(path):
+    """Read a wordlist.txt-style file into a set of upper-case words"""
+    with open(path, 'r') as f:
+        return set(word.strip().upper() for word in f if len(word.strip()) >= 2)
+
+
+class PackedStrings:
+    """Sorted ASCII strings packed into one blob with a uint32 offset array"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.key(i).decode('ascii')
+
+    def key(self, i):
+        """Return the raw bytes of entry i"""
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def find(self, key):
+        """Return the index of key (bytes), or -1 if it is not present"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.key(lo) == key:
+            return lo
+        return -1
+
+
+def _pack_strings(strings):
+    """Return (offsets, blob) bytes for a sorted list of strings"""
+    offsets = array('I', [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode('ascii')
+        offsets.append(len(blob))
+    # Keep the following section 4-byte aligned
+    blob += b'\0' * (-len(blob) % 4)
+    return offsets.tobytes(), bytes(blob)
+
+
+def compile_dictionary(words, cache_path, source_stat=None, source_crc=0):
+    """Write the compiled dictionary for a collection of words.
+
+    Sections follow the header in this order: word offsets, word blob,
+    signature offsets, signature blob, anagram group starts (one per
+    signature plus a sentinel), word ids grouped by signature and the
+    packed DAWG edge array.
+    """
+    words = sorted(words)
+    groups = {}
+    for word_id, word in enumerate(words):
+        groups.setdefault(word_signature(word), []).append(word_id)
+    signatures = sorted(groups)
+
+    group_starts = array('I', [0])
+    word_ids = array('I')
+    for signature in signatures:
+        word_ids.extend(groups[signature])
+        group_starts.append(len(word_ids))
+    dawg_edges = build_dawg(words)
+
+    size = source_stat.st_size if source_stat else 0
+    mtime = source_stat.st_mtime_ns if source_stat else 0
+    header = HEADER.pack(MAGIC, sys.byteorder[0].encode('ascii'), size, mtime,
+                         source_crc, len(words), len(signatures), len(dawg_edges))
+
+    # Per-process temporary name: workers may compile the same list at once
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(b'\0' * (-len(header) % 4))
+        for section in (*_pack_strings(words), *_pack_strings(signatures),
+                        group_starts.tobytes(), word_ids.tobytes(),
+                        dawg_edges.tobytes()):
+            f.write(section)
+    os.replace(tmp_path, cache_path)
+
+
+class CompiledDictionary:
+    """Read-only dictionary backed by a memory-mapped cache file.
+
+    Supports membership tests, iteration and anagram lookups by signature,
+    so it can stand in for both the word set and the AnagramIndex. The
+    stored DAWG is exposed as .dawg for prefix queries and rack search.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        with open(cache_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.nbytes = len(self._mmap)
+        view = memoryview(self._mmap)
+        (magic, byteorder, self.source_size, self.source_mtime, self.source_crc,
+         word_count, signature_count, edge_count) = HEADER.unpack_from(view)
+        if magic != MAGIC or byteorder != sys.byteorder[0].encode('ascii'):
+            raise ValueError(f"{cache_path} is not a compatible dictionary cache")
+
+        pos = HEADER.size + (-HEADER.size % 4)
+
+        def take_uint32(count):
+            nonlocal pos
+            section = view[pos:pos + 4 * count].cast('I')
+            pos += 4 * count
+            return section
+
+        def take_blob(length):
+            nonlocal pos
+            section = view[pos:pos + length]
+            pos += length + (-length % 4)
+            return section
+
+        word_offsets = take_uint32(word_count + 1)
+        self.words = PackedStrings(word_offsets, take_blob(word_offsets[-1]))
+        signature_offsets = take_uint32(signature_count + 1)
+        self.signatures = PackedStrings(signature_offsets, take_blob(signature_offsets[-1]))
+        self.group_starts = take_uint32(signature_count + 1)
+        self.word_ids = take_uint32(word_count)
+        self.dawg = Dawg(take_uint32(edge_count))
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        for i in range(len(self.words)):
+            yield self.words[i]
+
+    def __contains__(self, word):
+        try:
+            key = word.encode('ascii')
+        except UnicodeEncodeError:
+            return False
+        return self.words.find(key) >= 0
+
+    def anagrams(self, signature):
+        """Return the words whose letters are exactly the given signature"""
+        i = self.signatures.find(signature.encode('ascii'))
+        if i < 0:
+            return []
+        return [self.words[self.word_ids[j]]
+                for j in range(self.group_starts[i], self.group_starts[i + 1])]
+
+    def rack_words(self, rack_letters, min_length=2):
+        """Yield every word that can be made from the rack letters"""
+        for signature in rack_signatures(rack_letters, min_length):
+            yield from self.anagrams(signature)
+
+    def warm(self):
+        """Read every page of the mapping so none faults on a later query"""
+        zlib.crc32(self._mmap)
+
+
+def cache_is_fresh(cache, source_stat, path):
+    """Check a loaded cache's source_size/mtime/crc against its word list"""
+    if cache.source_size != source_stat.st_size:
+        return False
+    if cache.source_mtime == source_stat.st_mtime_ns:
+        return True
+    # Touched but possibly unchanged; fall back to the checksum
+    return cache.source_crc == source_checksum(path)
+
+
+def load_dictionary(path='wordlist.txt', cache_path=None):
+    """Return a CompiledDictionary for a word list, rebuilding the cache if stale.
+
+    Raises FileNotFoundError if the word list does not exist, and
+    ValueError if the cache would overwrite it (a word list named .bin).
+    """
+    cache_path = cache_path or cache_path_for(path)
+    if os.path.abspath(cache_path) == os.path.abspath(path):
+        raise ValueError(f"{path} is its own cache path; word lists must not end in .bin")
+    source_stat = os.stat(path)
+    try:
+        dictionary = CompiledDictionary(cache_path)
+        if cache_is_fresh(dictionary, source_stat, path):
+            return dictionary
+    except (OSError, ValueError, struct.error):
+        pass
+    compile_dictionary(read_word_list(path), cache_path, source_stat, source_checksum(path))
+    return CompiledDictionary(cache_path)
+
+
+def benchmark(path='wordlist.txt'):
+    """Compare cold load time and peak RSS of the cache and the plain set"""
+    import subprocess
+
+    load_dictionary(path)  # Make sure the cache exists
+    snippets = {
+        'text file -> set': f"from dictionary_cache import read_word_list; d = read_word_list({path!r})",
+        'mmapped cache': f"from dictionary_cache import load_dictionary; d = load_dictionary({path!r})",
+    }
+    print(f"{'loader':<20}{'load ms':>10}{'peak RSS MB':>14}")
+    for name, snippet in snippets.items():
+        code = (f"import resource, time; t = time.perf_counter(); {snippet}; "
+                f"'ZZZ' in d; print((time.perf_counter() - t) * 1000, "
+                f"resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                             text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        elapsed, rss_kb = out.stdout.split()
+        print(f"{name:<20}{float(elapsed):>10.1f}{int(rss_kb) / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,576 @@
+"""Endgame solver: both racks known, bag empty
+
+Iterative-deepening negamax with alpha-beta pruning, moves ordered by
+their immediate value, and a bounded Zobrist-hashed transposition table.
+A position's value is the spread the side to move gains from here to
+the end of the game: the scores of every move, plus twice the opponent's
+remaining tiles for going out, or each side losing its own tiles when
+both pass in a row.
+
+The search widens as it goes. Below the root it first tries only the
+best two replies at each turn, plus any play that goes out, and deepens
+two plies at a time until every line reaches the end of the game. It
+then does the same with 4, 8, 16 and 32 replies and finally with all of
+them, each pass trying the last one's best moves first. Within --time,
+typical endgames play out to the end under some width. That value
+assumes neither side has a better reply outside the width, so it is only
+marked exact once the full-width pass resolves, or no position had more
+replies than the width. That happens in seconds when one side is short
+of tiles or stuck with awkward ones, not for two full racks with a
+hundred plays each. --width searches one fixed width instead.
+
+    python endgame.py scrabby_save.txt --opponent EIRTUVW --time 10
+    python endgame.py --benchmark
+"""
+
+import argparse
+import random
+import time
+
+from dawg import BLANK_INDEX
+from game_state import BLANK, LETTER_SCORES, RACK_SIZE, SPECIAL_SQUARES, GameState
+from movegen import ACROSS, DOWN, MoveGenerator
+from query_cache import ZOBRIST, LRUCache
+
+DEFAULT_TIME = 10.0
+# Transposition table entries, and memoized per-line move lists
+TT_SIZE = 1 << 20
+LINE_MEMO_SIZE = 1 << 16
+# Checked against the clock every this many nodes
+CLOCK_EVERY = 256
+# Stored as the depth of a subtree searched to the end of the game
+RESOLVED = 1 << 10
+INFINITY = 1 << 20
+# Plies added per iteration: two re-search the tree half as often, and
+# every horizon falls after the opponent's reply
+DEPTH_STEP = 2
+# Reply widths searched in turn below the root, each deepened until the
+# game tree under it is resolved; None searches every move
+WIDENING = (2, 4, 8, 16, 32, None)
+# Transposition table bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+PASS = 'pass'
+
+# Racks are also packed into one int, four bits per tile kind, each with
+# its top bit preset: subtracting a move's tiles leaves every top bit set
+# exactly when the rack holds them, and no field borrows from the next
+COUNT_BITS = 4
+GUARD = sum(1 << (COUNT_BITS * i + COUNT_BITS - 1) for i in range(27))
+
+# Zobrist keys for the parts of a position beyond the board: each
+# player's count of each tile (count 0 has no key), whose turn it is,
+# and whether the last turn was a pass
+_rng = random.Random(0xE4D6A3E)
+RACK_KEYS = [[[0] + [_rng.getrandbits(64) for _ in range(RACK_SIZE)] for _ in range(27)]
+             for _ in range(2)]
+SECOND_PLAYER_KEY = _rng.getrandbits(64)
+PASSED_KEY = _rng.getrandbits(64)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def tile_index(letter):
+    """Rack count index of a played letter: 0-25, or BLANK_INDEX for lowercase"""
+    return BLANK_INDEX if letter == BLANK or letter.islower() else ord(letter) - 65
+
+
+class EndgameSolver:
+    """Alpha-beta endgame search over one MoveGenerator.
+
+    Move lists are built line by line, and each line's moves are memoized
+    on the line's letters and cross-checks. Searching a line with the
+    player's full starting rack and filtering by the tiles still held
+    means sibling positions, which differ in a few lines, reuse the rest.
+    The lines of the current position are also kept as they stand: a
+    play only invalidates the lines it changes, their letters or their
+    cross-checks, and undoing it restores them.
+    """
+
+    def __init__(self, generator, tt_size=TT_SIZE, memo_size=LINE_MEMO_SIZE):
+        self.generator = generator
+        self.size = generator.size
+        self.tt_size = tt_size
+        # Keyed on the rack searched and the line, so it carries over between solves
+        self.memo = LRUCache(memo_size)
+
+    def solve(self, board, racks, time_limit=DEFAULT_TIME, max_depth=None, width=None):
+        """Solve a position for racks[0], the side to move.
+
+        board is a flat board of codes or a grid of letters. Below the
+        root, only the best width moves (by immediate value) and those
+        going out are searched; width None widens through WIDENING. Returns
+        a dict with the value, the principal variation ('pass' for passes),
+        the depth completed and the width it was found under (None: every
+        move), whether every line reached the end of the game ('resolved'),
+        whether the value is exact, and node counts.
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_limit
+        self.width = width
+        # Values under a different width or time cut don't carry over
+        self.table = LRUCache(self.tt_size)
+        size = self.size
+        if isinstance(board, (bytes, bytearray)):
+            self.rows = [[chr(code) if code else '' for code in board[row * size:(row + 1) * size]]
+                         for row in range(size)]
+        else:
+            self.rows = [[(letter or '').upper() for letter in row] for row in board]
+        self.columns = [list(column) for column in zip(*self.rows)]
+        self.tiles_on_board = sum(1 for row in self.rows for letter in row if letter)
+        # (direction, index) -> {rack key: that line's memoized moves, None: its
+        # cross-checks} for the current position
+        self.line_moves = {}
+        self.line_undo = []
+
+        self.counts = [[0] * 27, [0] * 27]
+        for player, rack in enumerate(racks):
+            tiles = [letter.upper() if letter != BLANK else letter for letter in rack if letter]
+            if len(tiles) > RACK_SIZE:
+                raise ValueError(f"a rack holds at most {RACK_SIZE} tiles")
+            for letter in tiles:
+                self.counts[player][tile_index(letter)] += 1
+        # Racks with a blank are searched as they stand; without one, with
+        # the starting rack, and the moves filtered by the tiles still held
+        self.full_counts = [list(counts) for counts in self.counts]
+        self.full_keys = [tuple(counts) for counts in self.counts]
+        self.packed = [GUARD + sum(count << COUNT_BITS * i for i, count in enumerate(counts))
+                       for counts in self.counts]
+        self.values = [sum(count * LETTER_SCORES[chr(i + 65)] for i, count in enumerate(counts[:26]))
+                       for counts in self.counts]
+        self.hash = 0
+        for row in range(size):
+            for col in range(size):
+                letter = self.rows[row][col]
+                if letter:
+                    self.hash ^= ZOBRIST[row * size + col][ord(letter) - 65]
+        for player in (0, 1):
+            for i, count in enumerate(self.counts[player]):
+                self.hash ^= RACK_KEYS[player][i][count]
+
+        self.root_key = self._key(0, False)
+        self.nodes = 0
+        self.generated = 0
+        self.tt_hits = 0
+        widths = WIDENING if width is None else (width,)
+        result = {'value': None, 'moves': [], 'depth': 0, 'width': widths[0],
+                  'resolved': False, 'exact': False}
+        self.hints = None
+        try:
+            for self.width in widths:
+                self.table = LRUCache(self.tt_size)
+                # Shallower iterations only order moves, which the hints now do
+                depth = result['depth'] - DEPTH_STEP if result['resolved'] else 0
+                while max_depth is None or depth < max_depth:
+                    depth += DEPTH_STEP
+                    if max_depth is not None:
+                        depth = min(depth, max_depth)
+                    self.horizon = self.cut = 0
+                    value = self._negamax(depth, -INFINITY, INFINITY, 0, False)
+                    resolved = self.horizon == 0
+                    # A narrower search played out to the end beats a wider one cut short
+                    if resolved or not result['resolved']:
+                        result = {'value': value, 'moves': self._principal_variation(depth),
+                                  'depth': depth, 'width': self.width, 'resolved': resolved,
+                                  'exact': resolved and self.cut == 0}
+                    if resolved:
+                        break
+                if self.cut == 0:
+                    break  # Nothing was left out, so a wider search finds the same
+                # The next width tries this one's best moves first
+                self.hints = self.table
+        except _Timeout:
+            pass
+        elapsed = time.perf_counter() - start
+        result.update(nodes=self.nodes, generated=self.generated, tt_hits=self.tt_hits,
+                      seconds=elapsed, nps=self.nodes / elapsed if elapsed else 0.0)
+        return result
+
+    def _key(self, player, passed):
+        key = self.hash
+        if player:
+            key ^= SECOND_PLAYER_KEY
+        if passed:
+            key ^= PASSED_KEY
+        return key
+
+    def _moves(self, player):
+        """Every legal move for player, highest immediate value first"""
+        generator = self.generator
+        counts = self.counts[player]
+        blank = counts[BLANK_INDEX] > 0
+        search_counts = counts if blank else self.full_counts[player]
+        rack_key = tuple(counts) if blank else self.full_keys[player]
+        board_empty = not self.tiles_on_board
+        current = self.line_moves
+        packed = self.packed[player]
+        moves = []
+        for direction, lines, cross_lines in ((ACROSS, self.rows, self.columns),
+                                              (DOWN, self.columns, self.rows)):
+            for index, line in enumerate(lines):
+                by_rack = current.get((direction, index))
+                if by_rack is None:
+                    by_rack = current[direction, index] = {}
+                line_moves = by_rack.get(rack_key)
+                if line_moves is not None:
+                    moves += [move for move, need in line_moves
+                              if (packed - need) & GUARD == GUARD]
+                    continue
+                # Both players' lists share the line's letters and cross-checks
+                shape = by_rack.get(None)
+                if shape is None:
+                    checks, cross_sums = generator._cross_checks(index, line, cross_lines)
+                    shape = by_rack[None] = (checks, cross_sums, (direction, index, tuple(line),
+                                                                  tuple(checks), tuple(cross_sums),
+                                                                  board_empty))
+                checks, cross_sums, line_key = shape
+                key = (rack_key, line_key)
+                line_moves = self.memo.get(key)
+                if line_moves is None:
+                    found = []
+                    generator._search_line(index, line, checks, cross_sums, list(search_counts),
+                                           direction, found, board_empty)
+                    line_moves = [(move, sum(1 << COUNT_BITS * tile_index(letter)
+                                             for _, _, letter in move.tiles))
+                                  for move in found]
+                    self.memo.put(key, line_moves)
+                by_rack[rack_key] = line_moves
+                moves += [move for move, need in line_moves
+                          if (packed - need) & GUARD == GUARD]
+        self.generated += 1
+        # Going out ends the game with the opponent's tiles as a bonus
+        held = sum(counts)
+        out_bonus = 2 * self.values[1 - player]
+        moves.sort(key=lambda move: -(move.score + (out_bonus if len(move.tiles) == held else 0)))
+        return moves
+
+    def _play(self, move, player):
+        size = self.size
+        counts = self.counts[player]
+        keys = RACK_KEYS[player]
+        for row, col, letter in move.tiles:
+            upper = letter.upper()
+            self.rows[row][col] = upper
+            self.columns[col][row] = upper
+            self.hash ^= ZOBRIST[row * size + col][ord(upper) - 65]
+            i = tile_index(letter)
+            self.hash ^= keys[i][counts[i]] ^ keys[i][counts[i] - 1]
+            counts[i] -= 1
+            self.packed[player] -= 1 << COUNT_BITS * i
+            if i != BLANK_INDEX:
+                self.values[player] -= LETTER_SCORES[upper]
+        self.line_undo.append(self._invalidate(move))
+        self.tiles_on_board += len(move.tiles)
+
+    def _invalidate(self, move):
+        """Drop the current lines a play changed; return what to restore on undo.
+
+        A tile changes its own row and column, and the cross-checks of the
+        squares just beyond the runs it now belongs to: the rows above and
+        below its column run, and the columns either side of its row run.
+        """
+        size = self.size
+        if not self.tiles_on_board:
+            # Off an empty board every line gains anchors
+            dirty = [(direction, index) for direction in (ACROSS, DOWN) for index in range(size)]
+        else:
+            dirty = set()
+            for row, col, _ in move.tiles:
+                dirty.add((ACROSS, row))
+                dirty.add((DOWN, col))
+                for direction, line, pos in ((ACROSS, self.columns[col], row),
+                                             (DOWN, self.rows[row], col)):
+                    start = end = pos
+                    while start > 0 and line[start - 1]:
+                        start -= 1
+                    while end < size - 1 and line[end + 1]:
+                        end += 1
+                    if start > 0:
+                        dirty.add((direction, start - 1))
+                    if end < size - 1:
+                        dirty.add((direction, end + 1))
+        current = self.line_moves
+        return [(key, current.pop(key, None)) for key in dirty]
+
+    def _undo(self, move, player):
+        size = self.size
+        counts = self.counts[player]
+        keys = RACK_KEYS[player]
+        for row, col, letter in move.tiles:
+            upper = letter.upper()
+            self.rows[row][col] = ''
+            self.columns[col][row] = ''
+            self.hash ^= ZOBRIST[row * size + col][ord(upper) - 65]
+            i = tile_index(letter)
+            self.hash ^= keys[i][counts[i]] ^ keys[i][counts[i] + 1]
+            counts[i] += 1
+            self.packed[player] += 1 << COUNT_BITS * i
+            if i != BLANK_INDEX:
+                self.values[player] += LETTER_SCORES[upper]
+        self.tiles_on_board -= len(move.tiles)
+        current = self.line_moves
+        for key, by_rack in self.line_undo.pop():
+            if by_rack is None:
+                current.pop(key, None)
+            else:
+                current[key] = by_rack
+
+    def _negamax(self, depth, alpha, beta, player, passed):
+        """Value of the position for player, searched depth plies deep"""
+        self.nodes += 1
+        if self.nodes % CLOCK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout
+        key = self._key(player, passed)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is None and self.hints is not None:
+            hint = self.hints.get(key)
+            if hint is not None:
+                best_move = hint[3]
+        elif entry is not None:
+            stored_depth, stored_value, bound, best_move = entry
+            if stored_depth >= depth:
+                if (bound == EXACT or (bound == LOWER and stored_value >= beta)
+                        or (bound == UPPER and stored_value <= alpha)):
+                    self.tt_hits += 1
+                    if stored_depth < RESOLVED:
+                        self.horizon += 1
+                    return stored_value
+
+        own, other = self.values[player], self.values[1 - player]
+        if depth == 0:
+            # Horizon: as if the game ended now with both racks unplayed
+            self.horizon += 1
+            return other - own
+
+        horizon = self.horizon
+        original_alpha = alpha
+        moves = self._moves(player)
+        if best_move is not None:
+            if best_move in moves:
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+            elif best_move == PASS:
+                moves.insert(0, PASS)
+        if self.width is not None and key != self.root_key and len(moves) > self.width:
+            # The subtree still resolves, but only under the cut. Plays that
+            # go out end the game, so they cost nothing to keep
+            self.cut += 1
+            held = sum(self.counts[player])
+            moves[self.width:] = [move for move in moves[self.width:]
+                                  if move != PASS and len(move.tiles) == held]
+        if PASS not in moves:
+            moves.append(PASS)
+
+        best_value = -INFINITY
+        best_move = None
+        for n, move in enumerate(moves):
+            if n and beta - alpha > 1:
+                # Principal variation search: a null window proves most moves
+                # no better than the best so far; only the others are re-searched
+                value = self._child(move, depth, alpha, alpha + 1, player, passed)
+                if alpha < value < beta:
+                    value = self._child(move, depth, value, beta, player, passed)
+            else:
+                value = self._child(move, depth, alpha, beta, player, passed)
+            if value > best_value:
+                best_value = value
+                best_move = move
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        stored_depth = RESOLVED if self.horizon == horizon else depth
+        self.table.put(key, (stored_depth, best_value, bound, best_move))
+        return best_value
+
+    def _child(self, move, depth, alpha, beta, player, passed):
+        """Value for player of making move, searched within (alpha, beta)"""
+        if move == PASS:
+            if passed:
+                # Two passes in a row end the game; each side loses its tiles
+                return self.values[1 - player] - self.values[player]
+            return -self._negamax(depth - 1, -beta, -alpha, 1 - player, True)
+        if len(move.tiles) == sum(self.counts[player]):
+            return move.score + 2 * self.values[1 - player]
+        self._play(move, player)
+        try:
+            return move.score - self._negamax(depth - 1, move.score - beta, move.score - alpha,
+                                              1 - player, False)
+        finally:
+            self._undo(move, player)
+
+    def _principal_variation(self, depth):
+        """Follow the best moves stored in the table from the root"""
+        line = []
+        played = []
+        player, passed = 0, False
+        for _ in range(depth):
+            entry = self.table.get(self._key(player, passed))
+            if entry is None or entry[3] is None:
+                break
+            move = entry[3]
+            line.append(move)
+            if move == PASS:
+                if passed:
+                    break
+                passed = True
+            else:
+                if len(move.tiles) == sum(self.counts[player]):
+                    break
+                self._play(move, player)
+                played.append((move, player))
+                passed = False
+            player = 1 - player
+        for move, mover in reversed(played):
+            self._undo(move, mover)
+        return line
+
+
+def describe(move):
+    """Short label for a move: word, start square and direction, or 'pass'"""
+    if move == PASS:
+        return PASS
+    arrow = '→' if move.direction == ACROSS else '↓'
+    return f"{move.word} {move.row},{move.col} {arrow} {move.score}"
+
+
+def greedy_value(generator, board, racks):
+    """Spread for racks[0] when both sides play their top-scoring move to the end"""
+    state = GameState(board)
+    racks = [list(rack) for rack in racks]
+    values = [sum(LETTER_SCORES[letter] for letter in rack) for rack in racks]
+    spread = 0
+    player = 0
+    passes = 0
+    sign = 1
+    while True:
+        moves = generator.generate(state.grid(), racks[player])
+        if not moves:
+            passes += 1
+            if passes == 2:
+                return spread + sign * (values[1 - player] - values[player])
+        else:
+            passes = 0
+            move = moves[0]
+            state.place(move.tiles)
+            for _, _, letter in move.tiles:
+                tile = BLANK if letter.islower() else letter
+                racks[player].remove(tile)
+                values[player] -= LETTER_SCORES[tile]
+            spread += sign * move.score
+            if not racks[player]:
+                return spread + sign * 2 * values[1 - player]
+        player = 1 - player
+        sign = -sign
+
+
+def endgame_positions(generator, count, seed=0):
+    """Play greedy self-play games until the bag empties; yield (board, racks) there"""
+    from game_state import TileBag
+    from scrabby_sim import remove_tiles
+
+    game = 0
+    found = 0
+    while found < count:
+        rng = random.Random(seed * 1_000_003 + game)
+        game += 1
+        state = GameState()
+        bag = TileBag(rng)
+        racks = [bag.draw(RACK_SIZE), bag.draw(RACK_SIZE)]
+        player = 0
+        while len(bag):
+            moves = generator.generate(state.grid(), racks[player])
+            if not moves:
+                break
+            state.place(moves[0].tiles)
+            remove_tiles(racks[player], moves[0].tiles)
+            racks[player].extend(bag.draw(RACK_SIZE - len(racks[player])))
+            player = 1 - player
+        if len(bag) or not all(racks):
+            continue
+        found += 1
+        yield bytes(state.board), [racks[player], racks[1 - player]]
+
+
+def benchmark(path='wordlist.txt', positions=10, time_limit=DEFAULT_TIME, seed=0, width=None):
+    """Solve endgames from greedy self-play and compare with greedy play-out"""
+    from dictionary_cache import load_dictionary
+
+    generator = MoveGenerator(load_dictionary(path).dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    print(f"{'racks':<18}{'greedy':>7}{'solved':>7}{'depth':>6}{'width':>6}{'end':>5}{'exact':>6}"
+          f"{'nodes':>8}{'s':>7}{'nodes/s':>9}")
+    for board, racks in endgame_positions(generator, positions, seed):
+        result = EndgameSolver(generator).solve(board, racks, time_limit, width=width)
+        greedy = greedy_value(generator, board, racks)
+        label = f"{''.join(racks[0])}/{''.join(racks[1])}"
+        print(f"{label:<18}{greedy:>7}{result['value']:>7}{result['depth']:>6}"
+              f"{result['width'] or 'all':>6}{'yes' if result['resolved'] else 'no':>5}"
+              f"{'yes' if result['exact'] else 'no':>6}{result['nodes']:>8}"
+              f"{result['seconds']:>7.2f}{result['nps']:>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('save', nargs='?', default='scrabby_save.txt',
+                        help="position in scrabby_save.txt format; its rack moves first")
+    parser.add_argument('--opponent', help="opponent's rack (default: every unseen tile)")
+    parser.add_argument('--time', type=float, default=DEFAULT_TIME, help="time limit in seconds")
+    parser.add_argument('--depth', type=int, help="stop after this many plies")
+    parser.add_argument('--width', type=int,
+                        help="search only this many moves per reply (default: widen to all)")
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--benchmark', action='store_true',
+                        help="solve endgames from self-play instead")
+    parser.add_argument('--positions', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.wordlist, args.positions, args.time, width=args.width)
+        return
+    from dictionary_cache import load_dictionary
+    from equity import unseen_tiles
+
+    state = GameState.load(args.save)
+    rack = [letter for letter in state.rack if letter]
+    if args.opponent is not None:
+        opponent = list(args.opponent.upper())
+    else:
+        opponent = unseen_tiles(state)
+        if len(opponent) > RACK_SIZE:
+            raise SystemExit(f"{len(opponent)} tiles are unseen, so the bag is not empty; "
+                             f"give the opponent's rack with --opponent")
+    generator = MoveGenerator(load_dictionary(args.wordlist).dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    try:
+        result = EndgameSolver(generator).solve(state.board, [rack, opponent], args.time,
+                                                args.depth, args.width)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{''.join(rack)} to move against {''.join(opponent)}")
+    if result['value'] is None:
+        print("No ply finished within the time limit.")
+    else:
+        replies = f"best {result['width']} replies" if result['width'] else "all replies"
+        if result['exact']:
+            kind = 'exact'
+        elif result['resolved']:
+            kind = f"played out to the end, {replies}"
+        else:
+            kind = f"to depth {result['depth']}, {replies}"
+        print(f"value {result['value']:+d} ({kind})")
+        for ply, move in enumerate(result['moves']):
+            print(f"  {'us  ' if ply % 2 == 0 else 'them'} {describe(move)}")
+    print(f"{result['nodes']} nodes in {result['seconds']:.2f}s ({result['nps']:.0f} nodes/s), "
+          f"{result['tt_hits']} table hits")
+
+
+if __name__ == '__main__':
+    main()
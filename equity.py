@@ -0,0 +1,205 @@
+"""Monte Carlo move-equity evaluation with a tile-bag model
+
+Ranks the top-K candidate moves of a saved position by mean equity over
+sampled opponent racks and future draws, within a wall-clock budget.
+
+    python equity.py scrabby_save.txt --top 10 --time 5 --workers 4
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from dictionary_cache import load_dictionary
+from game_state import (BAG_COUNTS, LETTER_SCORES, RACK_SIZE, SPECIAL_SQUARES, GameState,
+                        rack_tile)
+from movegen import MoveGenerator
+
+# Samples per task sent to a worker; small enough that the time budget is
+# only overrun by about one batch
+BATCH_SAMPLES = 4
+Z_95 = 1.96
+
+
+def unseen_tiles(state, counts=BAG_COUNTS):
+    """Return the tiles not on the board or the rack, per the bag model"""
+    remaining = dict(counts)
+    for letter in bytes(code for code in state.board if code).decode('ascii'):
+        remaining[letter] = remaining.get(letter, 0) - 1
+    for letter in state.rack:
+        if letter:
+            remaining[letter] = remaining.get(letter, 0) - 1
+    # The UI draws racks with replacement, so a position can hold more of
+    # a letter than the bag model has; treat those letters as exhausted
+    return [letter for letter, count in sorted(remaining.items()) for _ in range(max(0, count))]
+
+
+class MoveStats:
+    """Running mean and variance of one candidate's sampled equity"""
+
+    __slots__ = ('move', 'count', 'total', 'total_sq')
+
+    def __init__(self, move):
+        self.move = move
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, count, total, total_sq):
+        self.count += count
+        self.total += total
+        self.total_sq += total_sq
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float(self.move.score)
+
+    @property
+    def ci95(self):
+        """Half-width of the 95% confidence interval of the mean"""
+        if self.count < 2:
+            return float('inf')
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return Z_95 * math.sqrt(max(0.0, variance) / self.count)
+
+
+def sample_equities(generator, board, rack, candidates, unseen, samples, seed, plies=2,
+                    deadline=None):
+    """Play out sampled continuations for every candidate move.
+
+    Each sample shuffles the unseen tiles once and reuses that draw for all
+    candidates (common random numbers), so differences between candidates
+    are not swamped by draw luck. Ply 2 is the opponent's best reply from
+    a sampled rack; with plies=3 our best follow-up from the refilled rack
+    is added as well.
+
+    Returns (samples taken, [(count, sum, sum of squares)] per candidate).
+    """
+    rng = random.Random(seed)
+    sums = [[0, 0.0, 0.0] for _ in candidates]
+    taken = 0
+    for _ in range(samples):
+        if deadline is not None and taken and time.time() > deadline:
+            break
+        pool = list(unseen)
+        rng.shuffle(pool)
+        opponent_rack = pool[:RACK_SIZE]
+        bag = pool[RACK_SIZE:]
+        for stats, (tiles, score) in zip(sums, candidates):
+            after = GameState(board)
+            after.place(tiles)
+            grid = after.grid()
+            replies = generator.generate(grid, opponent_rack)
+            equity = score - (replies[0].score if replies else 0)
+            if plies >= 3:
+                if replies:
+                    after.place(replies[0].tiles)
+                    grid = after.grid()
+                leave = list(rack)
+                for _, _, letter in tiles:
+                    leave.remove(rack_tile(letter))
+                refill = leave + bag[:RACK_SIZE - len(leave)]
+                follow_ups = generator.generate(grid, refill)
+                equity += follow_ups[0].score if follow_ups else 0
+            stats[0] += 1
+            stats[1] += equity
+            stats[2] += equity * equity
+        taken += 1
+    return taken, sums
+
+
+# Per-process state, set up once by _init_worker
+_generator = None
+
+
+def _init_worker(wordlist):
+    global _generator
+    _generator = MoveGenerator(load_dictionary(wordlist).dawg, LETTER_SCORES, SPECIAL_SQUARES)
+
+
+def _sample_batch(board, rack, candidates, unseen, samples, seed, plies, deadline):
+    return sample_equities(_generator, board, rack, candidates, unseen, samples, seed,
+                           plies, deadline)
+
+
+def evaluate_position(state, top=10, time_budget=5.0, workers=None, seed=0, plies=2,
+                      wordlist='wordlist.txt', max_samples=None):
+    """Rank the top candidate moves of a position by Monte Carlo equity.
+
+    Batches of samples are spread over a process pool until time_budget
+    seconds have passed (or max_samples samples were taken). Returns the
+    MoveStats of each candidate, best mean equity first.
+    """
+    workers = workers or os.cpu_count()
+    dictionary = load_dictionary(wordlist)
+    generator = MoveGenerator(dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    rack = [letter for letter in state.rack if letter]
+    moves = generator.generate(state.grid(), rack)[:top]
+    results = [MoveStats(move) for move in moves]
+    unseen = unseen_tiles(state)
+    if not moves or not unseen:
+        return results
+
+    board = bytes(state.board)
+    candidates = [(move.tiles, move.score) for move in moves]
+    deadline = time.time() + time_budget
+    submitted = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(wordlist,)) as executor:
+        pending = set()
+        while True:
+            while (len(pending) < workers and time.time() < deadline
+                   and (max_samples is None or submitted < max_samples)):
+                count = BATCH_SAMPLES if max_samples is None else min(BATCH_SAMPLES, max_samples - submitted)
+                pending.add(executor.submit(_sample_batch, board, rack, candidates, unseen,
+                                            count, seed * 1_000_003 + submitted, plies, deadline))
+                submitted += count
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                _, sums = future.result()
+                for stats, (count, total, total_sq) in zip(results, sums):
+                    stats.add(count, total, total_sq)
+    results.sort(key=lambda stats: -stats.mean)
+    return results
+
+
+def describe(move):
+    """Short label for a move: word, start square and direction"""
+    arrow = '→' if move.direction == 'across' else '↓'
+    return f"{move.word} {move.row},{move.col} {arrow}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('save', nargs='?', default='scrabby_save.txt', help="saved position")
+    parser.add_argument('--top', type=int, default=10, help="candidate moves to simulate")
+    parser.add_argument('--time', type=float, default=5.0, help="wall-clock budget in seconds")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--plies', type=int, choices=(2, 3), default=2,
+                        help="2: move and opponent reply; 3: also our next move")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    args = parser.parse_args(argv)
+
+    state = GameState.load(args.save)
+    start = time.perf_counter()
+    results = evaluate_position(state, args.top, args.time, args.workers, args.seed,
+                                args.plies, args.wordlist)
+    elapsed = time.perf_counter() - start
+    if not results:
+        print("No legal moves.")
+        return
+    print(f"{'move':<22}{'score':>6}{'equity':>9}{'±95%':>8}{'samples':>9}")
+    for stats in results:
+        print(f"{describe(stats.move):<22}{stats.move.score:>6}{stats.mean:>9.1f}"
+              f"{stats.ci95:>8.1f}{stats.count:>9}")
+    print(f"{elapsed:.1f}s wall clock on {args.workers} worker(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""Headless game state shared by the Tk UI, tools and worker processes"""
+
+import json
+import random
+import string
+
+BOARD_SIZE = 15
+RACK_SIZE = 7
+
+LETTER_SCORES = {letter: 1 for letter in string.ascii_uppercase}
+for letters, value in (('AEILNORSTU', 1), ('DG', 2), ('BCMP', 3), ('FHVWY', 4),
+                       ('K', 5), ('JX', 8), ('QZ', 10)):
+    for letter in letters:
+        LETTER_SCORES[letter] = value
+
+# A blank tile plays as any letter for no points. On the rack it is '?';
+# in a word or a move's tiles it is the lowercase letter it stands for.
+BLANK = '?'
+LETTER_SCORES[BLANK] = 0
+
+
+def _is_letter(letter):
+    """Whether a value read from a save is one letter A-Z, in either case"""
+    return isinstance(letter, str) and len(letter) == 1 and letter.isascii() and letter.isalpha()
+
+
+def rack_tile(letter):
+    """Return the rack tile a played letter came from: BLANK for lowercase"""
+    return BLANK if letter.islower() else letter
+
+# Special squares configuration
+SPECIAL_SQUARES = {
+    'TW': [(0,0), (0,7), (0,14), (7,0), (7,14), (14,0), (14,7), (14,14)],  # Triple Word
+    'DW': [(1,1), (2,2), (3,3), (4,4), (13,13), (12,12), (11,11), (10,10),
+           (1,13), (2,12), (3,11), (4,10), (13,1), (12,2), (11,3), (10,4)],  # Double Word
+    'TL': [(1,5), (1,9), (5,1), (5,5), (5,9), (5,13), (9,1), (9,5), (9,9), (9,13), (13,5), (13,9)],  # Triple Letter
+    'DL': [(0,3), (0,11), (2,6), (2,8), (3,0), (3,7), (3,14), (6,2), (6,6), (6,8), (6,12),
+           (7,3), (7,11), (8,2), (8,6), (8,8), (8,12), (11,0), (11,7), (11,14), (12,6), (12,8), (14,3), (14,11)]  # Double Letter
+}
+
+
+def compile_multipliers(special_squares, board_size=BOARD_SIZE):
+    """Compile a special-squares layout into flat letter and word multiplier tables.
+
+    Both tables are bytes of board_size * board_size entries indexed by
+    row * board_size + col, so scoring never searches the position lists.
+    """
+    letter_mult = bytearray(b'\x01' * (board_size * board_size))
+    word_mult = bytearray(b'\x01' * (board_size * board_size))
+    for code, table, value in (('DL', letter_mult, 2), ('TL', letter_mult, 3),
+                               ('DW', word_mult, 2), ('TW', word_mult, 3)):
+        for row, col in special_squares.get(code, ()):
+            table[row * board_size + col] = value
+    return bytes(letter_mult), bytes(word_mult)
+
+
+LETTER_MULT, WORD_MULT = compile_multipliers(SPECIAL_SQUARES)
+
+# Letter distribution: new racks get 3 vowels and 4 consonants, each drawn
+# uniformly from its group
+VOWELS = 'AEIOU'
+CONSONANTS = 'BCDFGHJKLMNPQRSTVWXYZ'
+RACK_VOWELS = 3
+
+# A finite bag with the same vowel/consonant balance (45 vowels to 63
+# consonants, as 3:4 is to 3:4.2), used by headless games and analysis
+BAG_COUNTS = {letter: 9 for letter in VOWELS}
+BAG_COUNTS.update({letter: 3 for letter in CONSONANTS})
+
+
+def draw_letters(rng=random, count=RACK_SIZE):
+    """Return a fresh rack: 3 vowels and 4 consonants, shuffled"""
+    vowels = round(count * RACK_VOWELS / RACK_SIZE)
+    letters = rng.choices(VOWELS, k=vowels) + rng.choices(CONSONANTS, k=count - vowels)
+    rng.shuffle(letters)
+    return letters
+
+
+class TileBag:
+    """Shuffled finite bag of tiles built from BAG_COUNTS"""
+
+    __slots__ = ('tiles',)
+
+    def __init__(self, rng=random, counts=None):
+        counts = BAG_COUNTS if counts is None else counts
+        self.tiles = [letter for letter, count in counts.items() for _ in range(count)]
+        rng.shuffle(self.tiles)
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def draw(self, count):
+        """Remove and return up to count tiles"""
+        drawn = self.tiles[len(self.tiles) - count:] if count else []
+        del self.tiles[len(self.tiles) - len(drawn):]
+        return drawn
+
+    def exchange(self, letters, rng=random):
+        """Put letters back, reshuffle and draw the same number"""
+        self.tiles.extend(letters)
+        rng.shuffle(self.tiles)
+        return self.draw(len(letters))
+
+
+class GameState:
+    """Board, rack and score with no Tk dependency.
+
+    The board is a flat bytearray of BOARD_SIZE * BOARD_SIZE cells holding
+    the ASCII code of the letter on each square, or 0 when it is empty.
+    lexicon names the word list the game is played with (None: the default).
+    """
+
+    __slots__ = ('board', 'rack', 'score', 'lexicon')
+
+    def __init__(self, board=None, rack=(), score=0, lexicon=None):
+        self.board = bytearray(board) if board is not None else bytearray(BOARD_SIZE * BOARD_SIZE)
+        self.rack = list(rack)
+        self.score = score
+        self.lexicon = lexicon
+
+    def copy(self):
+        return GameState(self.board, self.rack, self.score, self.lexicon)
+
+    @staticmethod
+    def _index(row, col):
+        """Flat board index of a square; ValueError if it is off the board"""
+        if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
+            raise ValueError(f"square {row},{col} is off the {BOARD_SIZE}x{BOARD_SIZE} board")
+        return row * BOARD_SIZE + col
+
+    def get(self, row, col):
+        """Return the letter on a square, or '' if it is empty"""
+        code = self.board[self._index(row, col)]
+        return chr(code) if code else ''
+
+    def set(self, row, col, letter):
+        """Put a letter on a square; '' or None empties it"""
+        self.board[self._index(row, col)] = ord(letter.upper()) if letter else 0
+
+    def clear_board(self):
+        self.board[:] = bytes(len(self.board))
+
+    def place(self, tiles):
+        """Put each (row, col, letter) tile on the board"""
+        for row, col, letter in tiles:
+            self.set(row, col, letter)
+
+    def is_board_empty(self):
+        return not any(self.board)
+
+    def letters(self):
+        """Return (letter, row, col) for every tile on the board, row by row"""
+        board = self.board
+        return [(chr(code), i // BOARD_SIZE, i % BOARD_SIZE)
+                for i, code in enumerate(board) if code]
+
+    def grid(self):
+        """Return the board as rows of letters, '' for empty squares"""
+        cells = [chr(code) if code else '' for code in self.board]
+        return [cells[row * BOARD_SIZE:(row + 1) * BOARD_SIZE] for row in range(BOARD_SIZE)]
+
+    def first_empty(self):
+        """Return (row, col) of the first empty square in reading order, or None"""
+        i = self.board.find(0)
+        return None if i < 0 else divmod(i, BOARD_SIZE)
+
+    def current_word(self):
+        """Get all letters on the board as a word"""
+        return bytes(code for code in self.board if code).decode('ascii')
+
+    def word_score(self, letter_scores=LETTER_SCORES, letter_mult=LETTER_MULT, word_mult=WORD_MULT):
+        """Calculate the score for the board letters, including special square multipliers"""
+        # Calculate base score with letter multipliers
+        base_score = 0
+        word_multiplier = 1
+
+        for i, code in enumerate(self.board):
+            if code:
+                base_score += letter_scores[chr(code)] * letter_mult[i]
+                word_multiplier *= word_mult[i]
+
+        # Apply word multipliers
+        return base_score * word_multiplier
+
+    def to_dict(self):
+        """Return the scrabby_save.txt representation of this state"""
+        game_state = {
+            'score': self.score,
+            'board_state': {f"{row},{col}": letter for letter, row, col in self.letters()},
+            'rack_letters': list(self.rack),
+        }
+        if self.lexicon is not None:
+            game_state['lexicon'] = self.lexicon
+        return game_state
+
+    @classmethod
+    def from_dict(cls, game_state):
+        """Build a state from the scrabby_save.txt representation.
+
+        Raises ValueError unless every board letter is A-Z (either case)
+        and every rack tile is A-Z, BLANK or '' for an empty slot.
+        """
+        rack = []
+        for letter in game_state.get('rack_letters', ()):
+            if not (letter == '' or letter == BLANK or _is_letter(letter)):
+                raise ValueError(f"rack tile {letter!r} is not a letter A-Z or '{BLANK}'")
+            rack.append(letter.upper())
+        state = cls(rack=rack, score=game_state.get('score', 0),
+                    lexicon=game_state.get('lexicon'))
+        for pos, letter in game_state.get('board_state', {}).items():
+            if not _is_letter(letter):
+                raise ValueError(f"board square {pos} holds {letter!r}, not a letter A-Z")
+            row, col = map(int, pos.split(','))
+            state.set(row, col, letter)
+        return state
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            # Save in a pretty-printed, human-readable format
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'r') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,143 @@
+"""Opt-in timing, counters and cProfile dumps for the UI hot paths
+
+Off unless SCRABBY_PROFILE is set or main.py is started with --profile.
+When off, timer() hands back a shared no-op context so the hot paths pay
+for one attribute lookup and nothing else.
+
+    SCRABBY_PROFILE=1 python main.py
+    python main.py --profile --profile-dump scrabby.pstats
+"""
+
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import time
+from collections import deque
+
+ENV_VAR = 'SCRABBY_PROFILE'
+DUMP_ENV_VAR = 'SCRABBY_PROFILE_DUMP'
+# Samples kept per timer for the rolling percentiles
+WINDOW = 200
+# Before 3.12 cProfile hooks only the thread that enables it. From 3.12 it
+# runs on sys.monitoring, which sees every thread and takes one profiler
+# at a time, so a second one for the worker can't be enabled
+PER_THREAD_PROFILER = sys.version_info < (3, 12)
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Instrumentation:
+    """Rolling timings and counters for named hot paths"""
+
+    def __init__(self, enabled=False, dump_path=None, window=WINDOW):
+        self.enabled = enabled
+        self.dump_path = dump_path
+        self.window = window
+        self.timings = {}
+        self.counters = {}
+        self.profiler = None
+        # Where the profiler only sees its own thread, the analysis worker
+        # gets a second one, merged into the same dump
+        self.worker_profiler = None
+        if enabled and dump_path:
+            self.profiler = cProfile.Profile()
+            if PER_THREAD_PROFILER:
+                self.worker_profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @classmethod
+    def from_environment(cls, profile=False, dump_path=None):
+        """Build from CLI options, falling back to SCRABBY_PROFILE(_DUMP)"""
+        dump_path = dump_path or os.environ.get(DUMP_ENV_VAR)
+        enabled = profile or bool(dump_path) or os.environ.get(ENV_VAR, '') not in ('', '0')
+        return cls(enabled, dump_path)
+
+    def timer(self, name):
+        """Context manager that records the wall time of its block under name"""
+        if not self.enabled:
+            return _NO_TIMER
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    @contextlib.contextmanager
+    def worker_profile(self):
+        """Profile a block running on the (single) analysis worker thread.
+
+        A no-op where the main profiler already covers every thread.
+        """
+        profiler = self.worker_profiler
+        if profiler is None:
+            yield
+            return
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def record(self, name, ms):
+        """Add one timing sample in milliseconds"""
+        if not self.enabled:
+            return
+        samples = self.timings.get(name)
+        if samples is None:
+            samples = self.timings[name] = deque(maxlen=self.window)
+        samples.append(ms)
+
+    def count(self, name, amount=1):
+        """Add to a running counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def percentiles(self, name):
+        """Return (p50, p95) in ms over the window, or None without samples"""
+        samples = self.timings.get(name)
+        if not samples:
+            return None
+        return percentile(samples, 0.5), percentile(samples, 0.95)
+
+    def hit_ratio(self, name):
+        """Fraction of name_hits over name_hits + name_misses, or None before any lookup"""
+        hits = self.counters.get(name + '_hits', 0)
+        lookups = hits + self.counters.get(name + '_misses', 0)
+        return hits / lookups if lookups else None
+
+    def summary(self, names=None, caches=()):
+        """One line of 'name p50/p95 ms' and 'cache hits %' entries for a status bar"""
+        parts = []
+        for name in names or sorted(self.timings):
+            result = self.percentiles(name)
+            if result is not None:
+                parts.append(f"{name} {result[0]:.1f}/{result[1]:.1f} ms")
+        for name in caches:
+            ratio = self.hit_ratio(name)
+            if ratio is not None:
+                parts.append(f"{name} hits {ratio:.0%}")
+        return '   '.join(parts)
+
+    def close(self):
+        """Stop the profiler and write its pstats file, if one was requested"""
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler)
+        if self.worker_profiler is not None and self.worker_profiler.getstats():
+            stats.add(self.worker_profiler)
+        stats.dump_stats(self.dump_path)
+        self.profiler = self.worker_profiler = None
+        return self.dump_path
@@ -0,0 +1,270 @@
+"""Append-only JSONL journal of game events with snapshots for fast resume
+
+Every change to the game state is one compact JSON line: rack draws and
+edits, tiles placed on the board, submitted moves, clears, resets and
+loaded positions. Lines are flushed as they are written and fsynced in
+batches. Replaying the journal from the start rebuilds the state at any
+ply (submitted move); a periodic snapshot of the whole state, written
+beside the journal, lets a session resume by replaying only the tail.
+
+    python journal.py scrabby_journal.jsonl --ply 3 --save ply3.txt
+"""
+
+import argparse
+import json
+import os
+import time
+
+from game_state import GameState
+
+VERSION = 1
+# fsync after this many records, or when the oldest unsynced one is this old
+SYNC_EVERY = 32
+SYNC_INTERVAL = 1.0
+# Records between snapshots
+SNAPSHOT_EVERY = 200
+
+
+def snapshot_path_for(path):
+    """Return the snapshot file that belongs to a journal"""
+    return path + '.snap'
+
+
+def apply_record(state, record):
+    """Apply one journal record to a GameState; return 1 if it was a move, else 0"""
+    kind = record['t']
+    if kind == 'place':
+        state.place(record['tiles'])
+    elif kind == 'rack':
+        state.rack = list(record['rack'])
+    elif kind == 'move':
+        state.place(record['tiles'])
+        state.score += record['score']
+        return 1
+    elif kind == 'clear':
+        state.clear_board()
+    elif kind == 'reset':
+        state.clear_board()
+        state.rack = []
+        state.score = 0
+    elif kind == 'lexicon':
+        state.lexicon = record['lexicon']
+    elif kind == 'state':
+        loaded = GameState.from_dict(record['state'])
+        state.board[:] = loaded.board
+        state.rack = loaded.rack
+        state.score = loaded.score
+        state.lexicon = loaded.lexicon
+    return 0
+
+
+def _read_records(f):
+    """Yield (record, offset after it) from an open binary journal.
+
+    A torn final line, left by a crash mid-write, ends the journal.
+    """
+    offset = f.tell()
+    for line in f:
+        if not line.endswith(b'\n'):
+            return
+        offset += len(line)
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return
+        if record.get('t') != 'journal':
+            yield record, offset
+
+
+def replay(path, ply=None):
+    """Rebuild the state from the start of a journal, stopping after move number ply.
+
+    Returns (state, moves replayed). Records after the last requested move
+    (rack draws, clears) are included up to the next move.
+    """
+    state = GameState()
+    moves = 0
+    with open(path, 'rb') as f:
+        for record, _ in _read_records(f):
+            if ply is not None and moves == ply and record['t'] == 'move':
+                break
+            moves += apply_record(state, record)
+    return state, moves
+
+
+def resume(path):
+    """Return (state, moves, records) at the end of a journal, starting from its snapshot"""
+    state = GameState()
+    moves = records = 0
+    offset = 0
+    try:
+        with open(snapshot_path_for(path)) as f:
+            snapshot = json.load(f)
+        state = GameState.from_dict(snapshot['state'])
+        moves, records, offset = snapshot['moves'], snapshot['records'], snapshot['offset']
+    except (OSError, ValueError, KeyError):
+        pass
+    with open(path, 'rb') as f:
+        if offset > os.fstat(f.fileno()).st_size:
+            # Snapshot is newer than the journal it describes; replay it all
+            return resume_from_start(path)
+        f.seek(offset)
+        for record, _ in _read_records(f):
+            moves += apply_record(state, record)
+            records += 1
+    return state, moves, records
+
+
+def resume_from_start(path):
+    """resume() without a snapshot: replay the whole journal"""
+    state, moves = replay(path)
+    with open(path, 'rb') as f:
+        records = sum(1 for _ in _read_records(f))
+    return state, moves, records
+
+
+class Journal:
+    """Writer for an append-only game journal.
+
+    append() writes and flushes one line; fsync is batched to every
+    SYNC_EVERY records or SYNC_INTERVAL seconds, so a crash loses at most
+    that much. Every SNAPSHOT_EVERY records the state passed to append()
+    is written to the snapshot file (atomically, via a temp file).
+
+    Opening an existing journal appends to it; .resumed then holds the
+    state at its end, else None.
+    """
+
+    def __init__(self, path, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL,
+                 snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.records = 0
+        self.moves = 0
+        self.unsynced = 0
+        self.first_unsynced = None
+        self.since_snapshot = 0
+        self.resumed = None
+        if os.path.exists(path) and os.path.getsize(path):
+            self._truncate_torn_tail()
+            self.resumed, self.moves, self.records = resume(path)
+            self.file = open(path, 'ab')
+        else:
+            # A snapshot left from an older journal would not match this one
+            if os.path.exists(snapshot_path_for(path)):
+                os.remove(snapshot_path_for(path))
+            self.file = open(path, 'wb')
+            self._write({'t': 'journal', 'version': VERSION, 'created': time.time()})
+            self.sync()
+
+    def _truncate_torn_tail(self):
+        """Cut off a partial last record so appends start on a clean line"""
+        with open(self.path, 'rb+') as f:
+            end = 0
+            for _, offset in _read_records(f):
+                end = offset
+            if end == 0:
+                # Only the header (or nothing readable): keep the header line
+                f.seek(0)
+                first = f.readline()
+                end = len(first) if first.endswith(b'\n') else 0
+            f.truncate(end)
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')).encode('ascii') + b'\n')
+        self.file.flush()
+
+    def append(self, record, state=None):
+        """Write one record; state (after the record) feeds the periodic snapshot"""
+        self._write(record)
+        self.records += 1
+        self.moves += record['t'] == 'move'
+        self.unsynced += 1
+        now = time.monotonic()
+        if self.first_unsynced is None:
+            self.first_unsynced = now
+        if self.unsynced >= self.sync_every or now - self.first_unsynced >= self.sync_interval:
+            self.sync()
+        self.since_snapshot += 1
+        if state is not None and self.since_snapshot >= self.snapshot_every:
+            self.snapshot(state)
+
+    def sync(self):
+        """Force written records to disk"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.first_unsynced = None
+
+    def snapshot(self, state):
+        """Write the full state and the journal offset it corresponds to"""
+        self.sync()
+        snapshot = {'offset': self.file.tell(), 'moves': self.moves, 'records': self.records,
+                    'state': state.to_dict()}
+        path = snapshot_path_for(self.path)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+        self.since_snapshot = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def benchmark(records=5000, path='/tmp/scrabby_journal_bench.jsonl'):
+    """Compare journal appends with re-saving the whole state per move"""
+    import random
+
+    for stale in (path, snapshot_path_for(path)):
+        if os.path.exists(stale):
+            os.remove(stale)
+    rng = random.Random(0)
+    state = GameState()
+    journal = Journal(path)
+    start = time.perf_counter()
+    for i in range(records):
+        tile = (rng.randrange(15), rng.randrange(15), rng.choice('AEIOURST'))
+        record = {'t': 'move', 'tiles': [tile], 'score': rng.randrange(30)}
+        apply_record(state, record)
+        journal.append(record, state)
+    journal.close()
+    append_us = (time.perf_counter() - start) / records * 1e6
+
+    start = time.perf_counter()
+    for _ in range(200):
+        state.save(path + '.save')
+    save_us = (time.perf_counter() - start) / 200 * 1e6
+
+    start = time.perf_counter()
+    replayed, moves = replay(path)
+    replay_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    resumed, _, _ = resume(path)
+    resume_ms = (time.perf_counter() - start) * 1000
+    assert replayed.to_dict() == resumed.to_dict() == state.to_dict()
+    print(f"append (batched fsync)    {append_us:8.1f} us/record")
+    print(f"full pretty-printed save  {save_us:8.1f} us/save")
+    print(f"replay {moves} moves        {replay_ms:8.1f} ms")
+    print(f"resume from snapshot      {resume_ms:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('journal', nargs='?', default='scrabby_journal.jsonl')
+    parser.add_argument('--ply', type=int, help="stop after this many moves (default: all)")
+    parser.add_argument('--save', help="write the replayed position as a save file")
+    args = parser.parse_args(argv)
+
+    state, moves = replay(args.journal, args.ply)
+    print(f"{moves} moves replayed: score {state.score}, rack {''.join(state.rack)}, "
+          f"{len(state.letters())} tiles on the board")
+    if args.save:
+        state.save(args.save)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""Rack-leave values from a linear model fitted to self-play
+
+The value of the tiles kept after a play is computed from a handful of
+weights: one for holding each tile kind (A-Z and the blank), one for
+each further copy of it, and one for an unbalanced vowel count. The
+weights are fitted offline to next-turn scores in headless self-play,
+played with blanks in the bag so the blank gets a value too, and saved
+next to the word list. They are refitted when the word list or the
+letter scores change. The model is evaluated directly: a lookup sums at
+most six weights, about as fast as reading a precomputed table.
+
+    python leave_model.py --games 400 --workers 4
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from dictionary_cache import cache_is_fresh, source_checksum
+from game_state import BAG_COUNTS, BLANK, LETTER_SCORES, RACK_SIZE, VOWELS
+
+FORMAT = 2
+MAX_LEAVE = RACK_SIZE - 1
+LETTERS = 26
+# Tile kinds: A-Z are 0-25 and the blank has the slot after them
+BLANK_SLOT = LETTERS
+TILE_KINDS = LETTERS + 1
+TILE_INDEX = {chr(65 + i): i for i in range(LETTERS)}
+TILE_INDEX[BLANK] = BLANK_SLOT
+KIND_NAMES = [chr(65 + i) for i in range(LETTERS)] + [BLANK]
+VOWEL_INDICES = [TILE_INDEX[vowel] for vowel in VOWELS]
+# The self-play bag the model is fitted on: the game's, plus two blanks
+TRAINING_BAG = dict(BAG_COUNTS, **{BLANK: 2})
+
+
+def model_path_for(path):
+    """Return the leave model file that belongs to a word list"""
+    return os.path.splitext(path)[0] + '_leaves.json'
+
+
+def scores_checksum(letter_scores):
+    """Return a CRC32 identifying a letter_scores mapping"""
+    return zlib.crc32(json.dumps(sorted(letter_scores.items())).encode('ascii'))
+
+
+def leave_features(counts):
+    """Return the model features for an (n, 27) array of leave tile counts.
+
+    Per tile kind (A-Z, then blanks) whether the leave holds one and how
+    many more copies it holds, then the squared distance of the vowel
+    count from a balanced rack's share of the letters. Blanks are
+    neither vowels nor consonants.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    sizes = counts[:, :LETTERS].sum(axis=1)
+    vowels = counts[:, VOWEL_INDICES].sum(axis=1)
+    imbalance = (vowels - sizes * 3 / RACK_SIZE) ** 2
+    return np.column_stack([np.minimum(counts, 1), np.maximum(counts - 1, 0), imbalance])
+
+
+def training_samples(results):
+    """Pair each recorded leave with the same player's score on their next turn.
+
+    results are play_game stats recorded with record_leaves. Returns
+    (counts, targets): an (n, 27) count matrix and the next-turn scores
+    minus their mean, so a leave's value is relative to an average draw.
+    """
+    counts = []
+    scores = []
+    for stats in results:
+        pending = {}
+        for player, score, leave in stats['leaves']:
+            if player in pending:
+                counts.append(pending.pop(player))
+                scores.append(score)
+            if len(leave) <= MAX_LEAVE:
+                row = [0] * TILE_KINDS
+                for letter in leave:
+                    row[TILE_INDEX[letter]] += 1
+                pending[player] = row
+    counts = np.array(counts, dtype=np.float64).reshape(-1, TILE_KINDS)
+    scores = np.array(scores, dtype=np.float64)
+    return counts, scores - (scores.mean() if len(scores) else 0.0)
+
+
+def fit_weights(counts, targets, ridge=1.0):
+    """Least-squares feature weights, lightly ridge-regularised for rare tiles"""
+    features = leave_features(counts)
+    penalty = np.sqrt(ridge) * np.eye(features.shape[1])
+    a = np.vstack([features, penalty])
+    b = np.concatenate([targets, np.zeros(features.shape[1])])
+    weights, *_ = np.linalg.lstsq(a, b, rcond=None)
+    return weights
+
+
+class LeaveModel:
+    """Fitted leave weights and the word list and scores they were fitted for"""
+
+    def __init__(self, weights, source_size=0, source_mtime=0, source_crc=0, scores_crc=0,
+                 games=0, samples=0):
+        weights = [float(weight) for weight in weights]
+        # Value of holding the first copy of each kind, and of each copy after it
+        self.first = weights[:TILE_KINDS]
+        self.extra = weights[TILE_KINDS:2 * TILE_KINDS]
+        self.imbalance = weights[2 * TILE_KINDS]
+        self.source_size = source_size
+        self.source_mtime = source_mtime
+        self.source_crc = source_crc
+        self.scores_crc = scores_crc
+        self.games = games
+        self.samples = samples
+
+    def value(self, letters):
+        """Return the value of keeping letters; leaves over MAX_LEAVE tiles score 0"""
+        held = {}
+        for letter in letters:
+            if letter:
+                i = TILE_INDEX[letter]
+                held[i] = held.get(i, 0) + 1
+        if sum(held.values()) > MAX_LEAVE:
+            return 0.0
+        value = 0.0
+        vowels = size = 0
+        for i, count in held.items():
+            value += self.first[i] + (count - 1) * self.extra[i]
+            if i != BLANK_SLOT:
+                size += count
+                if i in VOWEL_INDICES:
+                    vowels += count
+        return value + self.imbalance * (vowels - size * 3 / RACK_SIZE) ** 2
+
+    def to_dict(self):
+        return {
+            'format': FORMAT,
+            'source': {'size': self.source_size, 'mtime_ns': self.source_mtime,
+                       'crc32': self.source_crc},
+            'scores_crc32': self.scores_crc,
+            'games': self.games,
+            'samples': self.samples,
+            'weights': {name: [round(first, 4), round(extra, 4)]
+                        for name, first, extra in zip(KIND_NAMES, self.first, self.extra)},
+            'vowel_imbalance': round(self.imbalance, 4),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('format') != FORMAT:
+            raise ValueError("not a compatible leave model")
+        pairs = [data['weights'][name] for name in KIND_NAMES]
+        weights = [first for first, _ in pairs] + [extra for _, extra in pairs]
+        source = data['source']
+        return cls(weights + [data['vowel_imbalance']], source['size'], source['mtime_ns'],
+                   source['crc32'], data['scores_crc32'], data['games'], data['samples'])
+
+    def save(self, model_path):
+        tmp_path = f"{model_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, model_path)
+
+    @classmethod
+    def load(cls, model_path):
+        with open(model_path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_leave_model(path='wordlist.txt', model_path=None, letter_scores=LETTER_SCORES,
+                      games=300, workers=None, seed=0):
+    """Fit the leave model to greedy self-play on a word list and save it"""
+    from scrabby_sim import run_games
+
+    model_path = model_path or model_path_for(path)
+    source_stat = os.stat(path)
+    results, _ = run_games(games, ['greedy', 'greedy'], workers or os.cpu_count(), seed,
+                           path, record_leaves=True, bag_counts=TRAINING_BAG)
+    counts, targets = training_samples(results)
+    model = LeaveModel(fit_weights(counts, targets), source_stat.st_size,
+                       source_stat.st_mtime_ns, source_checksum(path),
+                       scores_checksum(letter_scores), games, len(targets))
+    model.save(model_path)
+    return model
+
+
+def load_leave_model(path='wordlist.txt', model_path=None, letter_scores=LETTER_SCORES,
+                     rebuild=True, games=300, workers=None):
+    """Return the LeaveModel for a word list, refitting it if stale.
+
+    With rebuild=False a missing or stale model raises FileNotFoundError
+    instead of starting the self-play fit.
+    """
+    model_path = model_path or model_path_for(path)
+    source_stat = os.stat(path)
+    try:
+        model = LeaveModel.load(model_path)
+        if (model.scores_crc == scores_checksum(letter_scores)
+                and cache_is_fresh(model, source_stat, path)):
+            return model
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if not rebuild:
+        raise FileNotFoundError(f"no up-to-date leave model at {model_path}; "
+                                f"fit it with: python leave_model.py")
+    return build_leave_model(path, model_path, letter_scores, games, workers)
+
+
+def benchmark(path='wordlist.txt', lookups=200_000):
+    """Time leave lookups and show the best and worst 3-tile leaves"""
+    import random
+
+    model = load_leave_model(path)
+    rng = random.Random(0)
+    leaves = [rng.choices(KIND_NAMES, k=rng.randint(0, MAX_LEAVE)) for _ in range(1000)]
+    start = time.perf_counter()
+    for i in range(lookups):
+        model.value(leaves[i % len(leaves)])
+    elapsed = time.perf_counter() - start
+    print(f"fitted on {model.samples:,} leaves from {model.games} games")
+    print(f"{lookups / elapsed:,.0f} lookups/s ({elapsed / lookups * 1e6:.2f} us each)")
+    singles = sorted((model.value(name), name) for name in KIND_NAMES)
+    print("tiles: " + ', '.join(f"{name} {value:+.1f}" for value, name in singles[::-1]))
+    threes = sorted((model.value(combo), ''.join(combo))
+                    for combo in itertools.combinations_with_replacement(KIND_NAMES, 3))
+    print("best:  " + ', '.join(f"{leave} {value:+.1f}" for value, leave in threes[:-6:-1]))
+    print("worst: " + ', '.join(f"{leave} {value:+.1f}" for value, leave in threes[:5]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--games', type=int, default=300, help="self-play games to fit from")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    model = build_leave_model(args.wordlist, games=args.games, workers=args.workers,
+                              seed=args.seed)
+    print(f"{model.samples:,} leaves from {args.games} games fitted in "
+          f"{time.perf_counter() - start:.1f}s -> {model_path_for(args.wordlist)}")
+    benchmark(args.wordlist)
+
+
+if __name__ == '__main__':
+    main()
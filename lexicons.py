@@ -0,0 +1,215 @@
+"""Registry of word lists (lexicons), each loaded on first use
+
+The default lexicon is wordlist.txt; every *.txt word list in lexicons/
+(say lexicons/NWL2023.txt and lexicons/CSW21.txt) is another, named
+after its file. A lexicon's words, anagram groups and DAWG live in its
+compiled .bin file, which is memory-mapped read-only. Every process
+that loads the same lexicon, forked or spawned, maps the same page-cache
+pages, so N workers x M lexicons costs M copies of the data, not N x M.
+
+    python lexicons.py                     # list lexicons, load times and memory
+    python lexicons.py --benchmark --workers 4
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from dictionary_cache import load_dictionary
+from game_state import LETTER_SCORES, SPECIAL_SQUARES
+from movegen import MoveGenerator
+
+DEFAULT_WORDLIST = 'wordlist.txt'
+LEXICON_DIR = 'lexicons'
+
+
+def mapped_memory(path):
+    """Return (rss, pss) bytes of this process's mappings of a file, or None.
+
+    Rss counts every resident page of the mapping; Pss divides each page
+    by the number of processes sharing it, so summing Pss over processes
+    gives the memory they really use. Needs Linux /proc/self/smaps.
+    """
+    target = os.path.realpath(path)
+    rss = pss = 0
+    inside = False
+    try:
+        with open('/proc/self/smaps') as f:
+            for line in f:
+                field = line.split(None, 1)[0]
+                if not field.endswith(':'):
+                    # A mapping header: address range, perms, offset, device, inode, path
+                    parts = line.split(None, 5)
+                    inside = len(parts) == 6 and parts[5].rstrip('\n') == target
+                elif inside and field == 'Rss:':
+                    rss += int(line.split()[1]) * 1024
+                elif inside and field == 'Pss:':
+                    pss += int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return rss, pss
+
+
+class Lexicon:
+    """One word list; the dictionary and move generator are built on first use"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.load_ms = None
+        self._dictionary = None
+        self._generator = None
+
+    @property
+    def dictionary(self):
+        """The CompiledDictionary, compiling the cache first if it is stale"""
+        if self._dictionary is None:
+            start = time.perf_counter()
+            self._dictionary = load_dictionary(self.path)
+            self.load_ms = (time.perf_counter() - start) * 1000
+        return self._dictionary
+
+    @property
+    def generator(self):
+        """A MoveGenerator over this lexicon's DAWG with the standard board"""
+        if self._generator is None:
+            self._generator = MoveGenerator(self.dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+        return self._generator
+
+    @property
+    def loaded(self):
+        return self._dictionary is not None
+
+    def memory(self):
+        """Return the words, mapped bytes, load ms and resident rss/pss of a loaded lexicon"""
+        dictionary = self.dictionary
+        rss, pss = mapped_memory(dictionary.cache_path) or (None, None)
+        return {'lexicon': self.name, 'words': len(dictionary), 'mapped': dictionary.nbytes,
+                'load_ms': self.load_ms, 'rss': rss, 'pss': pss}
+
+
+class LexiconRegistry:
+    """Lexicons by name: default_path, plus every word list in folder.
+
+    Nothing is read until a lexicon is asked for. Names are matched
+    case-insensitively. Other word lists are only registered through
+    add(), never by get(): a name read from a save or a request must not
+    make the registry read (and compile beside) an arbitrary file.
+    """
+
+    def __init__(self, default_path=DEFAULT_WORDLIST, folder=LEXICON_DIR):
+        self.default = os.path.splitext(os.path.basename(default_path))[0]
+        self.lexicons = {self.default.upper(): Lexicon(self.default, default_path)}
+        for path in sorted(glob.glob(os.path.join(folder, '*.txt'))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            self.lexicons.setdefault(name.upper(), Lexicon(name, path))
+
+    def names(self):
+        return [lexicon.name for lexicon in self.lexicons.values()]
+
+    def __contains__(self, name):
+        """Whether name is registered (paths not yet asked for are not)"""
+        return name is None or (isinstance(name, str) and name.upper() in self.lexicons)
+
+    def get(self, name=None):
+        """Return the Lexicon for a name (None for the default); KeyError if unknown"""
+        if name is None:
+            name = self.default
+        if name not in self:
+            raise KeyError(f"unknown lexicon {name!r}; have {', '.join(self.names())}")
+        return self.lexicons[name.upper()]
+
+    def add(self, path):
+        """Register the word list at path under its file name and return its Lexicon"""
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"no word list at {path}")
+        name = os.path.splitext(os.path.basename(path))[0]
+        lexicon = self.lexicons.get(name.upper())
+        if lexicon is None or os.path.realpath(lexicon.path) != os.path.realpath(path):
+            lexicon = Lexicon(name, path)
+            self.lexicons[name.upper()] = lexicon
+        return lexicon
+
+    def dictionary(self, name=None):
+        return self.get(name).dictionary
+
+    def generator(self, name=None):
+        return self.get(name).generator
+
+    def report(self):
+        """Return Lexicon.memory() for every lexicon loaded so far"""
+        return [lexicon.memory() for lexicon in self.lexicons.values() if lexicon.loaded]
+
+
+def print_report(rows, label=''):
+    print(f"{label}{'lexicon':<12}{'words':>9}{'mapped MB':>11}{'load ms':>9}"
+          f"{'rss MB':>8}{'pss MB':>8}")
+    for row in rows:
+        rss = f"{row['rss'] / 1e6:8.1f}" if row['rss'] is not None else f"{'-':>8}"
+        pss = f"{row['pss'] / 1e6:8.1f}" if row['pss'] is not None else f"{'-':>8}"
+        print(f"{label}{row['lexicon']:<12}{row['words']:>9}{row['mapped'] / 1e6:>11.1f}"
+              f"{row['load_ms']:>9.1f}{rss}{pss}")
+
+
+# Per-process registry for benchmark workers
+_registry = None
+
+
+def _init_worker(default_path, folder):
+    global _registry
+    _registry = LexiconRegistry(default_path, folder)
+
+
+def _load_all(_):
+    """Load and fully page in every lexicon; return this worker's report and RSS"""
+    import resource
+
+    for name in _registry.names():
+        lexicon = _registry.get(name)
+        lexicon.dictionary.warm()
+    time.sleep(0.5)  # Let every worker map the files before Pss is read
+    return (os.getpid(), _registry.report(),
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+
+def benchmark(default_path=DEFAULT_WORDLIST, folder=LEXICON_DIR, workers=4):
+    """Load every lexicon in several spawned workers and show what each really costs"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    registry = LexiconRegistry(default_path, folder)
+    for name in registry.names():
+        registry.get(name).dictionary  # Compile stale caches once, up front
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(default_path, folder)) as executor:
+        results = list(executor.map(_load_all, range(workers)))
+    for pid, rows, peak in results:
+        print(f"worker {pid}: peak RSS {peak / 1e6:.1f} MB")
+        print_report(rows, '  ')
+    mapped = sum(row['mapped'] for row in results[0][1])
+    pss = sum(row['pss'] or 0 for _, rows, _ in results for row in rows)
+    print(f"{workers} workers x {len(results[0][1])} lexicons: {mapped / 1e6:.1f} MB mapped "
+          f"per worker, {pss / 1e6:.1f} MB proportional total")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--wordlist', default=DEFAULT_WORDLIST, help="the default lexicon")
+    parser.add_argument('--folder', default=LEXICON_DIR, help="directory of other lexicons")
+    parser.add_argument('--benchmark', action='store_true')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.wordlist, args.folder, args.workers)
+        return
+    registry = LexiconRegistry(args.wordlist, args.folder)
+    for name in registry.names():
+        registry.get(name).dictionary
+    print_report(registry.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,65 +1,140 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import argparse
+import os
 import random
-import string
 from functools import partial
-import json
 import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from word_index import find_rack_words
+from lexicons import LexiconRegistry
+from movegen import ACROSS
+from game_state import BLANK, BOARD_SIZE, LETTER_SCORES, SPECIAL_SQUARES, GameState, compile_multipliers, draw_letters
+from instrumentation import Instrumentation
+from board_view import BoardCanvas, square_colors
+from board_validator import BoardValidator
+from journal import Journal
+from query_cache import QueryCache, grid_codes, query_key
+
+
+# Rack/move analysis runs on a worker thread and keeps only the best
+# RESULT_LIMIT results; the Tk thread polls for them and inserts one page
+# at a time, adding pages (and widening the search) as the list scrolls
+FRAME_MS = 16
+ANALYSIS_POLL_MS = 10
+RESULT_LIMIT = 200
+TREE_PAGE_SIZE = 40
+# Fetch the next page once the view reaches this far down the loaded rows
+SCROLL_FETCH_AT = 0.9
+# How often idle journal records are forced to disk
+AUTOSAVE_MS = 1000
+
+# Timers shown in the status bar when instrumentation is on
+STATUS_TIMERS = ('rack_search', 'tree_insert', 'square_edit', 'load', 'save')
+# Caches whose hit ratio the status bar shows
+STATUS_CACHES = ('query_cache',)
+
 
 class ScrabbyGame:
-    def __init__(self, root):
+    def __init__(self, root, instrumentation=None, journal=None, query_cache=None,
+                 lexicons=None, lexicon=None):
         self.root = root
+        # Append-only autosave of every state change, if enabled
+        self.journal = journal
+        # Opt-in hot-path timings (SCRABBY_PROFILE=1 or --profile)
+        self.metrics = instrumentation or Instrumentation()
         self.root.title("Scrabby - Word Game")
         self.root.geometry("1200x800")
         
-        # Score and current word variables
-        self.score = 0
+        # Game state (board, rack and score) lives outside the widgets;
+        # pick up the session where the journal left off, if there is one
+        resumed = journal is not None and journal.resumed is not None
+        self.state = journal.resumed if resumed else GameState()
         self.current_word = ""
         self.selected_letter = None
         
-        # Load word list
+        # Load word list from its memory-mapped compiled cache; a resumed
+        # game keeps the lexicon it was played with unless one is given
+        self.lexicons = lexicons or LexiconRegistry()
+        self.lexicon = None
         self.valid_words = set()
+        self.dawg = None
+        self.move_generator = None
+        # Built with the lexicon's DAWG by use_lexicon
+        self.validator = None
         try:
-            with open('wordlist.txt', 'r') as f:
-                self.valid_words = set(word.strip().upper() for word in f if len(word.strip()) >= 2)
-            print(f"Loaded {len(self.valid_words)} valid words")
+            self.use_lexicon(lexicon if lexicon is not None else self.state.lexicon)
         except FileNotFoundError:
             messagebox.showerror("Error", "Scrabble word list not found. Please ensure wordlist.txt is in the same directory.")
             self.root.quit()
+        except KeyError as e:
+            messagebox.showerror("Error", str(e))
+            self.root.quit()
         
         # Board size and square size
-        self.BOARD_SIZE = 15
+        self.BOARD_SIZE = BOARD_SIZE
         self.SQUARE_SIZE = 45
         
         # Special squares configuration
-        self.special_squares = {
-            'TW': [(0,0), (0,7), (0,14), (7,0), (7,14), (14,0), (14,7), (14,14)],  # Triple Word
-            'DW': [(1,1), (2,2), (3,3), (4,4), (13,13), (12,12), (11,11), (10,10), 
-                   (1,13), (2,12), (3,11), (4,10), (13,1), (12,2), (11,3), (10,4)],  # Double Word
-            'TL': [(1,5), (1,9), (5,1), (5,5), (5,9), (5,13), (9,1), (9,5), (9,9), (9,13), (13,5), (13,9)],  # Triple Letter
-            'DL': [(0,3), (0,11), (2,6), (2,8), (3,0), (3,7), (3,14), (6,2), (6,6), (6,8), (6,12),
-                   (7,3), (7,11), (8,2), (8,6), (8,8), (8,12), (11,0), (11,7), (11,14), (12,6), (12,8), (14,3), (14,11)]  # Double Letter
-        }
-        
-        # Letter scores (simplified version)
-        self.letter_scores = {letter: 1 for letter in string.ascii_uppercase}
-        for letter in 'AEILNORSTU':
-            self.letter_scores[letter] = 1
-        for letter in 'DG':
-            self.letter_scores[letter] = 2
-        for letter in 'BCMP':
-            self.letter_scores[letter] = 3
-        for letter in 'FHVWY':
-            self.letter_scores[letter] = 4
-        for letter in 'K':
-            self.letter_scores[letter] = 5
-        for letter in 'JX':
-            self.letter_scores[letter] = 8
-        for letter in 'QZ':
-            self.letter_scores[letter] = 10
+        self.special_squares = SPECIAL_SQUARES
+        self.letter_mult, self.word_mult = compile_multipliers(self.special_squares, self.BOARD_SIZE)
+
+        self.letter_scores = dict(LETTER_SCORES)
+
+        # Memoized analysis results, keyed on board hash and sorted rack and
+        # namespaced by the lexicon's CRC32
+        self.query_cache = query_cache
+        if self.query_cache is None:
+            self.query_cache = QueryCache()
+
+        # Background analysis state; only the newest generation is applied
+        self.analysis_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scrabby-analysis')
+        self.analysis_future = None
+        self.analysis_generation = 0
+        self.last_analysis_stats = {}
+
+        # Results of the current query; only rows_shown of them are in the Treeview
+        self.result_rows = []
+        self.rows_shown = 0
+        self.result_query = None
+        self.result_limit = RESULT_LIMIT
+        self.results_truncated = False
+
+        # UI heartbeat: how late each FRAME_MS tick fires is the input lag
+        self.ui_lag_samples = deque(maxlen=256)
+        self._heartbeat_due = None
 
         self.setup_ui()
-        self.generate_new_letters()
+        if resumed:
+            self.render_board()
+            self.render_rack()
+            self.score_label.config(text=str(self.state.score))
+            self.update_best_word()
+        else:
+            self.generate_new_letters()
+        self._heartbeat()
+        self._autosave()
+
+    def use_lexicon(self, name=None):
+        """Play with a word list from the registry (None: the default), loading it on first use"""
+        lexicon = self.lexicons.get(name)
+        with self.metrics.timer('dictionary_load'):
+            self.valid_words = lexicon.dictionary
+        self.dawg = self.valid_words.dawg
+        # Words on the board, re-checked a row and column at a time as squares change
+        self.validator = BoardValidator(self.dawg, self.state.board)
+        # Board-aware move generator for the "Possible Words" list
+        self.move_generator = lexicon.generator
+        self.lexicon = lexicon
+        self.root.title(f"Scrabby - Word Game ({lexicon.name})")
+        print(f"Loaded {len(self.valid_words)} valid words from {lexicon.name}")
+        # Saves and the journal name the lexicon unless it is the default
+        saved_name = None if lexicon.name == self.lexicons.default else lexicon.name
+        if self.state.lexicon != saved_name:
+            self.state.lexicon = saved_name
+            self.record({'t': 'lexicon', 'lexicon': saved_name})
 
     def setup_ui(self):
         # Main frame
@@ -111,24 +186,26 @@ class ScrabbyGame:
         # Create Treeview
         self.word_tree = ttk.Treeview(
             tree_frame,
-            columns=('word', 'score'),
+            columns=('word', 'score', 'position'),
             show='headings',
             height=8
         )
         self.word_tree.heading('word', text='Word')
         self.word_tree.heading('score', text='Score')
         self.word_tree.column('word', width=100)
+        self.word_tree.heading('position', text='Position')
         self.word_tree.column('score', width=50)
+        self.word_tree.column('position', width=80)
         self.word_tree.grid(row=0, column=0, sticky='nsew')
 
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(
+        # Add scrollbar; scrolling near the end pages in more rows
+        self.tree_scrollbar = ttk.Scrollbar(
             tree_frame,
             orient='vertical',
             command=self.word_tree.yview
         )
-        scrollbar.grid(row=0, column=1, sticky='ns')
-        self.word_tree.configure(yscrollcommand=scrollbar.set)
+        self.tree_scrollbar.grid(row=0, column=1, sticky='ns')
+        self.word_tree.configure(yscrollcommand=self._on_tree_scroll)
 
         # Legend frame
         legend_frame = ttk.LabelFrame(self.left_panel, text="Special Squares", padding="10")
@@ -199,64 +276,13 @@ class ScrabbyGame:
         self.board_frame = ttk.Frame(self.main_frame)
         self.board_frame.grid(row=0, column=1, padx=10, sticky="nsew")
         
-        # Create the board
-        self.board_squares = []
-        for i in range(self.BOARD_SIZE):
-            row = []
-            for j in range(self.BOARD_SIZE):
-                square_frame = tk.Frame(
-                    self.board_frame,
-                    width=self.SQUARE_SIZE,
-                    height=self.SQUARE_SIZE,
-                    relief="raised",
-                    borderwidth=1
-                )
-                square_frame.grid(row=i, column=j, padx=1, pady=1)
-                square_frame.grid_propagate(False)
-                
-                # Add background for special squares
-                bg_color = self.get_square_color(i, j)
-                square_frame.configure(bg=bg_color)
-                
-                # Create a StringVar to store the entry's value
-                var = tk.StringVar()
-                var.trace('w', lambda *args, v=var, r=i, c=j: self.on_square_edit(v, r, c))
-                
-                # Create the entry widget
-                entry = tk.Entry(
-                    square_frame,
-                    width=2,
-                    font=('Helvetica', 16, 'bold'),
-                    justify='center',
-                    bg=bg_color,
-                    textvariable=var,
-                    relief='flat',
-                    highlightthickness=0
-                )
-                entry.place(relx=0.5, rely=0.35, anchor="center")
-                
-                # Bind event to force uppercase
-                entry.bind('<KeyRelease>', lambda e, v=var: self.force_uppercase(v))
-                
-                # Create score label
-                score_label = tk.Label(
-                    square_frame,
-                    text="",
-                    font=('Helvetica', 9),
-                    bg=bg_color,
-                    fg='#444444'
-                )
-                score_label.place(relx=0.5, rely=0.75, anchor="center")
-                
-                # Store both the frame and entry widget
-                row.append({
-                    'frame': square_frame,
-                    'entry': entry,
-                    'score_label': score_label,
-                    'var': var,
-                    'letter': None
-                })
-            self.board_squares.append(row)
+        # The whole board is one Canvas; keystrokes go to its cursor square
+        self.board_view = BoardCanvas(self.board_frame,
+                                      square_colors(self.letter_mult, self.word_mult),
+                                      self.letter_scores, self.on_square_edit,
+                                      self.BOARD_SIZE, self.SQUARE_SIZE)
+        self.board_view.grid(row=0, column=0)
+        self.board_view.set_cursor(self.BOARD_SIZE // 2, self.BOARD_SIZE // 2)
 
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
@@ -264,47 +290,16 @@ class ScrabbyGame:
         self.main_frame.columnconfigure(1, weight=3)
         self.main_frame.columnconfigure(0, weight=1)
 
-    def get_square_color(self, row, col):
-        pos = (row, col)
-        if pos in self.special_squares['TW']:
-            return "#ff9999"  # Red for Triple Word
-        elif pos in self.special_squares['DW']:
-            return "#ffb366"  # Pink for Double Word
-        elif pos in self.special_squares['TL']:
-            return "#99ff99"  # Green for Triple Letter
-        elif pos in self.special_squares['DL']:
-            return "#99ccff"  # Blue for Double Letter
-        return "#f8f9fa"  # Default color
-
-    def force_uppercase(self, var):
-        """Force the entry content to be uppercase"""
-        current = var.get()
-        if current != current.upper():
-            var.set(current.upper())
+        # Status bar with rolling p50/p95 timings, only when instrumented
+        self.status_var = None
+        if self.metrics.enabled:
+            self.status_var = tk.StringVar(value="Instrumentation on")
+            status_bar = ttk.Label(self.root, textvariable=self.status_var,
+                                   relief='sunken', anchor='w', font=('Helvetica', 9))
+            status_bar.grid(row=1, column=0, sticky="ew")
 
     def save_game(self):
         """Save the current game state to a JSON file"""
-        # Create game state dictionary
-        game_state = {
-            'score': self.score,
-            'board_state': {},
-            'rack_letters': []
-        }
-
-        # Save board state
-        for row in range(self.BOARD_SIZE):
-            for col in range(self.BOARD_SIZE):
-                letter = self.board_squares[row][col]['var'].get()
-                if letter:
-                    game_state['board_state'][f"{row},{col}"] = letter
-
-        # Save rack letters
-        for widget in self.tiles_frame.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                entry = widget.grid_slaves(row=0, column=0)[0]
-                letter = entry.get()
-                game_state['rack_letters'].append(letter)
-
         # Ask user where to save the file
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
@@ -314,9 +309,9 @@ class ScrabbyGame:
         
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    # Save in a pretty-printed, human-readable format
-                    json.dump(game_state, f, indent=4)
+                with self.metrics.timer('save'):
+                    self.state.save(filename)
+                self.update_status()
                 messagebox.showinfo("Success", "Game saved successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save game: {str(e)}")
@@ -331,62 +326,71 @@ class ScrabbyGame:
         if not filename:
             return
 
-        try:
-            with open(filename, 'r') as f:
-                game_state = json.load(f)
-
-            # Clear current game state
-            self.clear_board()
-            self.clear_rack()
-            
-            # Restore score
-            self.score = game_state['score']
-            self.score_label.config(text=str(self.score))
-            
-            # Restore board state
-            for pos, letter in game_state['board_state'].items():
-                row, col = map(int, pos.split(','))
-                self.board_squares[row][col]['var'].set(letter)
-                self.board_squares[row][col]['letter'] = letter
-                self.board_squares[row][col]['score_label'].config(text=str(self.letter_scores[letter]))
-            
-            # Restore rack letters
-            self.letter_vars = []
-            for i, letter in enumerate(game_state['rack_letters']):
-                score = self.letter_scores[letter]
-                letter_var = tk.StringVar(value=letter)
-                self.letter_vars.append(letter_var)
-                
-                tile_frame = ttk.Frame(self.tiles_frame)
-                tile_frame.grid(row=0, column=i, padx=2)
-
-                entry = ttk.Entry(
-                    tile_frame,
-                    textvariable=letter_var,
-                    width=2,
-                    justify='center',
-                    font=('Helvetica', 14, 'bold')
-                )
-                entry.grid(row=0, column=0)
-
-                score_label = ttk.Label(
-                    tile_frame,
-                    text=str(score),
-                    font=('Helvetica', 10)
-                )
-                score_label.grid(row=1, column=0)
-                
-            # messagebox.showinfo("Success", "Game loaded successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load game: {str(e)}")
+        with self.metrics.timer('load'):
+            try:
+                state = GameState.load(filename)
+                # The save's lexicon has to be available before it replaces this game
+                self.lexicons.get(state.lexicon).dictionary
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load game: {str(e)}")
+                return
+
+            self.state = state
+            self.use_lexicon(state.lexicon)
+            self.record({'t': 'state', 'state': state.to_dict()})
+            self.render_board()
+            self.render_rack()
+            self.score_label.config(text=str(self.state.score))
+        self.update_best_word()
+
+    def render_board(self):
+        """Make the board view show the letters held in the game state"""
+        self.board_view.render(self.state.board)
+        if self.validator is None:
+            return  # No lexicon loaded to check the words against
+        self.validator.reset(self.state.board)
+        for i, count in enumerate(self.validator.bad):
+            self.board_view.mark_invalid(i, count)
+
+    def render_rack(self):
+        """Rebuild the rack tiles from the letters held in the game state"""
+        self.clear_rack()
+        self.letter_vars = []
+        self.rack_score_labels = []
+        for i, letter in enumerate(self.state.rack):
+            # Create frame for letter and score
+            tile_frame = ttk.Frame(self.tiles_frame)
+            tile_frame.grid(row=0, column=i, padx=2)
+
+            # Create StringVar for the letter
+            letter_var = tk.StringVar(value=letter)
+            self.letter_vars.append(letter_var)
+            letter_var.trace('w', lambda *args, var=letter_var, index=i: self.on_rack_letter_change(var, index))
+
+            # Create entry for letter
+            entry = ttk.Entry(
+                tile_frame,
+                textvariable=letter_var,
+                width=2,
+                justify='center',
+                font=('Helvetica', 14, 'bold')
+            )
+            entry.grid(row=0, column=0)
+
+            # Create label for score
+            score_label = ttk.Label(
+                tile_frame,
+                text=str(self.letter_scores.get(letter, 0)),
+                font=('Helvetica', 10)
+            )
+            score_label.grid(row=1, column=0)
+            self.rack_score_labels.append(score_label)
 
     def clear_board(self):
         """Clear all letters from the board"""
-        for row in self.board_squares:
-            for square in row:
-                square['var'].set('')
-                square['letter'] = None
-                square['score_label'].config(text="")
+        self.state.clear_board()
+        self.record({'t': 'clear'})
+        self.render_board()
 
     def clear_rack(self):
         """Clear all letters from the rack"""
@@ -397,103 +401,37 @@ class ScrabbyGame:
         """Calculate the score for a word, including special square multipliers"""
         if not word:
             return 0
-            
-        # First find all letters on the board
-        letters_with_positions = []
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                letter = self.board_squares[i][j]['var'].get()
-                if letter:
-                    letters_with_positions.append((letter, i, j))
-        
-        if not letters_with_positions:
-            return 0
-            
-        # Calculate base score with letter multipliers
-        base_score = 0
-        word_multiplier = 1
-        
-        for letter, row, col in letters_with_positions:
-            letter_score = self.letter_scores[letter]
-            pos = (row, col)
-            
-            # Apply letter multipliers
-            if pos in self.special_squares['TL']:
-                letter_score *= 3
-            elif pos in self.special_squares['DL']:
-                letter_score *= 2
-                
-            base_score += letter_score
-            
-            # Track word multipliers
-            if pos in self.special_squares['TW']:
-                word_multiplier *= 3
-            elif pos in self.special_squares['DW']:
-                word_multiplier *= 2
-        
-        # Apply word multipliers
-        final_score = base_score * word_multiplier
-        
-        return final_score
-
-    def on_square_edit(self, var, row, col):
-        """Handle editing of a square's content"""
-        value = var.get().upper()
-        square = self.board_squares[row][col]
-        
-        # If the value is empty, clear the square
-        if not value:
-            square['letter'] = None
-            square['score_label'].config(text="")
-            return
-            
-        # Only allow single letters
-        if len(value) > 1:
-            # Keep only the first letter
-            value = value[0].upper()
-            var.set(value)
-            
-        # Ensure it's a letter
-        if not value.isalpha():
-            var.set('')
-            square['score_label'].config(text="")
-            return
-            
-        # Update the square's letter and score
-        square['letter'] = value
-        square['score_label'].config(text=str(self.letter_scores[value]))
+        return self.state.word_score(self.letter_scores, self.letter_mult, self.word_mult)
+
+    def on_square_edit(self, row, col, value):
+        """Handle a letter typed on (or cleared from) a board square"""
+        with self.metrics.timer('square_edit'):
+            value = value[:1].upper()
+            # Only letters go on the board; anything else empties the square
+            value = value if value.isalpha() else ''
+            self.state.set(row, col, value)
+            self.record({'t': 'place', 'tiles': [[row, col, value]]})
+            i = row * self.BOARD_SIZE + col
+            self.board_view.draw_cell(i, self.state.board[i])
+            if self.validator is not None:
+                for cell in self.validator.set(row, col, self.state.board[i]):
+                    self.board_view.mark_invalid(cell, self.validator.bad[cell])
 
     def add_letter(self, letter):
         """When a rack letter is clicked, find the first empty square and place the letter there"""
-        letter = letter.upper()  # Ensure uppercase
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                square = self.board_squares[i][j]
-                if not square['var'].get():
-                    square['var'].set(letter)
-                    square['letter'] = letter
-                    square['score_label'].config(text=str(self.letter_scores[letter]))
-                    return
+        pos = self.state.first_empty()
+        if pos is not None:
+            row, col = pos
+            self.on_square_edit(row, col, letter)
 
     def clear_word(self):
         """Clear all squares on the board"""
         self.current_word = ""
-        # Clear the board
-        for row in self.board_squares:
-            for square in row:
-                square['var'].set('')
-                square['letter'] = None
-                square['score_label'].config(text="")
+        self.clear_board()
 
     def get_current_word(self):
         """Get all letters on the board as a word"""
-        word = ""
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                letter = self.board_squares[i][j]['var'].get()
-                if letter:
-                    word += letter
-        return word
+        return self.state.current_word()
 
     def submit_word(self):
         """Submit the current word on the board"""
@@ -501,151 +439,256 @@ class ScrabbyGame:
         if len(word) >= 2:
             # Calculate score for the word
             word_score = self.calculate_word_score(word)
-            self.score += word_score
-            self.score_label.config(text=str(self.score))
+            self.state.score += word_score
+            self.record({'t': 'move', 'score': word_score,
+                         'tiles': [[row, col, letter] for letter, row, col in self.state.letters()]})
+            self.score_label.config(text=str(self.state.score))
             self.clear_word()
             self.generate_new_letters()
 
     def generate_new_letters(self):
-        # Clear existing tiles
-        for widget in self.tiles_frame.winfo_children():
-            widget.destroy()
-
         # Generate 7 random letters (already uppercase)
-        vowels = 'AEIOU'
-        consonants = 'BCDFGHJKLMNPQRSTVWXYZ'
-        letters = random.choices(vowels, k=3) + random.choices(consonants, k=4)
-        random.shuffle(letters)
+        self.state.rack = draw_letters(random)
+        self.record({'t': 'rack', 'rack': self.state.rack})
+        self.render_rack()
 
-        # Create letter tiles
-        self.letter_vars = []
-        for i, letter in enumerate(letters):
-            # Create frame for letter and score
-            tile_frame = ttk.Frame(self.tiles_frame)
-            tile_frame.grid(row=0, column=i, padx=2)
-
-            # Create StringVar for the letter
-            letter_var = tk.StringVar(value=letter)
-            self.letter_vars.append(letter_var)
-            letter_var.trace('w', lambda *args, var=letter_var: self.on_rack_letter_change(var))
-
-            # Create entry for letter
-            entry = ttk.Entry(
-                tile_frame,
-                textvariable=letter_var,
-                width=2,
-                justify='center',
-                font=('Helvetica', 14, 'bold')
-            )
-            entry.grid(row=0, column=0)
-
-            # Create label for score
-            score_label = ttk.Label(
-                tile_frame,
-                text=str(self.letter_scores.get(letter, 0)),
-                font=('Helvetica', 10)
-            )
-            score_label.grid(row=1, column=0)
-
-    def on_rack_letter_change(self, var):
+    def on_rack_letter_change(self, var, index):
         """Handle changes to rack letters"""
         value = var.get().upper()
         if len(value) > 1:
             var.set(value[-1])  # Keep only the last character
             return
         
-        if value and not value.isalpha():
-            var.set('')  # Clear non-letter characters
+        if value and not (value.isalpha() or value == BLANK):
+            var.set('')  # Clear anything but letters and blanks
             return
 
         var.set(value.upper())
-        
-        # Update score label if it exists
-        for widget in self.tiles_frame.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                entry = widget.grid_slaves(row=0, column=0)[0]
-                if entry.cget('textvariable') == str(var):
-                    score_label = widget.grid_slaves(row=1, column=0)[0]
-                    score_label.config(text=str(self.letter_scores.get(value, 0)))
+        self.state.rack[index] = value
+        self.record({'t': 'rack', 'rack': self.state.rack})
+        self.rack_score_labels[index].config(text=str(self.letter_scores.get(value, 0)))
         
         # Update best possible word
         self.update_best_word()
 
     def update_best_word(self):
-        """Calculate and display all possible words from rack letters"""
-        # Get current rack letters
-        rack_letters = []
-        for widget in self.tiles_frame.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                entry = widget.grid_slaves(row=0, column=0)[0]
-                letter = entry.get().upper()
-                if letter:
-                    rack_letters.append(letter)
+        """Start a background search for possible words or board moves from rack letters"""
+        rack_letters = [letter for letter in self.state.rack if letter]
 
-        # Clear existing items
-        for item in self.word_tree.get_children():
-            self.word_tree.delete(item)
+        # Clear existing items in one call
+        self.word_tree.delete(*self.word_tree.get_children())
+        self.result_rows = []
+        self.rows_shown = 0
+        self.result_limit = RESULT_LIMIT
+        self.results_truncated = False
+        self.result_query = None
 
         if not rack_letters:
+            # Still supersede any query queued or running
+            self._submit_analysis(None)
             return
 
-        # Create a letter frequency map for our rack
-        letter_freq = {}
-        for letter in rack_letters:
-            letter_freq[letter] = letter_freq.get(letter, 0) + 1
-
-        # Find all possible words and their scores
-        possible_words = []
-        
-        # Check each word in our dictionary
-        for word in self.valid_words:
-            # Skip words longer than our rack
-            if len(word) > len(rack_letters):
-                continue
-                
-            # Check if we can make this word with our letters
-            word_freq = {}
-            for letter in word:
-                word_freq[letter] = word_freq.get(letter, 0) + 1
-                
-            can_make_word = True
-            for letter, count in word_freq.items():
-                if letter not in letter_freq or letter_freq[letter] < count:
-                    can_make_word = False
-                    break
-                    
-            if can_make_word:
-                score = sum(self.letter_scores[letter] for letter in word)
-                possible_words.append((word, score))
-
-        # Sort by score (descending)
-        possible_words.sort(key=lambda x: (-x[1], x[0]))
-
-        # Update display
-        for word, score in possible_words:
-            self.word_tree.insert('', 'end', values=(word, score))
+        self.ui_lag_samples.clear()
+        self.result_query = (self.state.grid(), rack_letters)
+        self._submit_analysis(self.result_query)
+
+    def _submit_analysis(self, query):
+        """Supersede any running query, then search query=(board, rack) in the background"""
+        self.analysis_generation += 1
+        if self.analysis_future is not None:
+            self.analysis_future.cancel()
+            self.analysis_future = None
+        if query is None:
+            return
+        board, rack_letters = query
+        self.analysis_future = self.analysis_executor.submit(
+            self.analyze_rack, board, rack_letters, self.result_limit)
+        self.root.after(ANALYSIS_POLL_MS, self._poll_analysis,
+                        self.analysis_future, self.analysis_generation, time.perf_counter())
+
+    def analyze_rack(self, board, rack_letters, limit=None):
+        """Return ((word, score, position) rows, compute ms, search counts).
+
+        Safe to run off the Tk thread. With limit only the best limit rows
+        are kept. The counts dict holds how many partial words the search
+        examined and how many results matched in total, and 'cached' when
+        the rows came from the query cache.
+        """
+        start = time.perf_counter()
+        # Read once: the lexicon may be switched while this runs
+        lexicon = self.lexicon
+        namespace = lexicon.dictionary.source_crc
+        key = query_key('rows', grid_codes(board), rack_letters, limit)
+        cached = self.query_cache.get(key, namespace)
+        if cached is not None:
+            rows, counts = cached
+            counts = dict(counts, cached=True)
+            return [tuple(row) for row in rows], (time.perf_counter() - start) * 1000, counts
+        rows = []
+        counts = {}
+        with self.metrics.worker_profile():
+            if any(any(row) for row in board):
+                # Rank every legal placement that hooks onto the board tiles
+                for move in lexicon.generator.generate(board, rack_letters, counts, limit):
+                    arrow = '\u2192' if move.direction == ACROSS else '\u2193'
+                    rows.append((move.word, move.score, f"{move.row},{move.col} {arrow}"))
+            else:
+                # Walk the DAWG, following only edges the rack letters allow
+                for word, score in find_rack_words(lexicon.dictionary.dawg, rack_letters,
+                                                   self.letter_scores,
+                                                   counts, limit):
+                    rows.append((word, score, ''))
+        self.query_cache.put(key, [rows, counts], namespace)
+        return rows, (time.perf_counter() - start) * 1000, counts
+
+    def _poll_analysis(self, future, generation, submitted):
+        """Apply a finished analysis on the Tk thread, unless a newer one replaced it"""
+        if generation != self.analysis_generation or future.cancelled():
+            return
+        if not future.done():
+            self.root.after(ANALYSIS_POLL_MS, self._poll_analysis, future, generation, submitted)
+            return
+        self.analysis_future = None
+        try:
+            rows, compute_ms, counts = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Word search failed: {str(e)}")
+            return
+        self.last_analysis_stats = {'rows': len(rows), 'compute_ms': compute_ms, 'insert_ms': 0.0}
+        self.last_analysis_stats.update(counts)
+        self.metrics.record('rack_search', compute_ms)
+        self.metrics.count('queries')
+        self.metrics.count('query_cache_hits' if counts.get('cached') else 'query_cache_misses')
+        self.metrics.count('words_examined', counts.get('examined', 0))
+        self.metrics.count('words_matched', counts.get('matched', 0))
+
+        # A wider search returns the same best rows first, so rows already
+        # in the Treeview stay and only later pages are added
+        self.result_rows = rows
+        self.results_truncated = counts.get('matched', len(rows)) > len(rows)
+        self._append_page()
+        self.last_analysis_stats['total_ms'] = (time.perf_counter() - submitted) * 1000
+        self.last_analysis_stats['max_ui_lag_ms'] = max(self.ui_lag_samples, default=0.0)
+        self.metrics.record('tree_insert', self.last_analysis_stats['insert_ms'])
+        self.update_status()
+
+    def _append_page(self):
+        """Insert the next TREE_PAGE_SIZE result rows into the Treeview"""
+        start = time.perf_counter()
+        page = self.result_rows[self.rows_shown:self.rows_shown + TREE_PAGE_SIZE]
+        for word, score, position in page:
+            self.word_tree.insert('', 'end', values=(word, score, position))
+        self.rows_shown += len(page)
+        self.last_analysis_stats['insert_ms'] = (self.last_analysis_stats.get('insert_ms', 0.0)
+                                                 + (time.perf_counter() - start) * 1000)
+
+    def _on_tree_scroll(self, first, last):
+        """Track the Treeview scroll position and page in rows near the end"""
+        self.tree_scrollbar.set(first, last)
+        if float(last) >= SCROLL_FETCH_AT:
+            self.root.after_idle(self._fetch_more)
+
+    def _fetch_more(self):
+        """Show the next page of results, widening a truncated search if needed"""
+        if self.rows_shown < len(self.result_rows):
+            self._append_page()
+        elif (self.results_truncated and self.analysis_future is None
+                and self.result_query is not None):
+            self.result_limit *= 2
+            self._submit_analysis(self.result_query)
+
+    def update_status(self):
+        """Show rolling p50/p95 timings and the last query's counts in the status bar"""
+        if self.status_var is None:
+            return
+        text = self.metrics.summary(STATUS_TIMERS, STATUS_CACHES)
+        stats = self.last_analysis_stats
+        if 'examined' in stats:
+            text += f"   last query: {stats['examined']} examined, {stats['matched']} matched"
+            if stats.get('cached'):
+                text += " (cached)"
+        self.status_var.set(text)
+
+    def _heartbeat(self):
+        """Record how late the Tk event loop services a FRAME_MS timer"""
+        now = time.perf_counter()
+        if self._heartbeat_due is not None:
+            self.ui_lag_samples.append(max(0.0, (now - self._heartbeat_due) * 1000))
+        self._heartbeat_due = now + FRAME_MS / 1000
+        self.root.after(FRAME_MS, self._heartbeat)
 
     def is_valid_word(self, word):
         """Check if a word is valid using the loaded word list"""
-        return word.upper() in self.valid_words
+        return self.dawg.contains(word)
+
+    def record(self, event):
+        """Append a state change to the journal, if there is one"""
+        if self.journal is not None:
+            self.journal.append(event, self.state)
+
+    def _autosave(self):
+        """Force idle journal records to disk every AUTOSAVE_MS"""
+        if self.journal is not None:
+            if self.journal.unsynced:
+                self.journal.sync()
+            self.root.after(AUTOSAVE_MS, self._autosave)
 
     def clear_game(self):
         """Reset the entire game state"""
+        self.record({'t': 'reset'})
         # Clear the board
         self.clear_board()
         # Clear the rack
         self.clear_rack()
         # Reset score
-        self.score = 0
+        self.state.score = 0
         self.score_label.config(text="0")
         # Generate new letters
         self.generate_new_letters()
         self.update_best_word()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrabby word game")
+    parser.add_argument('--profile', action='store_true',
+                        help="time hot paths and show p50/p95 in a status bar")
+    parser.add_argument('--profile-dump', metavar='PATH',
+                        help="also write a cProfile/pstats file for the session")
+    parser.add_argument('--journal', default='scrabby_journal.jsonl',
+                        help="autosave journal to resume from and append to")
+    parser.add_argument('--no-journal', action='store_true', help="don't autosave")
+    parser.add_argument('--new-game', action='store_true',
+                        help="start a fresh journal instead of resuming")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="also keep analysis results in this sqlite file across sessions")
+    parser.add_argument('--lexicon',
+                        help="word list to play with: a name from lexicons/ or a file path")
+    args = parser.parse_args(argv)
+    metrics = Instrumentation.from_environment(args.profile, args.profile_dump)
+
+    journal = None
+    if not args.no_journal:
+        if args.new_game and os.path.exists(args.journal):
+            os.remove(args.journal)
+        journal = Journal(args.journal)
+
+    query_cache = QueryCache(path=args.cache) if args.cache else None
+
+    # Only the command line may name a word list by path; saves name registered lexicons
+    lexicons = LexiconRegistry()
+    lexicon = args.lexicon
+    if lexicon is not None and lexicon not in lexicons and os.path.isfile(lexicon):
+        lexicon = lexicons.add(lexicon).name
+
     root = tk.Tk()
-    app = ScrabbyGame(root)
+    app = ScrabbyGame(root, metrics, journal, query_cache, lexicons, lexicon)
     root.mainloop()
+    app.analysis_executor.shutdown(wait=False, cancel_futures=True)
+    if journal is not None:
+        journal.close()
+    app.query_cache.close()
+    dump_path = metrics.close()
+    if dump_path:
+        print(f"Profile written to {dump_path} (python -m pstats {dump_path})")
 
 if __name__ == "__main__":
     main()
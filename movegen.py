@@ -0,0 +1,470 @@
+"""Full-board move generator (Appel-Jacobson style) over the DAWG"""
+
+import time
+from collections import namedtuple
+
+from dawg import BLANK_INDEX, CHILD_SHIFT, LAST, LETTER_MASK, TERMINAL, ALPHABET
+from game_state import BLANK, RACK_SIZE, compile_multipliers
+from topk import TopK
+
+ACROSS = 'across'
+DOWN = 'down'
+BINGO_BONUS = 50
+ALL_LETTERS = (1 << 26) - 1
+# How a blank playing each letter is written
+BLANK_LETTERS = ALPHABET.lower()
+# Cross-checks remembered per generator before the memo is cleared
+CROSS_CHECK_MEMO = 1 << 16
+
+# row/col is the first square of the full word (existing tiles included);
+# tiles lists only the newly placed (row, col, letter) triples. Letters
+# played by blanks are lowercase in both word and tiles.
+Move = namedtuple('Move', 'row col direction word score tiles')
+
+
+def move_order(move):
+    """Sort key for moves: highest score first, then word and position"""
+    return (-move.score, move.word, move.row, move.col, move.direction)
+
+
+class MoveGenerator:
+    """Finds every legal placement of rack tiles on a board.
+
+    Words must hook onto existing tiles (or cover the centre square on an
+    empty board) and every perpendicular word they form must be valid.
+    Moves are scored with the board's premium squares, cross-words and the
+    bingo bonus.
+    """
+
+    def __init__(self, dawg, letter_scores, special_squares, board_size=15):
+        self.dawg = dawg
+        self.edges = dawg.edges
+        self.size = board_size
+        self.letter_values = [letter_scores[letter] for letter in ALPHABET]
+        self.letter_mult, self.word_mult = compile_multipliers(special_squares, board_size)
+        # (letters above, letters below) a square -> (letter mask, tile sum)
+        self.cross_memo = {}
+
+    def generate(self, board, rack_letters, stats=None, limit=None):
+        """Return every legal move for the rack, highest score first.
+
+        board is a board_size x board_size grid of letters, with '' or None
+        for empty squares. Blanks ('?') on the rack stand in for any letter
+        the rack has run out of, in the same traversal; each placement is
+        returned once, with its blanks (lowercase) on the tiles where they
+        cost the fewest points.
+        With limit, moves stream into a bounded TopK and
+        only the best limit are returned; once it is full, words whose score
+        bound can't beat the worst kept move are not scored. If stats is a
+        dict, 'examined' (partial words extended), 'matched' (legal moves,
+        the same whatever the limit) and 'pruned' (moves left unscored) are
+        added to it.
+        """
+        grid = [[(letter or '').upper() for letter in row] for row in board]
+        counts = [0] * 27
+        for letter in rack_letters:
+            if letter:
+                counts[BLANK_INDEX if letter == BLANK else ord(letter.upper()) - 65] += 1
+
+        moves = [] if limit is None else TopK(limit, move_order)
+        transposed = [list(column) for column in zip(*grid)]
+        examined, pruned = self._generate_lines(grid, transposed, counts, ACROSS, moves)
+        down_examined, down_pruned = self._generate_lines(transposed, grid, counts, DOWN, moves)
+        if stats is not None:
+            stats['examined'] = stats.get('examined', 0) + examined + down_examined
+            stats['matched'] = stats.get('matched', 0) + pruned + down_pruned + (
+                len(moves) if limit is None else moves.seen)
+            stats['pruned'] = stats.get('pruned', 0) + pruned + down_pruned
+        if limit is not None:
+            return moves.sorted()
+        moves.sort(key=move_order)
+        return moves
+
+    def _generate_lines(self, lines, cross_lines, counts, direction, moves):
+        """Generate moves along each line of a (possibly transposed) grid.
+
+        Returns how many partial words were extended and how many moves
+        were left unscored.
+        """
+        examined = pruned = 0
+        board_empty = not any(any(line) for line in lines)
+        for index, line in enumerate(lines):
+            checks, cross_sums = self._cross_checks(index, line, cross_lines)
+            search = self._search_line(index, line, checks, cross_sums, counts, direction,
+                                       moves, board_empty)
+            examined += search.examined
+            pruned += search.pruned
+        return examined, pruned
+
+    def _search_line(self, index, line, checks, cross_sums, counts, direction, moves,
+                     board_empty=False):
+        """Append the moves along one line to moves; returns the finished _LineSearch"""
+        size = self.size
+        if board_empty:
+            anchors = [size // 2] if index == size // 2 else []
+        else:
+            anchors = [i for i in range(size) if not line[i] and (
+                (i > 0 and line[i - 1]) or (i < size - 1 and line[i + 1])
+                or cross_sums[i] is not None)]
+        generator = _LineSearch(self, index, line, checks, cross_sums,
+                                counts, direction, moves)
+        previous_anchor = -1
+        for anchor in anchors:
+            limit = anchor - previous_anchor - 1
+            previous_anchor = anchor
+            if anchor > 0 and line[anchor - 1]:
+                # Left part is fixed: the tiles already on the board
+                start = anchor
+                while start > 0 and line[start - 1]:
+                    start -= 1
+                node = 0
+                for letter in line[start:anchor]:
+                    edge = self._edge(node, letter)
+                    node = edge >> CHILD_SHIFT if edge is not None else 0
+                    if not node:
+                        break
+                if node:
+                    generator.extend_right(''.join(line[start:anchor]), node, anchor, anchor)
+            else:
+                # Left part comes from the rack, over the empty non-anchor
+                # squares back to the previous anchor
+                generator.left_part('', 0, limit, anchor)
+        return generator
+
+    def _edge(self, node, letter):
+        """Return the edge leaving node for letter, or None"""
+        edges = self.edges
+        letter_index = ord(letter) - 65
+        i = node
+        while True:
+            edge = edges[i]
+            if edge & LETTER_MASK == letter_index:
+                return edge
+            if edge & LAST:
+                return None
+            i += 1
+
+    def _cross_checks(self, index, line, cross_lines):
+        """Return (letter masks, perpendicular tile sums) for a line's squares.
+
+        cross_sums[i] is None when square i has no perpendicular neighbours,
+        i.e. placing a tile there forms no cross-word.
+        """
+        size = self.size
+        checks = [0] * size
+        cross_sums = [None] * size
+        memo = self.cross_memo
+        if len(memo) > CROSS_CHECK_MEMO:
+            memo.clear()
+        for i in range(size):
+            if line[i]:
+                continue
+            cross = cross_lines[i]
+            start = index
+            while start > 0 and cross[start - 1]:
+                start -= 1
+            end = index
+            while end < size - 1 and cross[end + 1]:
+                end += 1
+            if start == index and end == index:
+                checks[i] = ALL_LETTERS
+                continue
+            before = ''.join(cross[start:index])
+            after = ''.join(cross[index + 1:end + 1])
+            known = memo.get((before, after))
+            if known is None:
+                known = memo[before, after] = self._cross_check(before, after)
+            checks[i], cross_sums[i] = known
+        return checks, cross_sums
+
+    def _cross_check(self, before, after):
+        """Return (letter mask, tile sum) for a square between before and after"""
+        total = sum(self.letter_values[ord(l) - 65] for l in before + after)
+        node = 0
+        for letter in before:
+            edge = self._edge(node, letter)
+            node = edge >> CHILD_SHIFT if edge is not None else 0
+            if not node:
+                break
+        if before and not node:
+            return 0, total
+        mask = 0
+        j = node
+        edges = self.edges
+        while True:
+            edge = edges[j]
+            if self._spells_word(edge, after):
+                mask |= 1 << (edge & LETTER_MASK)
+            if edge & LAST:
+                break
+            j += 1
+        return mask, total
+
+    def _spells_word(self, edge, suffix):
+        """Return True if following suffix after edge ends on a word"""
+        for letter in suffix:
+            child = edge >> CHILD_SHIFT
+            if not child:
+                return False
+            edge = self._edge(child, letter)
+            if edge is None:
+                return False
+        return bool(edge & TERMINAL)
+
+    def place_blanks(self, tiles, cross_sums_by_pos):
+        """Move the blanks among a placement's tiles to where they cost least.
+
+        The search plays a blank (lowercase) only when the rack has run out
+        of that letter, so the number of blanks per letter is fixed, but any
+        tile of the same letter could be the blank. A tile is worth its
+        letter multiplier times the main word's multiplier plus, when it
+        forms a cross-word, its own word multiplier; the blanks go on the
+        tiles worth least. Returns the new tiles list.
+        """
+        size = self.size
+        main_mult = 1
+        for row, col, _ in tiles:
+            main_mult *= self.word_mult[row * size + col]
+
+        def worth(i):
+            row, col, _ = tiles[i]
+            square = row * size + col
+            cross = self.word_mult[square] if cross_sums_by_pos.get((row, col)) is not None else 0
+            return self.letter_mult[square] * (main_mult + cross), -i
+
+        tiles = list(tiles)
+        for blank in set(letter for _, _, letter in tiles if letter.islower()):
+            letter = blank.upper()
+            same = sorted((i for i, tile in enumerate(tiles) if tile[2] in (letter, blank)), key=worth)
+            blanks = sum(1 for i in same if tiles[i][2] == blank)
+            for rank, i in enumerate(same):
+                row, col, _ = tiles[i]
+                tiles[i] = (row, col, blank if rank < blanks else letter)
+        return tiles
+
+    def score_tiles(self, tiles, word_squares, cross_sums_by_pos):
+        """Score a placement from its new tiles and the squares of its main word"""
+        letter_values = self.letter_values
+        size = self.size
+        placed = {(row, col): letter for row, col, letter in tiles}
+        main_score = 0
+        main_mult = 1
+        cross_total = 0
+        for row, col, letter in word_squares:
+            value = 0 if letter.islower() else letter_values[ord(letter) - 65]
+            if (row, col) in placed:
+                letter_mult = self.letter_mult[row * size + col]
+                word_mult = self.word_mult[row * size + col]
+                main_score += value * letter_mult
+                main_mult *= word_mult
+                cross_sum = cross_sums_by_pos.get((row, col))
+                if cross_sum is not None:
+                    cross_total += (cross_sum + value * letter_mult) * word_mult
+            else:
+                main_score += value
+        score = main_score * main_mult + cross_total
+        if len(tiles) == RACK_SIZE:
+            score += BINGO_BONUS
+        return score
+
+
+class _LineSearch:
+    """Left-part / extend-right recursion for the anchors of one line.
+
+    When moves is a full TopK, finished words whose score bound can't
+    beat the worst kept move are counted but not scored. The bound counts
+    a blank as its letter, capped at the best real tile on the rack, since
+    place_blanks can only move it onto a tile of the same letter.
+    """
+
+    def __init__(self, generator, index, line, checks, cross_sums, counts, direction, moves):
+        self.generator = generator
+        self.edges = generator.edges
+        self.index = index
+        self.line = line
+        self.checks = checks
+        self.cross_sums = cross_sums
+        self.counts = counts
+        self.direction = direction
+        self.moves = moves
+        self.size = generator.size
+        self.examined = 0
+        self.pruned = 0
+        # Taken now: the search lends counts out while it recurses
+        self.best_value = max((generator.letter_values[i] for i in range(26) if counts[i]),
+                              default=0)
+        self.top = moves if isinstance(moves, TopK) else None
+        self.floor = None
+        self.line_values = None
+        self._update_floor()
+
+    def _update_floor(self):
+        """Track the score a move must beat to get into a full TopK"""
+        worst = self.top.worst() if self.top is not None else None
+        if worst is None:
+            return
+        self.floor = worst.score
+        if self.line_values is None:
+            self._prepare_bounds()
+
+    def _prepare_bounds(self):
+        """Precompute the line's multipliers and tile values for _bound"""
+        generator = self.generator
+        size = self.size
+        squares = [self.index * size + i if self.direction == ACROSS else i * size + self.index
+                   for i in range(size)]
+        self.letter_mult = [generator.letter_mult[square] for square in squares]
+        self.word_mult = [generator.word_mult[square] for square in squares]
+        values = generator.letter_values
+        self.line_values = [values[ord(letter) - 65] if letter else 0 for letter in self.line]
+        self.blank_values = [min(value, self.best_value) for value in values]
+
+    def left_part(self, partial, node, limit, anchor):
+        """Try every rack-made left part up to limit tiles long, then extend right"""
+        self.extend_right(partial, node, anchor, anchor)
+        if limit == 0:
+            return
+        edges = self.edges
+        counts = self.counts
+        i = node
+        while True:
+            edge = edges[i]
+            letter_index = edge & LETTER_MASK
+            child = edge >> CHILD_SHIFT
+            if child:
+                if counts[letter_index]:
+                    counts[letter_index] -= 1
+                    self.left_part(partial + ALPHABET[letter_index], child, limit - 1, anchor)
+                    counts[letter_index] += 1
+                elif counts[BLANK_INDEX]:
+                    counts[BLANK_INDEX] -= 1
+                    self.left_part(partial + BLANK_LETTERS[letter_index], child, limit - 1, anchor)
+                    counts[BLANK_INDEX] += 1
+            if edge & LAST:
+                return
+            i += 1
+
+    def extend_right(self, partial, node, square, anchor, terminal=False):
+        """Extend partial rightwards from square, recording complete words.
+
+        node is the DAWG node reached by partial; 0 means the root while
+        partial is empty and "no continuations" once it is not.
+        """
+        self.examined += 1
+        line = self.line
+        if square >= self.size or not line[square]:
+            if terminal and square > anchor:
+                self._record(partial, square)
+            if square >= self.size or not node and partial:
+                return
+            allowed = self.checks[square]
+            edges = self.edges
+            counts = self.counts
+            i = node
+            while True:
+                edge = edges[i]
+                letter_index = edge & LETTER_MASK
+                # Real tiles first; a blank stands in once the rack runs out
+                if counts[letter_index]:
+                    if allowed >> letter_index & 1:
+                        counts[letter_index] -= 1
+                        self.extend_right(partial + ALPHABET[letter_index], edge >> CHILD_SHIFT,
+                                          square + 1, anchor, bool(edge & TERMINAL))
+                        counts[letter_index] += 1
+                elif counts[BLANK_INDEX] and allowed >> letter_index & 1:
+                    counts[BLANK_INDEX] -= 1
+                    self.extend_right(partial + BLANK_LETTERS[letter_index], edge >> CHILD_SHIFT,
+                                      square + 1, anchor, bool(edge & TERMINAL))
+                    counts[BLANK_INDEX] += 1
+                if edge & LAST:
+                    return
+                i += 1
+        elif node:
+            edge = self.generator._edge(node, line[square])
+            if edge is not None:
+                self.extend_right(partial + line[square], edge >> CHILD_SHIFT, square + 1,
+                                  anchor, bool(edge & TERMINAL))
+
+    def _record(self, word, end):
+        """Turn a finished line-local word into a scored Move"""
+        start = end - len(word)
+        if self.direction == ACROSS:
+            position = lambda i: (self.index, i)
+        else:
+            position = lambda i: (i, self.index)
+
+        tiles = []
+        cross_sums = {}
+        word_squares = []
+        for offset, letter in enumerate(word):
+            i = start + offset
+            pos = position(i)
+            word_squares.append((pos[0], pos[1], letter))
+            if not self.line[i]:
+                tiles.append((pos[0], pos[1], letter))
+                cross_sums[pos] = self.cross_sums[i]
+
+        if self.direction == DOWN and len(tiles) == 1:
+            # A lone tile with a horizontal neighbour was already found
+            # by the across pass
+            if any(self.cross_sums[i] is not None for i in range(start, end)
+                   if not self.line[i]):
+                return
+        if self.floor is not None and self._bound(word, start) < self.floor:
+            self.pruned += 1
+            return
+        if not word.isupper():
+            # Blanks were played; settle which tiles they are
+            tiles = self.generator.place_blanks(tiles, cross_sums)
+            letters = {(row, col): letter for row, col, letter in tiles}
+            word_squares = [(row, col, letters.get((row, col), letter))
+                            for row, col, letter in word_squares]
+            word = ''.join(letter for _, _, letter in word_squares)
+        score = self.generator.score_tiles(tiles, word_squares, cross_sums)
+        row, col = position(start)
+        self.moves.append(Move(row, col, self.direction, word, score, tuple(tiles)))
+        if self.top is not None:
+            self._update_floor()
+
+    def _bound(self, word, start):
+        """Return an upper bound on the score of word played from start,
+        wherever place_blanks puts its blanks"""
+        letters, mult, cross, placed = 0, 1, 0, 0
+        for i, letter in enumerate(word, start):
+            if self.line[i]:
+                letters += self.line_values[i]
+                continue
+            if letter.islower():
+                value = self.blank_values[ord(letter) - 97] * self.letter_mult[i]
+            else:
+                value = self.generator.letter_values[ord(letter) - 65] * self.letter_mult[i]
+            letters += value
+            mult *= self.word_mult[i]
+            if self.cross_sums[i] is not None:
+                cross += (self.cross_sums[i] + value) * self.word_mult[i]
+            placed += 1
+        return letters * mult + cross + (BINGO_BONUS if placed == RACK_SIZE else 0)
+
+
+def benchmark(save_path='scrabby_save.txt', repeats=20):
+    """Time full move generation for the position in a save file"""
+    from dictionary_cache import load_dictionary
+    from game_state import LETTER_SCORES, SPECIAL_SQUARES, GameState
+
+    state = GameState.load(save_path)
+    board = state.grid()
+    rack = state.rack
+    generator = MoveGenerator(load_dictionary().dawg, LETTER_SCORES, SPECIAL_SQUARES)
+
+    moves = generator.generate(board, rack)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        generator.generate(board, rack)
+    elapsed = (time.perf_counter() - start) / repeats * 1000
+    print(f"rack {''.join(rack)}: {len(moves)} moves in {elapsed:.1f} ms")
+    for move in moves[:10]:
+        print(f"  {move.word:<10} {move.direction:<7} ({move.row},{move.col})  {move.score}")
+
+
+if __name__ == '__main__':
+    benchmark()
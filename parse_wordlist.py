@@ -1,16 +1,163 @@
-"""Parse NWL2023.txt to create a clean wordlist"""
-
-def parse_nwl():
-    with open('NWL2023.txt', 'r') as infile:
-        with open('wordlist.txt', 'w') as outfile:
-            for line in infile:
-                # Split on first whitespace to separate word from definition
-                parts = line.strip().split(None, 1)
-                if parts:  # Make sure we have at least one part
-                    word = parts[0].strip().upper()
-                    if word:  # Make sure we have a non-empty word
-                        outfile.write(word + '\n')
+"""Parse NWL2023.txt and build every dictionary artefact in one pass
+
+Streams the source once, writing the plain wordlist.txt while collecting
+the words and per-length/per-letter statistics, then compiles the binary
+dictionary (word list, anagram-signature index and DAWG) that the game
+maps at startup. Nothing is rebuilt while the source is unchanged.
+
+    python parse_wordlist.py
+    python parse_wordlist.py --source NWL2023.txt --force
+"""
+
+import argparse
+import json
+import os
+import string
+import time
+import zlib
+
+from dictionary_cache import CompiledDictionary, cache_is_fresh, cache_path_for, compile_dictionary
+
+# How many skipped words the stats file lists by name
+SKIPPED_EXAMPLES = 10
+
+
+def stats_path_for(path):
+    """Return the build stats/manifest file that belongs to a word list"""
+    return os.path.splitext(path)[0] + '_stats.json'
+
+
+class BuildManifest:
+    """What the last build was made from, as recorded in the stats file"""
+
+    def __init__(self, stats):
+        source = stats['source']
+        self.source_size = source['size']
+        self.source_mtime = source['mtime_ns']
+        self.source_crc = source['crc32']
+
+
+def parse_line(line):
+    """Return the upper-case word at the start of a source line, or ''"""
+    # Split on first whitespace to separate word from definition
+    parts = line.split(None, 1)
+    return parts[0].strip().upper() if parts else ''
+
+
+def is_playable(word):
+    """True if word is spelt only with the letters A-Z, as every tile is"""
+    return word.isascii() and word.isalpha()
+
+
+def build_is_current(source, output, stats_path):
+    """True if the last build used this exact source and its outputs are intact"""
+    try:
+        with open(stats_path) as f:
+            manifest = BuildManifest(json.load(f))
+        if not cache_is_fresh(manifest, os.stat(source), source):
+            return False
+        dictionary = CompiledDictionary(cache_path_for(output))
+        return cache_is_fresh(dictionary, os.stat(output), output)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def build(source='NWL2023.txt', output='wordlist.txt', force=False):
+    """Build wordlist.txt, its compiled dictionary and stats from source.
+
+    Words with anything but A-Z in them are left out of every output and
+    counted, with a few examples, under 'skipped' in the stats. Returns
+    the stats dict, or None if everything was already current.
+    """
+    stats_path = stats_path_for(output)
+    if not force and build_is_current(source, output, stats_path):
+        return None
+
+    start = time.perf_counter()
+    source_stat = os.stat(source)
+    rewrite = not (os.path.exists(output) and os.path.samefile(source, output))
+    source_crc = output_crc = 0
+    words = set()
+    lengths = {}
+    letters = dict.fromkeys(string.ascii_uppercase, 0)
+    first_letters = dict.fromkeys(string.ascii_uppercase, 0)
+    skipped = 0
+    skipped_examples = []
+
+    tmp_path = output + '.tmp'
+    outfile = open(tmp_path, 'wb') if rewrite else None
+    try:
+        with open(source, 'rb') as infile:
+            for raw in infile:
+                source_crc = zlib.crc32(raw, source_crc)
+                word = parse_line(raw.decode('utf-8', 'replace'))
+                if not word:
+                    continue
+                if not is_playable(word):
+                    skipped += 1
+                    if len(skipped_examples) < SKIPPED_EXAMPLES:
+                        skipped_examples.append(word)
+                    continue
+                if outfile is not None:
+                    encoded = word.encode('ascii') + b'\n'
+                    outfile.write(encoded)
+                    output_crc = zlib.crc32(encoded, output_crc)
+                # The same filter as dictionary_cache.read_word_list
+                if len(word) < 2 or word in words:
+                    continue
+                words.add(word)
+                lengths[len(word)] = lengths.get(len(word), 0) + 1
+                first_letters[word[0]] += 1
+                for letter in word:
+                    letters[letter] += 1
+    finally:
+        if outfile is not None:
+            outfile.close()
+    if rewrite:
+        os.replace(tmp_path, output)
+    else:
+        output_crc = source_crc
+    parse_seconds = time.perf_counter() - start
+
+    # The compiled dictionary is keyed to wordlist.txt, so load_dictionary
+    # finds it fresh and never rebuilds at runtime
+    compile_dictionary(words, cache_path_for(output), os.stat(output), output_crc)
+    stats = {
+        'source': {'path': source, 'size': source_stat.st_size,
+                   'mtime_ns': source_stat.st_mtime_ns, 'crc32': source_crc},
+        'words': len(words),
+        'by_length': {str(length): count for length, count in sorted(lengths.items())},
+        'letter_counts': letters,
+        'first_letter_counts': first_letters,
+        'skipped': {'count': skipped, 'examples': skipped_examples},
+        'parse_seconds': round(parse_seconds, 3),
+        'build_seconds': round(time.perf_counter() - start, 3),
+    }
+    with open(stats_path + '.tmp', 'w') as f:
+        json.dump(stats, f, indent=2)
+    os.replace(stats_path + '.tmp', stats_path)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', default='NWL2023.txt',
+                        help="word list with optional definitions after each word")
+    parser.add_argument('--output', default='wordlist.txt')
+    parser.add_argument('--force', action='store_true', help="rebuild even if the source is unchanged")
+    args = parser.parse_args(argv)
+
+    stats = build(args.source, args.output, args.force)
+    if stats is None:
+        print(f"{args.output} and {cache_path_for(args.output)} are up to date with {args.source}")
+        return
+    print(f"Wordlist created successfully! {stats['words']} words in {stats['build_seconds']:.1f}s "
+          f"-> {args.output}, {cache_path_for(args.output)}, {stats_path_for(args.output)}")
+    skipped = stats['skipped']
+    if skipped['count']:
+        print(f"Skipped {skipped['count']} words that are not all letters A-Z, e.g. "
+              f"{', '.join(skipped['examples'])}")
+
 
 if __name__ == '__main__':
-    parse_nwl()
-    print("Wordlist created successfully!")
+    main()
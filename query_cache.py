@@ -0,0 +1,249 @@
+"""Memoized rack and position queries: in-memory LRU with an optional sqlite tier
+
+Queries are keyed on a Zobrist hash of the board plus the sorted rack, so
+the same position and rack hit the cache however the tiles got there.
+The sqlite tier is shared by every session and worker process that opens
+the same file; results are namespaced by the dictionary's CRC32 so a new
+word list never sees stale answers.
+
+    python query_cache.py scrabby_cache.sqlite           # show what is cached
+    python query_cache.py scrabby_cache.sqlite --clear
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from game_state import BOARD_SIZE
+from movegen import Move
+
+# Entries kept in memory, and rows kept in the sqlite file
+DEFAULT_MAXSIZE = 1024
+DEFAULT_DISK_MAXSIZE = 100_000
+
+# One random 64-bit key per (square, letter); a board hashes to the XOR
+# of the keys of its tiles. Seeded so every process agrees on the hashes.
+_rng = random.Random(0x5C4ABB1)
+ZOBRIST = [[_rng.getrandbits(64) for _ in range(26)] for _ in range(BOARD_SIZE * BOARD_SIZE)]
+
+
+def zobrist_hash(board):
+    """Return the 64-bit Zobrist hash of a flat board of ASCII codes (0 = empty)"""
+    h = 0
+    for i, code in enumerate(board):
+        if code:
+            h ^= ZOBRIST[i][code - 65]
+    return h
+
+
+def grid_codes(grid):
+    """Flatten a grid of letters ('' or None for empty) into board codes"""
+    return bytes(ord(letter.upper()) if letter else 0 for row in grid for letter in row)
+
+
+def query_key(kind, board, rack_letters, limit=None):
+    """Canonical cache key: query kind, board hash, sorted rack and result limit"""
+    rack = ''.join(sorted(letter.upper() for letter in rack_letters if letter))
+    return f"{kind}:{zobrist_hash(board):016x}:{rack}:{'' if limit is None else limit}"
+
+
+class LRUCache:
+    """Size-bounded in-memory cache evicting the least recently used entry"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            return default
+        return self.entries[key]
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class QueryCache:
+    """LRU cache of JSON-able query results, optionally backed by sqlite.
+
+    Lookups try memory, then disk, promoting disk hits into memory. With
+    path, results are also written to a WAL-mode sqlite file that other
+    processes can read and write at the same time; it is trimmed to
+    disk_maxsize rows (oldest first) when opened. Safe to share between
+    threads. get and put take the namespace (a lexicon's CRC32) per call
+    when one cache serves several lexicons.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, path=None, namespace='',
+                 disk_maxsize=DEFAULT_DISK_MAXSIZE):
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self.namespace = str(namespace)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            with self.db:
+                self.db.execute('CREATE TABLE IF NOT EXISTS results (namespace TEXT, key TEXT, '
+                                'value TEXT, PRIMARY KEY (namespace, key))')
+                # INSERT OR REPLACE gives a row a new rowid, so low rowids are the oldest
+                self.db.execute('DELETE FROM results WHERE rowid IN (SELECT rowid FROM results '
+                                'ORDER BY rowid LIMIT max(0, (SELECT count(*) FROM results) - ?))',
+                                (disk_maxsize,))
+
+    def get(self, key, namespace=None):
+        """Return the cached value for key, or None"""
+        namespace = self.namespace if namespace is None else str(namespace)
+        with self.lock:
+            value = self.memory.get((namespace, key))
+            if value is not None:
+                self.memory_hits += 1
+                return value
+            if self.db is not None:
+                row = self.db.execute('SELECT value FROM results WHERE namespace = ? AND key = ?',
+                                      (namespace, key)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self.memory.put((namespace, key), value)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value, namespace=None):
+        """Store a JSON-able value in memory and, if configured, on disk"""
+        namespace = self.namespace if namespace is None else str(namespace)
+        with self.lock:
+            self.memory.put((namespace, key), value)
+            if self.db is not None:
+                with self.db:
+                    self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                    (namespace, key, json.dumps(value, separators=(',', ':'))))
+
+    def hit_ratio(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self):
+        """Return hit, miss and eviction counts and the hit ratio"""
+        return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.memory.evictions,
+                'entries': len(self.memory), 'hit_ratio': self.hit_ratio()}
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+def cached_moves(cache, generator, board, rack_letters, limit=None, stats=None, namespace=None):
+    """MoveGenerator.generate for a flat board of codes, through a QueryCache.
+
+    The generator's counts are cached with the moves, so stats gets the
+    same 'examined'/'matched' either way, plus 'cached': True on a hit.
+    namespace overrides the cache's own, for a generator on another lexicon.
+    """
+    key = query_key('moves', board, rack_letters, limit)
+    cached = cache.get(key, namespace)
+    if cached is None:
+        counts = {}
+        grid = [[chr(code) if code else '' for code in board[row * BOARD_SIZE:(row + 1) * BOARD_SIZE]]
+                for row in range(BOARD_SIZE)]
+        moves = generator.generate(grid, rack_letters, counts, limit)
+        cache.put(key, [[list(move) for move in moves], counts], namespace)
+    else:
+        rows, counts = cached
+        moves = [Move(row, col, direction, word, score, tuple(map(tuple, tiles)))
+                 for row, col, direction, word, score, tiles in rows]
+    if stats is not None:
+        for name, value in counts.items():
+            stats[name] = stats.get(name, 0) + value
+        if cached is not None:
+            stats['cached'] = True
+    return moves
+
+
+def benchmark(path='wordlist.txt', positions=50):
+    """Time move generation uncached, from the sqlite tier and from memory"""
+    import tempfile
+
+    from dictionary_cache import load_dictionary
+    from game_state import LETTER_SCORES, SPECIAL_SQUARES, GameState, TileBag
+    from movegen import MoveGenerator
+
+    dictionary = load_dictionary(path)
+    generator = MoveGenerator(dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    rng = random.Random(0)
+    queries = []
+    state = GameState()
+    bag = TileBag(rng)
+    for _ in range(positions):
+        rack = bag.draw(7) or list('AEINRST')
+        moves = generator.generate(state.grid(), rack, limit=1)
+        queries.append((bytes(state.board), rack))
+        if moves:
+            state.place(moves[0].tiles)
+
+    def run(cache):
+        start = time.perf_counter()
+        for board, rack in queries:
+            cached_moves(cache, generator, board, rack, limit=10)
+        return (time.perf_counter() - start) / len(queries) * 1000
+
+    with tempfile.TemporaryDirectory() as folder:
+        db_path = os.path.join(folder, 'cache.sqlite')
+        first = QueryCache(path=db_path, namespace=dictionary.source_crc)
+        miss_ms = run(first)
+        memory_ms = run(first)
+        second = QueryCache(path=db_path, namespace=dictionary.source_crc)
+        disk_ms = run(second)
+        first.close()
+        second.close()
+    print(f"miss (generate + store)   {miss_ms:9.3f} ms/query")
+    print(f"sqlite hit (new session)  {disk_ms:9.3f} ms/query")
+    print(f"memory hit                {memory_ms:9.3f} ms/query")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('cache', help="sqlite cache file")
+    parser.add_argument('--clear', action='store_true', help="delete every cached result")
+    args = parser.parse_args(argv)
+
+    db = sqlite3.connect(args.cache, timeout=30)
+    try:
+        if args.clear:
+            with db:
+                db.execute('DELETE FROM results')
+            db.execute('VACUUM')
+        for namespace, count in db.execute('SELECT namespace, count(*) FROM results GROUP BY namespace'):
+            print(f"dictionary crc {namespace}: {count} cached queries")
+        print(f"{os.path.getsize(args.cache) / 1e6:.1f} MB")
+    except sqlite3.OperationalError as e:
+        raise SystemExit(f"{args.cache}: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
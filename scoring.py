@@ -0,0 +1,178 @@
+"""Move scoring against compiled premium-square tables, single and batched"""
+
+import time
+
+import numpy as np
+
+from game_state import BOARD_SIZE, LETTER_MULT, LETTER_SCORES, RACK_SIZE, WORD_MULT
+from movegen import ACROSS, BINGO_BONUS
+
+
+def letter_value_table(letter_scores=LETTER_SCORES):
+    """Return a 256-entry array mapping ASCII codes to letter values"""
+    table = np.zeros(256, dtype=np.int32)
+    for letter, value in letter_scores.items():
+        table[ord(letter)] = value
+    return table
+
+
+def cross_tables(board, letter_scores=LETTER_SCORES, board_size=BOARD_SIZE):
+    """Return perpendicular tile sums for every square of a board.
+
+    Returns (sums, has_cross), each of shape (2, board_size ** 2). Row 0
+    describes the vertical run through each square (the cross-word of an
+    across move), row 1 the horizontal run (the cross-word of a down move).
+    has_cross is False where the square has no perpendicular neighbours.
+    """
+    sums = np.zeros((2, board_size * board_size), dtype=np.int32)
+    has_cross = np.zeros((2, board_size * board_size), dtype=bool)
+    for perp, (pr, pc) in enumerate(((1, 0), (0, 1))):
+        for i in range(board_size * board_size):
+            if board[i]:
+                continue
+            row, col = divmod(i, board_size)
+            for sign in (-1, 1):
+                r, c = row + sign * pr, col + sign * pc
+                while 0 <= r < board_size and 0 <= c < board_size and board[r * board_size + c]:
+                    sums[perp, i] += letter_scores[chr(board[r * board_size + c])]
+                    has_cross[perp, i] = True
+                    r, c = r + sign * pr, c + sign * pc
+    return sums, has_cross
+
+
+def score_move(board, move, letter_scores=LETTER_SCORES, letter_mult=LETTER_MULT,
+               word_mult=WORD_MULT, board_size=BOARD_SIZE):
+    """Score one move (row, col, direction, word) on a flat bytearray board.
+
+    Squares of the word already holding a tile count at face value; new
+    tiles pick up letter and word multipliers and score their cross-words.
+    Lowercase letters are blanks and score nothing.
+    """
+    across = move.direction == ACROSS
+    # Word direction, and the perpendicular direction its cross-words run in
+    dr, dc = (0, 1) if across else (1, 0)
+    pr, pc = (1, 0) if across else (0, 1)
+    main_score = 0
+    main_mult = 1
+    cross_total = 0
+    tiles = 0
+    for offset, letter in enumerate(move.word):
+        row, col = move.row + dr * offset, move.col + dc * offset
+        i = row * board_size + col
+        value = 0 if letter.islower() else letter_scores[letter]
+        if board[i]:
+            main_score += value
+            continue
+        tiles += 1
+        letter_points = value * letter_mult[i]
+        main_score += letter_points
+        main_mult *= word_mult[i]
+
+        # Cross-word through the new tile, if it has perpendicular neighbours
+        cross_sum = 0
+        found = False
+        for sign in (-1, 1):
+            r, c = row + sign * pr, col + sign * pc
+            while 0 <= r < board_size and 0 <= c < board_size and board[r * board_size + c]:
+                cross_sum += letter_scores[chr(board[r * board_size + c])]
+                found = True
+                r, c = r + sign * pr, c + sign * pc
+        if found:
+            cross_total += (cross_sum + letter_points) * word_mult[i]
+
+    score = main_score * main_mult + cross_total
+    if tiles == RACK_SIZE:
+        score += BINGO_BONUS
+    return score
+
+
+class BatchScorer:
+    """Scores many candidate moves on one board with NumPy.
+
+    Every letter of every move is flattened into one array, so letter and
+    word multipliers, cross-word sums and the bingo bonus are applied with
+    array operations rather than a Python loop per tile.
+    """
+
+    def __init__(self, board, letter_scores=LETTER_SCORES, letter_mult=LETTER_MULT,
+                 word_mult=WORD_MULT, board_size=BOARD_SIZE):
+        self.board = np.frombuffer(bytes(board), dtype=np.uint8)
+        self.size = board_size
+        self.values = letter_value_table(letter_scores)
+        self.letter_mult = np.frombuffer(bytes(letter_mult), dtype=np.uint8).astype(np.int32)
+        self.word_mult = np.frombuffer(bytes(word_mult), dtype=np.uint8).astype(np.int32)
+        self.cross_sums, self.has_cross = cross_tables(board, letter_scores, board_size)
+
+    def score(self, moves):
+        """Return an int array with the score of each (row, col, direction, word) move"""
+        count = len(moves)
+        if not count:
+            return np.zeros(0, dtype=np.int64)
+        lengths = np.fromiter((len(m.word) for m in moves), dtype=np.int64, count=count)
+        starts = np.fromiter((m.row * self.size + m.col for m in moves), dtype=np.int64, count=count)
+        down = np.fromiter((m.direction != ACROSS for m in moves), dtype=bool, count=count)
+        letters = np.frombuffer(''.join(m.word for m in moves).encode('ascii'), dtype=np.uint8)
+
+        # Flatten: one entry per letter of every move
+        move_index = np.repeat(np.arange(count), lengths)
+        first = np.cumsum(lengths) - lengths
+        offsets = np.arange(len(letters)) - np.repeat(first, lengths)
+        steps = np.where(down, self.size, 1)
+        squares = np.repeat(starts, lengths) + offsets * np.repeat(steps, lengths)
+
+        occupied = self.board[squares] != 0
+        new = ~occupied
+        letter_points = self.values[letters] * np.where(new, self.letter_mult[squares], 1)
+        word_mult = np.where(new, self.word_mult[squares], 1)
+
+        main_sum = np.bincount(move_index, weights=letter_points, minlength=count)
+        main_mult = np.multiply.reduceat(word_mult, first)
+
+        # Across moves form vertical cross-words (table row 0) and vice versa
+        perp = np.repeat(down.astype(np.int64), lengths)
+        crossing = new & self.has_cross[perp, squares]
+        cross_points = np.where(crossing, (self.cross_sums[perp, squares] + letter_points) * word_mult, 0)
+        cross_total = np.bincount(move_index, weights=cross_points, minlength=count)
+
+        tiles = np.bincount(move_index, weights=new, minlength=count)
+        scores = main_sum * main_mult + cross_total + np.where(tiles == RACK_SIZE, BINGO_BONUS, 0)
+        return scores.astype(np.int64)
+
+
+def score_moves(board, moves, letter_scores=LETTER_SCORES, letter_mult=LETTER_MULT,
+                word_mult=WORD_MULT, board_size=BOARD_SIZE):
+    """Score a list of candidate moves on a flat bytearray board in one batch"""
+    return BatchScorer(board, letter_scores, letter_mult, word_mult, board_size).score(moves)
+
+
+def benchmark(save_path='scrabby_save.txt', repeats=20):
+    """Report moves scored per second by the Python and NumPy paths"""
+    from dictionary_cache import load_dictionary
+    from game_state import SPECIAL_SQUARES, GameState
+    from movegen import MoveGenerator
+
+    state = GameState.load(save_path)
+    generator = MoveGenerator(load_dictionary().dawg, LETTER_SCORES, SPECIAL_SQUARES)
+    moves = generator.generate(state.grid(), 'AEINRST')  # a bingo-capable rack
+    moves += generator.generate(state.grid(), state.rack)
+    batch = moves * 10
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        python_scores = [score_move(state.board, move) for move in batch]
+    python_rate = len(batch) * repeats / (time.perf_counter() - start)
+
+    scorer = BatchScorer(state.board)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        batch_scores = scorer.score(batch)
+    batch_rate = len(batch) * repeats / (time.perf_counter() - start)
+
+    assert list(batch_scores) == python_scores == [m.score for m in batch]
+    print(f"{len(batch)} moves per batch")
+    print(f"{'python score_move':<24}{python_rate:>12,.0f} moves/s")
+    print(f"{'numpy BatchScorer':<24}{batch_rate:>12,.0f} moves/s")
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,243 @@
+"""Headless self-play simulation: scrabby-sim
+
+Plays complete games between bots with no Tk, spread across a process
+pool, and streams one JSON line of stats per game.
+
+    python scrabby_sim.py --games 200 --bots greedy random --workers 4
+    python scrabby_sim.py --games 100 --scaling
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dictionary_cache import load_dictionary
+from game_state import LETTER_SCORES, RACK_SIZE, SPECIAL_SQUARES, GameState, TileBag, rack_tile
+from movegen import MoveGenerator
+
+# A game also ends after this many consecutive scoreless turns
+MAX_SCORELESS_TURNS = 6
+
+
+def greedy_bot(moves, rack, rng):
+    """Play the highest-scoring move"""
+    return moves[0] if moves else None
+
+
+def random_bot(moves, rack, rng):
+    """Play a uniformly random legal move"""
+    return rng.choice(moves) if moves else None
+
+
+# Leave model for leave_bot, loaded on first use in each process
+_leave_model = None
+
+
+def leave_bot(moves, rack, rng):
+    """Play the move maximising score plus the value of the tiles kept"""
+    global _leave_model
+    if not moves:
+        return None
+    if _leave_model is None:
+        from leave_model import load_leave_model
+        _leave_model = load_leave_model(_wordlist, rebuild=False)
+    best, best_equity = None, None
+    for move in moves:
+        leave = list(rack)
+        remove_tiles(leave, move.tiles)
+        equity = move.score + _leave_model.value(leave)
+        if best is None or equity > best_equity:
+            best, best_equity = move, equity
+    return best
+
+
+BOTS = {
+    'greedy': greedy_bot,
+    'random': random_bot,
+    'leave': leave_bot,
+}
+
+
+def remove_tiles(rack, tiles):
+    """Take the letters of placed tiles off a rack"""
+    for _, _, letter in tiles:
+        rack.remove(rack_tile(letter))
+
+
+def play_game(generator, bots, seed, record_leaves=False, bag_counts=None):
+    """Play one complete game and return its stats.
+
+    Each player draws from a shared TileBag. A player with no legal move
+    exchanges the whole rack while the bag can cover it, and passes
+    otherwise. The game ends when a player goes out with the bag empty, or
+    after MAX_SCORELESS_TURNS scoreless turns in a row. Unplayed tiles are
+    then deducted, and the player who went out gains their value.
+
+    With record_leaves the stats also list every turn as
+    [player, score, leave], the leave being the tiles kept before drawing.
+    bag_counts replaces the tile distribution of BAG_COUNTS.
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    state = GameState()
+    bag = TileBag(rng, bag_counts)
+    racks = [bag.draw(RACK_SIZE) for _ in bots]
+    scores = [0] * len(bots)
+    bingos = [0] * len(bots)
+    turns = 0
+    scoreless = 0
+    player = 0
+    went_out = None
+    turn_log = []
+
+    while scoreless < MAX_SCORELESS_TURNS:
+        rack = racks[player]
+        moves = generator.generate(state.grid(), rack)
+        move = bots[player](moves, rack, rng)
+        turns += 1
+        if move is None:
+            kept = ''.join(rack)
+            if len(bag) >= RACK_SIZE:
+                racks[player] = bag.exchange(rack, rng)
+                kept = ''
+            scoreless += 1
+            turn_log.append([player, 0, kept])
+        else:
+            state.place(move.tiles)
+            remove_tiles(rack, move.tiles)
+            turn_log.append([player, move.score, ''.join(rack)])
+            rack.extend(bag.draw(RACK_SIZE - len(rack)))
+            scores[player] += move.score
+            bingos[player] += len(move.tiles) == RACK_SIZE
+            scoreless = 0 if move.score else scoreless + 1
+            if not rack:
+                went_out = player
+                break
+        player = (player + 1) % len(bots)
+
+    leftovers = [sum(LETTER_SCORES[letter] for letter in rack) for rack in racks]
+    for i, value in enumerate(leftovers):
+        scores[i] -= value
+    if went_out is not None:
+        scores[went_out] += sum(leftovers)
+
+    best = max(scores)
+    winners = [i for i, score in enumerate(scores) if score == best]
+    stats = {
+        'seed': seed,
+        'scores': scores,
+        'winner': winners[0] if len(winners) == 1 else None,
+        'turns': turns,
+        'bingos': bingos,
+        'tiles_left': len(bag),
+        'went_out': went_out,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+    if record_leaves:
+        stats['leaves'] = turn_log
+    return stats
+
+
+# Per-process state, set up once by _init_worker
+_generator = None
+_wordlist = 'wordlist.txt'
+
+
+def _init_worker(wordlist):
+    global _generator, _wordlist
+    _wordlist = wordlist
+    _generator = MoveGenerator(load_dictionary(wordlist).dawg, LETTER_SCORES, SPECIAL_SQUARES)
+
+
+def _run_game(game, bot_names, seed, record_leaves=False, bag_counts=None):
+    stats = play_game(_generator, [BOTS[name] for name in bot_names], seed, record_leaves,
+                      bag_counts)
+    stats['game'] = game
+    stats['bots'] = list(bot_names)
+    stats['pid'] = os.getpid()
+    return stats
+
+
+def game_seed(base_seed, game):
+    """Seed for one game, independent of which worker plays it"""
+    return base_seed * 1_000_003 + game
+
+
+def run_games(games, bot_names, workers, seed=0, wordlist='wordlist.txt', out=None,
+              record_leaves=False, bag_counts=None):
+    """Play games across a process pool, streaming stats as JSONL.
+
+    Returns (per-game stats in completion order, elapsed seconds).
+    """
+    load_dictionary(wordlist)  # Build the cache once before workers map it
+    if 'leave' in bot_names:
+        from leave_model import load_leave_model
+        load_leave_model(wordlist, workers=workers)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(wordlist,)) as executor:
+        futures = [executor.submit(_run_game, game, bot_names, game_seed(seed, game),
+                                   record_leaves, bag_counts)
+                   for game in range(games)]
+        for future in as_completed(futures):
+            stats = future.result()
+            results.append(stats)
+            if out is not None:
+                out.write(json.dumps(stats) + '\n')
+                out.flush()
+    return results, time.perf_counter() - start
+
+
+def summarize(results, bot_names, elapsed, workers):
+    """Return a one-line human summary of a batch of games"""
+    wins = [sum(1 for r in results if r['winner'] == i) for i in range(len(bot_names))]
+    means = [sum(r['scores'][i] for r in results) / max(1, len(results))
+             for i in range(len(bot_names))]
+    players = ', '.join(f"{name}: {win} wins, mean {mean:.1f}"
+                        for name, win, mean in zip(bot_names, wins, means))
+    return (f"{len(results)} games on {workers} worker(s) in {elapsed:.1f}s "
+            f"({len(results) / elapsed:.2f} games/s) - {players}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='scrabby-sim', description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('--bots', nargs='+', default=['greedy', 'greedy'], choices=sorted(BOTS),
+                        help="one bot per player, in turn order")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--seed', type=int, default=0, help="base RNG seed")
+    parser.add_argument('--wordlist', default='wordlist.txt')
+    parser.add_argument('--output', help="JSONL file for per-game stats (default: stdout)")
+    parser.add_argument('--scaling', action='store_true',
+                        help="time the games on 1 worker and on --workers, then report speedup")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        rates = {}
+        for workers in sorted({1, args.workers}):
+            results, elapsed = run_games(args.games, args.bots, workers, args.seed, args.wordlist)
+            rates[workers] = len(results) / elapsed
+            print(summarize(results, args.bots, elapsed, workers), file=sys.stderr)
+        if args.workers > 1:
+            speedup = rates[args.workers] / rates[1]
+            print(f"speedup x{speedup:.2f} on {args.workers} workers "
+                  f"({speedup / args.workers:.0%} efficiency)", file=sys.stderr)
+        return
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        results, elapsed = run_games(args.games, args.bots, args.workers, args.seed,
+                                     args.wordlist, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(summarize(results, args.bots, elapsed, args.workers), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
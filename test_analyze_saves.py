@@ -0,0 +1,38 @@
+"""analyze_saves reports the same legal-move count whatever --top is
+
+    python -m pytest test_analyze_saves.py
+"""
+
+import os
+import unittest
+
+from analyze_saves import analyze_state
+from dictionary_cache import load_dictionary
+from game_state import LETTER_SCORES, SPECIAL_SQUARES, GameState
+from movegen import MoveGenerator
+
+HERE = os.path.dirname(__file__)
+
+
+class LegalMovesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        dictionary = load_dictionary(os.path.join(HERE, 'wordlist.txt'))
+        cls.generator = MoveGenerator(dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+        cls.state = GameState.load(os.path.join(HERE, 'scrabby_save.txt'))
+
+    def test_count_does_not_depend_on_top(self):
+        grid = self.state.grid()
+        for rack in (self.state.rack, list('AEINRS?')):
+            state = GameState(board=self.state.board, rack=rack)
+            legal = len(self.generator.generate(grid, rack))
+            for top in (1, 2, 10, 1000):
+                with self.subTest(rack=''.join(rack), top=top):
+                    result = analyze_state(self.generator, state, top)
+                    self.assertEqual(result['legal_moves'], legal)
+                    self.assertEqual(len(result['moves']), min(top, legal))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+"""EndgameSolver results don't depend on what the solver searched before
+
+    python -m pytest test_endgame.py
+"""
+
+import os
+import unittest
+
+from dictionary_cache import load_dictionary
+from endgame import EndgameSolver, describe
+from game_state import LETTER_SCORES, SPECIAL_SQUARES, GameState
+from movegen import MoveGenerator
+
+HERE = os.path.dirname(__file__)
+
+
+class ReusedSolverTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        dictionary = load_dictionary(os.path.join(HERE, 'wordlist.txt'))
+        cls.generator = MoveGenerator(dictionary.dawg, LETTER_SCORES, SPECIAL_SQUARES)
+        cls.board = GameState.load(os.path.join(HERE, 'scrabby_save.txt')).board
+
+    def solve(self, solver, racks):
+        result = solver.solve(self.board, [list(rack) for rack in racks], max_depth=2)
+        return result['value'], [describe(move) for move in result['moves']]
+
+    def test_second_solve_matches_a_fresh_solver(self):
+        solver = EndgameSolver(self.generator)
+        self.solve(solver, ['DGLOPUW', 'EIKNOT'])
+        for racks in (['AEIRST', 'QZ'], ['QZ', 'AEIRST'], ['DGLOPUW', 'EIKNOT']):
+            with self.subTest(racks='/'.join(racks)):
+                self.assertEqual(self.solve(solver, racks),
+                                 self.solve(EndgameSolver(self.generator), racks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""find_rack_words against the brute-force scan it replaced
+
+    python -m pytest test_word_index.py
+"""
+
+import os
+import random
+import string
+import unittest
+
+from dawg import Dawg
+from dictionary_cache import read_word_list
+from game_state import LETTER_SCORES
+from word_index import AnagramIndex, find_rack_words, scan_rack_words
+
+
+def sample_racks(seed=0, count=40):
+    """Random racks of 1-7 tiles, about half of them with one or two blanks"""
+    rng = random.Random(seed)
+    racks = [[], ['?'], ['?', '?'], list('QQQ'), list('AEINRST'), list('aeinrs?')]
+    for _ in range(count):
+        blanks = rng.choice([0, 0, 1, 2])
+        size = rng.randint(max(1, blanks), 7)
+        racks.append(rng.choices(string.ascii_uppercase, k=size - blanks) + ['?'] * blanks)
+    return racks
+
+
+class FindRackWordsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.words = sorted(read_word_list(os.path.join(os.path.dirname(__file__), 'wordlist.txt')))
+        cls.dawg = Dawg.from_words(cls.words)
+        cls.index = AnagramIndex(cls.words)
+
+    def test_dawg_matches_scan(self):
+        for rack in sample_racks():
+            with self.subTest(rack=''.join(rack)):
+                self.assertEqual(find_rack_words(self.dawg, rack, LETTER_SCORES),
+                                 scan_rack_words(self.words, rack, LETTER_SCORES))
+
+    def test_anagram_index_matches_scan_without_blanks(self):
+        for rack in sample_racks(seed=1):
+            if '?' in rack:
+                continue
+            with self.subTest(rack=''.join(rack)):
+                self.assertEqual(find_rack_words(self.index, rack, LETTER_SCORES),
+                                 scan_rack_words(self.words, rack, LETTER_SCORES))
+
+    def test_limit_keeps_the_best(self):
+        for rack in sample_racks(seed=2, count=10):
+            expected = scan_rack_words(self.words, rack, LETTER_SCORES)
+            for limit in (0, 1, 25):
+                with self.subTest(rack=''.join(rack), limit=limit):
+                    self.assertEqual(find_rack_words(self.dawg, rack, LETTER_SCORES, limit=limit),
+                                     expected[:limit])
+
+    def test_stats_count_matches(self):
+        stats = {}
+        words = find_rack_words(self.dawg, list('AEINRS?'), LETTER_SCORES, stats)
+        self.assertEqual(stats['matched'], len(words))
+        self.assertGreaterEqual(stats['examined'], stats['matched'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Bounded top-K collection over a stream of candidates"""
+
+import heapq
+
+
+class _Entry:
+    """Heap entry ordered so the heap root is the worst kept candidate"""
+
+    __slots__ = ('key', 'item')
+
+    def __init__(self, key, item):
+        self.key = key
+        self.item = item
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+class TopK:
+    """Keeps the limit items with the smallest key(item) seen so far.
+
+    Has an append method so it can stand in for the result list of a
+    search; memory and heap work stay bounded by limit however many
+    candidates stream through. seen counts every candidate offered.
+    """
+
+    def __init__(self, limit, key):
+        self.limit = limit
+        self.key = key
+        self.heap = []
+        self.seen = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def append(self, item):
+        self.seen += 1
+        if self.limit <= 0:
+            return
+        key = self.key(item)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, _Entry(key, item))
+        elif key < self.heap[0].key:
+            heapq.heapreplace(self.heap, _Entry(key, item))
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def worst(self):
+        """Return the kept item a better candidate would replace, or None while there is room"""
+        if len(self.heap) < self.limit or not self.heap:
+            return None
+        return self.heap[0].item
+
+    def sorted(self):
+        """Return the kept items, smallest key first"""
+        return [entry.item for entry in sorted(self.heap, key=lambda entry: entry.key)]
+
+    @property
+    def truncated(self):
+        """True if some candidates were dropped"""
+        return self.seen > len(self.heap)
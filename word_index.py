@@ -0,0 +1,122 @@
+"""Anagram-signature index for fast rack word lookups"""
+
+import itertools
+
+from game_state import BLANK
+from topk import TopK
+
+
+def word_signature(word):
+    """Return the sorted-letter signature shared by all anagrams of a word"""
+    return ''.join(sorted(word))
+
+
+class AnagramIndex:
+    """Dictionary words grouped by sorted-letter signature.
+
+    Built once when the word list is loaded. A rack query then only has to
+    enumerate the distinct sub-multisets of the rack (at most 2^7 for seven
+    tiles) and look each one up, instead of scanning every dictionary word.
+    Racks with blanks need Dawg.rack_words; a blank here matches nothing.
+    """
+
+    def __init__(self, words=()):
+        self.groups = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Add a single word to the index"""
+        signature = word_signature(word)
+        group = self.groups.get(signature)
+        if group is None:
+            self.groups[signature] = [word]
+        elif word not in group:
+            group.append(word)
+
+    def anagrams(self, signature):
+        """Return the words whose letters are exactly the given signature"""
+        return self.groups.get(signature, ())
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups.values())
+
+    def rack_words(self, rack_letters, min_length=2):
+        """Yield every indexed word that can be made from the rack letters"""
+        for signature in rack_signatures(rack_letters, min_length):
+            yield from self.anagrams(signature)
+
+
+def rack_signatures(rack_letters, min_length=2):
+    """Yield each distinct sub-multiset of the rack as a signature string"""
+    rack = sorted(letter.upper() for letter in rack_letters)
+    seen = set()
+    for length in range(min_length, len(rack) + 1):
+        # combinations() of a sorted rack yields sorted tuples, so each
+        # distinct sub-multiset is already in signature form
+        for combo in itertools.combinations(rack, length):
+            if combo in seen:
+                continue
+            seen.add(combo)
+            yield ''.join(combo)
+
+
+def score_word(word, letter_scores):
+    """Return the face value of a word, ignoring board multipliers"""
+    # Letters played by blanks are lowercase and score nothing
+    return sum(letter_scores.get(letter, 0) for letter in word)
+
+
+def find_rack_words(index, rack_letters, letter_scores, stats=None, limit=None):
+    """Return (word, score) pairs playable from the rack, best first.
+
+    With limit only the best limit pairs are kept, through a bounded heap.
+    stats is passed on to indexes that count their work (see Dawg.rack_words).
+    """
+    if stats is None:
+        words = index.rack_words(rack_letters)
+    else:
+        words = index.rack_words(rack_letters, stats=stats)
+    if limit is not None:
+        best = TopK(limit, lambda pair: (-pair[1], pair[0]))
+        best.extend((word, score_word(word, letter_scores)) for word in words)
+        return best.sorted()
+    possible_words = [(word, score_word(word, letter_scores)) for word in words]
+    # Sort by score (descending), then alphabetically
+    possible_words.sort(key=lambda x: (-x[1], x[0]))
+    return possible_words
+
+
+def scan_rack_words(words, rack_letters, letter_scores):
+    """Brute-force reference for find_rack_words that checks every word"""
+    letter_freq = {}
+    for letter in rack_letters:
+        letter = letter.upper()
+        letter_freq[letter] = letter_freq.get(letter, 0) + 1
+    blanks = letter_freq.pop(BLANK, 0)
+
+    possible_words = []
+    for word in words:
+        # Skip words longer than our rack
+        if len(word) > len(rack_letters):
+            continue
+
+        # Spell the word from our letters, real tiles first, then blanks
+        word_freq = dict(letter_freq)
+        blanks_left = blanks
+        spelled = []
+        for letter in word:
+            if word_freq.get(letter, 0):
+                word_freq[letter] -= 1
+                spelled.append(letter)
+            elif blanks_left:
+                blanks_left -= 1
+                spelled.append(letter.lower())
+            else:
+                break
+        else:
+            spelled = ''.join(spelled)
+            possible_words.append((spelled, score_word(spelled, letter_scores)))
+
+    possible_words.sort(key=lambda x: (-x[1], x[0]))
+    return possible_words
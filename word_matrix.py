@@ -0,0 +1,146 @@
+"""NumPy-backed word table for bulk rack feasibility queries"""
+
+import string
+import time
+
+import numpy as np
+
+ALPHABET = string.ascii_uppercase
+
+# Racks per chunk when answering 2-D queries; keeps the (racks x words)
+# boolean mask to a few tens of MB regardless of how many racks are passed
+RACK_CHUNK = 64
+
+
+class WordTable:
+    """Dictionary stored as a (n_words x 26) uint8 letter-count matrix.
+
+    Row i holds the letter counts of words[i], and scores[i] its face value.
+    A rack is a length-26 count vector, so "which words can this rack make"
+    is a single broadcasted comparison over the whole matrix.
+    """
+
+    def __init__(self, words, letter_scores):
+        self.words = sorted(words)
+        self.counts = np.zeros((len(self.words), len(ALPHABET)), dtype=np.uint8)
+        for i, word in enumerate(self.words):
+            for letter in word:
+                self.counts[i, ord(letter) - 65] += 1
+        self.letter_values = np.array([letter_scores[letter] for letter in ALPHABET],
+                                      dtype=np.int32)
+        self.scores = self.counts.astype(np.int32) @ self.letter_values
+        self.lengths = self.counts.sum(axis=1, dtype=np.int32)
+        # Bit i set when the word uses letter i; lets a query discard every
+        # word needing a letter the rack lacks before comparing counts
+        self.letter_sets = ((self.counts > 0).astype(np.uint32)
+                            << np.arange(len(ALPHABET), dtype=np.uint32)).sum(
+                                axis=1, dtype=np.uint32)
+
+    @classmethod
+    def from_file(cls, path, letter_scores):
+        """Build a table from a wordlist.txt-style file"""
+        with open(path, 'r') as f:
+            words = set(word.strip().upper() for word in f if len(word.strip()) >= 2)
+        return cls(words, letter_scores)
+
+    @staticmethod
+    def rack_vector(rack_letters):
+        """Return the length-26 letter-count vector for a rack (no blanks)"""
+        rack = np.zeros(len(ALPHABET), dtype=np.uint8)
+        for letter in rack_letters:
+            if not letter.isalpha():
+                raise ValueError(f"{letter!r} is not a letter; blank racks need Dawg.rack_words")
+            rack[ord(letter.upper()) - 65] += 1
+        return rack
+
+    @classmethod
+    def rack_matrix(cls, racks):
+        """Return an (n_racks x 26) count matrix for a list of racks"""
+        return np.array([cls.rack_vector(rack) for rack in racks], dtype=np.uint8)
+
+    def playable_mask(self, racks):
+        """Return which words each rack can make.
+
+        A 1-D count vector gives an (n_words,) mask; a 2-D (n_racks x 26)
+        array gives an (n_racks x n_words) mask.
+        """
+        racks = np.asarray(racks, dtype=np.uint8)
+        if racks.ndim == 1:
+            return self.playable_mask(racks[None, :])[0]
+        rack_sets = ((racks > 0).astype(np.uint32)
+                     << np.arange(len(ALPHABET), dtype=np.uint32)).sum(
+                         axis=1, dtype=np.uint32)
+        mask = np.zeros((len(racks), len(self.words)), dtype=bool)
+        for start in range(0, len(racks), RACK_CHUNK):
+            chunk = racks[start:start + RACK_CHUNK]
+            # Cheap letter-set filter first, then the exact count comparison
+            # on the surviving (rack, word) pairs only
+            rows, cols = np.nonzero(
+                (self.letter_sets[None, :] & ~rack_sets[start:start + RACK_CHUNK, None]) == 0)
+            fits = (self.counts[cols] <= chunk[rows]).all(axis=1)
+            mask[start + rows[fits], cols[fits]] = True
+        return mask
+
+    def rack_words(self, rack_letters):
+        """Return (word, score) pairs playable from one rack, best first"""
+        mask = self.playable_mask(self.rack_vector(rack_letters))
+        indices = np.flatnonzero(mask)
+        # words are sorted, so a stable sort on score keeps ties alphabetical
+        indices = indices[np.argsort(-self.scores[indices], kind='stable')]
+        return [(self.words[i], int(self.scores[i])) for i in indices]
+
+    def best_words(self, racks):
+        """Return the top-scoring (word, score) for each rack in a batch.
+
+        Racks that cannot make any word get (None, 0).
+        """
+        mask = self.playable_mask(racks)
+        masked_scores = np.where(mask, self.scores[None, :], -1)
+        best = masked_scores.argmax(axis=1)
+        results = []
+        for row, i in enumerate(best):
+            score = int(masked_scores[row, i])
+            results.append((self.words[i], score) if score >= 0 else (None, 0))
+        return results
+
+    def playable_counts(self, racks):
+        """Return how many words each rack in a batch can make"""
+        return self.playable_mask(racks).sum(axis=1)
+
+
+def benchmark(path='wordlist.txt', queries=200, seed=0):
+    """Print per-query latency of the NumPy table next to the Python paths"""
+    import random
+    from game_state import LETTER_SCORES
+    from word_index import AnagramIndex, find_rack_words, scan_rack_words
+
+    rng = random.Random(seed)
+    racks = [rng.choices(ALPHABET, k=7) for _ in range(queries)]
+
+    table = WordTable.from_file(path, LETTER_SCORES)
+    index = AnagramIndex(table.words)
+
+    def per_query(func, sample):
+        start = time.perf_counter()
+        for rack in sample:
+            func(rack)
+        return (time.perf_counter() - start) / len(sample) * 1000
+
+    scan_sample = racks[:max(1, queries // 20)]
+    print(f"{'path':<32}{'ms/query':>10}")
+    print(f"{'python scan (update_best_word)':<32}"
+          f"{per_query(lambda r: scan_rack_words(table.words, r, LETTER_SCORES), scan_sample):>10.3f}")
+    print(f"{'python anagram index':<32}"
+          f"{per_query(lambda r: find_rack_words(index, r, LETTER_SCORES), racks):>10.3f}")
+    print(f"{'numpy single rack':<32}"
+          f"{per_query(table.rack_words, racks):>10.3f}")
+
+    matrix = WordTable.rack_matrix(racks)
+    start = time.perf_counter()
+    table.best_words(matrix)
+    elapsed = (time.perf_counter() - start) / len(racks) * 1000
+    print(f"{'numpy batch best word':<32}{elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    benchmark()